@@ -0,0 +1,199 @@
+import sys
+import numpy as np
+
+from orientation_estimator import OrientationEstimator
+
+
+def parse_imu_log(file_path):
+    """
+    Extract the raw IMU samples written by FlightLogger.log_imu.
+    Returns (time_ms, accel, gyro) with accel in g and gyro in °/s, shape (N, 3).
+    """
+    rows = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            fields = line.strip().split(',')
+            if len(fields) == 8 and fields[1] == "IMU":
+                try:
+                    rows.append([float(fields[0])] + [float(value) for value in fields[2:]])
+                except ValueError:
+                    continue
+
+    data = np.array(rows, dtype=float).reshape(-1, 7)
+    return data[:, 0], data[:, 1:4], data[:, 4:7]
+
+
+def accel_angles(accel):
+    """Pitch and roll (°) seen by the accelerometer, same convention as OrientationEstimator."""
+    pitch = np.degrees(np.arctan2(accel[:, 0], np.sqrt(accel[:, 1] ** 2 + accel[:, 2] ** 2)))
+    roll = np.degrees(np.arctan2(accel[:, 1], accel[:, 2]))
+    return pitch, roll
+
+
+def linear_recurrence(A, c, x0, block=256):
+    """
+    Solve x[k] = A @ x[k-1] + c[k] for every k, with x[-1] = x0.
+
+    The system is diagonalized and every block of samples is solved with a
+    cumulative sum; only the block boundaries are carried in a Python loop.
+    """
+    eigenvalues, V = np.linalg.eig(A)
+    V_inv = np.linalg.inv(V)
+    n, dim = c.shape
+
+    # Keep |λ|^-block far away from overflow for fast-decaying modes
+    smallest = np.min(np.abs(eigenvalues))
+    if smallest < 1.0:
+        block = max(1, min(block, int(200 / -np.log10(max(smallest, 1e-300)))))
+
+    blocks = -(-n // block)
+    d = np.zeros((blocks * block, dim), dtype=complex)
+    d[:n] = c @ V_inv.T
+    d = d.reshape(blocks, block, dim)
+
+    # Powers λ^k for k = 0..block within a block
+    k = np.arange(block + 1)[:, None]
+    powers = eigenvalues[None, :] ** k
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse_powers = np.where(powers[:block] != 0, 1.0 / powers[:block], 0.0)
+
+    # Zero-state response inside every block at once
+    partial = powers[:block] * np.cumsum(d * inverse_powers, axis=1)
+
+    # Carry the block start states through the blocks
+    starts = np.empty((blocks, dim), dtype=complex)
+    state = V_inv @ x0
+    for b in range(blocks):
+        starts[b] = state
+        state = powers[block] * state + partial[b, -1]
+
+    y = partial + powers[1:][None, :, :] * starts[:, None, :]
+    return (y.reshape(-1, dim)[:n] @ V.T).real
+
+
+class AttitudeSmoother:
+    """
+    Offline attitude reconstruction from raw IMU samples.
+
+    Pitch and roll each use a two-state model [angle, gyro bias] driven by the
+    gyro rate and corrected by the accelerometer angle, the same kinematics as
+    OrientationEstimator. The Kalman gain and the Rauch–Tung–Striebel gain are
+    solved once for the nominal loop period, which turns the forward filter and
+    the backward smoothing pass into linear recurrences evaluated in NumPy.
+    """
+
+    def __init__(self, gyro_noise=0.5, bias_walk=0.05, accel_noise=3.0):
+        self.gyro_noise = gyro_noise      # °/s, white noise on the gyro rate
+        self.bias_walk = bias_walk        # °/s/√s, random walk of the gyro bias
+        self.accel_noise = accel_noise    # °, noise of the accelerometer angle
+
+    def steady_state_gains(self, dt, iterations=100_000, tolerance=1e-12):
+        """Iterate the Riccati recursion to the steady-state Kalman and RTS gains."""
+        F = np.array([[1.0, -dt], [0.0, 1.0]])
+        H = np.array([[1.0, 0.0]])
+        Q = np.diag([(self.gyro_noise * dt) ** 2, self.bias_walk ** 2 * dt])
+        R = self.accel_noise ** 2
+
+        P = np.diag([R, 1.0])
+        for _ in range(iterations):
+            P_pred = F @ P @ F.T + Q
+            K = P_pred @ H.T / (H @ P_pred @ H.T + R)
+            P_next = (np.eye(2) - K @ H) @ P_pred
+            if np.max(np.abs(P_next - P)) < tolerance:
+                P = P_next
+                break
+            P = P_next
+
+        P_pred = F @ P @ F.T + Q
+        G = P @ F.T @ np.linalg.inv(P_pred)
+        return F, H, K, G
+
+    def smooth_axis(self, dt, rate, measured, F, H, K, G):
+        """Run the forward filter and the RTS backward pass for one axis."""
+        I_KH = np.eye(2) - K @ H
+
+        # Forward: x[k] = (I-KH)(F x[k-1] + B u[k]) + K z[k]
+        inputs = np.zeros((len(rate), 2))
+        inputs[:, 0] = rate * dt
+        drive = inputs @ I_KH.T + measured[:, None] * K[:, 0]
+        x0 = np.array([measured[0], 0.0])
+        filtered = linear_recurrence(I_KH @ F, drive, x0)
+
+        # Backward: xs[k] = G xs[k+1] + xf[k] - G (F xf[k] + B u[k+1])
+        predicted = filtered[:-1] @ F.T + inputs[1:]
+        drive = filtered[:-1] - predicted @ G.T
+        smoothed = linear_recurrence(G, drive[::-1], filtered[-1])[::-1]
+        return np.vstack([smoothed, filtered[-1:]]), filtered
+
+    def reconstruct(self, time_ms, accel, gyro):
+        """
+        Reconstruct the attitude track.
+        Returns a dict of (N,) arrays: smoothed and filtered pitch/roll, the
+        estimated gyro biases and the gyro-integrated yaw.
+        """
+        dt = np.diff(time_ms, prepend=time_ms[0]) / 1000.0
+        nominal_dt = np.median(dt[1:]) if len(dt) > 1 else 0.001
+        F, H, K, G = self.steady_state_gains(max(nominal_dt, 1e-4))
+
+        accel_pitch, accel_roll = accel_angles(accel)
+        pitch, pitch_filtered = self.smooth_axis(dt, gyro[:, 1], accel_pitch, F, H, K, G)
+        roll, roll_filtered = self.smooth_axis(dt, gyro[:, 0], accel_roll, F, H, K, G)
+
+        # Yaw has no absolute reference without a magnetometer
+        yaw = np.cumsum(gyro[:, 2] * dt)
+        yaw = (yaw + 180.0) % 360.0 - 180.0
+
+        return {
+            "time_ms": time_ms,
+            "pitch": pitch[:, 0],
+            "roll": roll[:, 0],
+            "yaw": yaw,
+            "pitch_filtered": pitch_filtered[:, 0],
+            "roll_filtered": roll_filtered[:, 0],
+            "gyro_bias_y": pitch[:, 1],
+            "gyro_bias_x": roll[:, 1],
+        }
+
+
+def replay_onboard_estimator(time_ms, accel, gyro):
+    """Run OrientationEstimator over the recorded samples, as the flight loop would."""
+    orientation = OrientationEstimator()
+    angles = np.empty((len(time_ms), 3))
+    last_time = time_ms[0]
+    for i in range(len(time_ms)):
+        dt = (time_ms[i] - last_time) / 1000.0
+        last_time = time_ms[i]
+        data = {'accel': {'x': accel[i, 0], 'y': accel[i, 1], 'z': accel[i, 2]},
+                'gyro': {'x': gyro[i, 0], 'y': gyro[i, 1], 'z': gyro[i, 2]}}
+        angle = orientation.complementary_filter(data, dt)
+        angles[i] = angle['pitch'], angle['roll'], angle['yaw']
+    return angles
+
+
+def write_track(track, onboard, file_path):
+    """Write the reconstructed and on-board attitude side by side as CSV."""
+    header = "Time_ms,pitch,roll,yaw,bias_x,bias_y,onboard_pitch,onboard_roll,onboard_yaw"
+    columns = np.column_stack([track["time_ms"], track["pitch"], track["roll"], track["yaw"],
+                               track["gyro_bias_x"], track["gyro_bias_y"], onboard])
+    np.savetxt(file_path, columns, delimiter=',', header=header, comments='', fmt='%.4f')
+
+
+if __name__ == "__main__":
+    # Usage: python attitude_smoother.py [flight_log.txt] [attitude_track.csv]
+    log_file = sys.argv[1] if len(sys.argv) > 1 else "flight_log.txt"
+    output_file = sys.argv[2] if len(sys.argv) > 2 else "attitude_track.csv"
+
+    time_ms, accel, gyro = parse_imu_log(log_file)
+    if len(time_ms) < 2:
+        sys.exit(f"No IMU samples in {log_file}; record them with FlightLogger.log_imu")
+
+    track = AttitudeSmoother().reconstruct(time_ms, accel, gyro)
+    onboard = replay_onboard_estimator(time_ms, accel, gyro)
+    write_track(track, onboard, output_file)
+
+    difference = np.column_stack([track["pitch"], track["roll"]]) - onboard[:, :2]
+    print(f"Samples: {len(time_ms)}")
+    print(f"Mean gyro bias: x={track['gyro_bias_x'].mean():.3f} °/s, y={track['gyro_bias_y'].mean():.3f} °/s")
+    print(f"On-board vs smoothed RMS: pitch={np.sqrt(np.mean(difference[:, 0] ** 2)):.2f}°, " +
+          f"roll={np.sqrt(np.mean(difference[:, 1] ** 2)):.2f}°")
+    print(f"Track saved to {output_file}")
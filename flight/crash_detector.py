@@ -1,6 +1,52 @@
+from array import array
+
+
 class CrashDetector:
-    ANGLE_THRESHOLD = 45
-    
+    """
+    Crash detection on every raw IMU sample, ahead of the filtered attitude:
+      - gyro spike: GYRO_VOTES of the last WINDOW samples above GYRO_SPIKE on any axis
+      - free-fall: acceleration magnitude below FREE_FALL_G for FREE_FALL_TIME
+      - impact: IMPACT_VOTES of the last WINDOW samples above IMPACT_G across
+        the body x/y axes
+      - attitude: pitch or roll beyond ANGLE_THRESHOLD, or projected beyond it
+        LOOKAHEAD seconds ahead at the current rate for ATTITUDE_TIME
+    Votes are kept in preallocated ring buffers with running counts, so every
+    sample costs the same few operations and no buffer grows.
+    """
+    ANGLE_THRESHOLD = 45     # ° of pitch or roll
+    LOOKAHEAD = 0.15         # s of the current pitch/roll rate added to the attitude
+    ATTITUDE_TIME = 0.03     # s the projected attitude must stay beyond the threshold
+    GYRO_SPIKE = 200.0       # °/s on any axis (the IMU saturates at 245)
+    GYRO_VOTES = 3
+    FREE_FALL_G = 0.3        # g of total acceleration
+    FREE_FALL_TIME = 0.06    # s
+    # Rotor thrust only pushes along the body z axis, and a full-throttle climb
+    # (1.5-1.8 g plus motor vibration) saturates z at 2 g like an impact would,
+    # so impacts are judged on the x/y axes only. A purely vertical impact is
+    # left to the free-fall rule before it and the attitude rules after it.
+    IMPACT_G = 1.5           # g of acceleration across the body x/y axes (each axis saturates at 2)
+    IMPACT_VOTES = 3
+    WINDOW = 8               # samples in the ring buffers
+
+    def __init__(self):
+        self.gyro_flags = bytearray(self.WINDOW)
+        self.impact_flags = bytearray(self.WINDOW)
+        self.accel_history = array('f', [0.0] * self.WINDOW)
+        self.gyro_history = array('f', [0.0] * self.WINDOW)
+        self.reset()
+
+    def reset(self):
+        for i in range(self.WINDOW):
+            self.gyro_flags[i] = 0
+            self.impact_flags[i] = 0
+        self.position = 0
+        self.samples = 0
+        self.gyro_votes = 0
+        self.impact_votes = 0
+        self.free_fall_time = 0.0
+        self.attitude_time = 0.0
+        self.reason = None
+
     def detect_crash(self, angle):
         """
         Detect a crash based on pitch and roll angles.
@@ -8,6 +54,65 @@ class CrashDetector:
         """
         return abs(angle['roll']) > self.ANGLE_THRESHOLD or abs(angle['pitch']) > self.ANGLE_THRESHOLD
 
+    def update(self, data, angle, dt):
+        """
+        Feed one raw IMU sample (as from IMUSensor.read_imu) with the current
+        attitude. Returns the reason of a detected crash, else None; the first
+        reason is latched until reset().
+        """
+        accel, gyro = data['accel'], data['gyro']
+        accel_sq = accel['x'] * accel['x'] + accel['y'] * accel['y'] + accel['z'] * accel['z']
+        gyro_peak = max(abs(gyro['x']), abs(gyro['y']), abs(gyro['z']))
+
+        # Slide the ring buffers: drop the oldest votes, add the new ones
+        i = self.position
+        gyro_flag = 1 if gyro_peak > self.GYRO_SPIKE else 0
+        lateral_sq = accel['x'] * accel['x'] + accel['y'] * accel['y']
+        impact_flag = 1 if lateral_sq > self.IMPACT_G * self.IMPACT_G else 0
+        self.gyro_votes += gyro_flag - self.gyro_flags[i]
+        self.impact_votes += impact_flag - self.impact_flags[i]
+        self.gyro_flags[i] = gyro_flag
+        self.impact_flags[i] = impact_flag
+        self.accel_history[i] = accel_sq
+        self.gyro_history[i] = gyro_peak
+        self.position = (i + 1) % self.WINDOW
+        self.samples += 1
+
+        if accel_sq < self.FREE_FALL_G * self.FREE_FALL_G:
+            self.free_fall_time += dt
+        else:
+            self.free_fall_time = 0.0
+
+        limit = self.ANGLE_THRESHOLD
+        pitch, roll = angle['pitch'], angle['roll']
+        projected_pitch = pitch + gyro['y'] * self.LOOKAHEAD
+        projected_roll = roll + gyro['x'] * self.LOOKAHEAD
+        if abs(projected_pitch) > limit or abs(projected_roll) > limit:
+            self.attitude_time += dt
+        else:
+            self.attitude_time = 0.0
+
+        if self.reason is not None:
+            return self.reason
+        if self.impact_votes >= self.IMPACT_VOTES:
+            self.reason = "impact"
+        elif self.free_fall_time >= self.FREE_FALL_TIME:
+            self.reason = "free-fall"
+        elif self.gyro_votes >= self.GYRO_VOTES:
+            self.reason = "gyro spike"
+        elif abs(pitch) > limit or abs(roll) > limit:
+            self.reason = "attitude limit"
+        elif self.attitude_time >= self.ATTITUDE_TIME:
+            self.reason = "attitude"
+        return self.reason
+
+    def snapshot(self):
+        """Last WINDOW samples, oldest first, as (|accel| in g, peak gyro rate in °/s) pairs for the crash log."""
+        count = min(self.samples, self.WINDOW)
+        first = (self.position - count) % self.WINDOW
+        return [(self.accel_history[(first + k) % self.WINDOW] ** 0.5, self.gyro_history[(first + k) % self.WINDOW])
+                for k in range(count)]
+
 
 if __name__ == "__main__":
     import time
@@ -65,9 +170,11 @@ if __name__ == "__main__":
             angles = orientation.complementary_filter(data, dt)
 
             # Check for crash
-            if crash_detector.detect_crash(angles):
-                print("Crash detected!")
-                logger.log(f"Crash detected at angles: pitch={angles['pitch']:.2f}, roll={angles['roll']:.2f}")
+            reason = crash_detector.update(data, angles, dt)
+            if reason:
+                print(f"Crash detected ({reason})!")
+                logger.log(f"Crash detected ({reason}) at angles: pitch={angles['pitch']:.2f}, roll={angles['roll']:.2f}")
+                logger.log(f"Last samples (|accel| g, peak gyro dps): {crash_detector.snapshot()}")
                 led.start_blinking(0.1)  # Rapid blinking to signal crash
                 time.sleep(2)  # Allow observation
                 led.stop_blinking()
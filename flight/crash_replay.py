@@ -0,0 +1,232 @@
+import sys
+import time
+import numpy as np
+
+from attitude_smoother import parse_imu_log
+from crash_detector import CrashDetector
+from orientation_estimator import OrientationEstimator
+
+
+SAMPLE_RATE = 200           # Hz of the synthetic IMU streams
+DURATION = 3.0              # s per synthetic flight
+ONSET = 1.5                 # s into a synthetic crash flight where the crash starts
+ACCEL_RANGE = 2.0           # g, per-axis full scale of the IMU
+GYRO_RANGE = 245.0          # °/s, per-axis full scale of the IMU
+
+
+def replay(time_ms, accel, gyro):
+    """
+    Run the previous angle-only check and the raw-sample detector side by side
+    over one IMU stream. Returns (legacy_ms, detector_ms, reason): the time of
+    the first firing of each, None when it never fires.
+    """
+    orientation = OrientationEstimator()
+    detector = CrashDetector()
+    legacy_ms = detector_ms = reason = None
+    last_ms = time_ms[0]
+    for t, a, g in zip(time_ms, accel.tolist(), gyro.tolist()):
+        dt = (t - last_ms) / 1000.0
+        last_ms = t
+        data = {'accel': {'x': a[0], 'y': a[1], 'z': a[2]}, 'gyro': {'x': g[0], 'y': g[1], 'z': g[2]}}
+        angles = orientation.complementary_filter(data, dt)
+        if legacy_ms is None and detector.detect_crash(angles):
+            legacy_ms = t
+        if detector_ms is None:
+            reason = detector.update(data, angles, dt)
+            if reason:
+                detector_ms = t
+        if legacy_ms is not None and detector_ms is not None:
+            break
+    return legacy_ms, detector_ms, reason
+
+
+def imu_stream(pitch, roll, rng, vibration=0.05, thrust=1.0, gyro_noise=2.0):
+    """
+    Raw samples for a pitch/roll trajectory (°): the specific force seen in
+    the body frame plus vibration, with the gyro rates that produce the
+    trajectory. vibration (g) and thrust (g) are scalars or per sample;
+    thrust acts along the body z axis and at 1.0 holds a level frame
+    against gravity, above that the frame climbs.
+    """
+    dt = 1.0 / SAMPLE_RATE
+    theta, phi = np.radians(pitch), np.radians(roll)
+    accel = np.column_stack((np.sin(theta), np.cos(theta) * np.sin(phi), np.cos(theta) * np.cos(phi)))
+    # Extra thrust is felt along the body z axis, whatever the attitude
+    accel[:, 2] += np.asarray(thrust, dtype=np.float64) - 1.0
+    accel += rng.normal(0.0, 1.0, accel.shape) * np.reshape(vibration, (-1, 1))
+    gyro = np.column_stack((np.gradient(roll, dt), np.gradient(pitch, dt), np.zeros_like(roll)))
+    gyro += rng.normal(0.0, gyro_noise, gyro.shape)
+    return accel, gyro
+
+
+def clip(accel, gyro):
+    return np.clip(accel, -ACCEL_RANGE, ACCEL_RANGE), np.clip(gyro, -GYRO_RANGE, GYRO_RANGE)
+
+
+def add_glitches(accel, gyro, rng, count=3):
+    """Single-sample full-scale readings, as from a loose connector or a prop strike on the frame."""
+    for index in rng.integers(0, len(accel), count):
+        accel[index, rng.integers(0, 3)] = ACCEL_RANGE
+    for index in rng.integers(0, len(gyro), count):
+        gyro[index, rng.integers(0, 3)] = GYRO_RANGE
+
+
+def hold_then(t, start, rate, limit=90.0):
+    """Angle that is zero until start, then grows at rate (°/s, itself ramping in over 0.1 s) up to limit."""
+    elapsed = np.clip(t - start, 0.0, None)
+    angle = rate * np.where(elapsed < 0.1, elapsed ** 2 / 0.2, elapsed - 0.05)
+    return np.clip(angle, -limit, limit)
+
+
+def simulate(kind, rng):
+    """
+    One synthetic flight of the given kind. Returns (time_ms, accel, gyro,
+    onset_ms); onset_ms is None for normal flights.
+    """
+    t = np.arange(0.0, DURATION, 1.0 / SAMPLE_RATE)
+    pitch = rng.normal(0.0, 0.5, t.size).cumsum() * 0.05
+    roll = rng.normal(0.0, 0.5, t.size).cumsum() * 0.05
+    vibration = 0.05
+    thrust = 1.0
+    gyro_noise = 2.0
+    onset = None
+
+    if kind == "climb":
+        # Lift-off at full climb throttle: thrust ramps to 1.5-1.8 g over 0.15 s,
+        # holds for up to a second with the motor vibration of high throttle
+        start = rng.uniform(0.5, 1.0)
+        peak = rng.uniform(1.5, 1.8)
+        ramp = np.clip((t - start) / 0.15, 0.0, 1.0) * np.clip((start + 1.15 - t) / 0.15, 0.0, 1.0)
+        thrust = 1.0 + (peak - 1.0) * ramp
+        pitch = pitch + 5.0 * ramp
+        vibration = 0.1 + 0.1 * ramp
+    elif kind == "vibration":
+        # Chipped prop: noisier sensors, plus the shaking added below
+        vibration = 0.2
+        gyro_noise = 15.0
+    elif kind == "aggressive":
+        # 30° banks at up to ~170 °/s
+        frequency = rng.uniform(0.7, 0.9)
+        roll = roll + 30.0 * np.sin(2 * np.pi * frequency * t)
+        pitch = pitch + 20.0 * np.sin(2 * np.pi * frequency * t + 1.0)
+        vibration = 0.15
+    elif kind == "gusty":
+        # Gusts knock it 15° over within 0.2 s and the controller brings it back
+        for start in 0.3 + 0.6 * np.arange(4) + rng.uniform(0.0, 0.2, 4):
+            pulse = np.clip(t - start, 0.0, 0.4)
+            roll = roll + rng.choice((-15.0, 15.0)) * (1 - np.cos(2 * np.pi * pulse / 0.4)) / 2
+        vibration = 0.1
+    elif kind == "touchdown":
+        # Firm landing: one short 1.6 g bump, then sitting on the ground
+        bump = (t >= ONSET) & (t < ONSET + 0.02)
+        accel, gyro = imu_stream(pitch, roll, rng, vibration)
+        accel[bump, 2] += 0.6
+    elif kind == "flip":
+        # A motor quits: the frame rolls over, the gyro saturates
+        onset = ONSET
+        roll = roll + hold_then(t, onset, rng.uniform(400.0, 600.0), limit=180.0)
+    elif kind == "tip-over":
+        # A leg catches on landing: slow roll onto the side
+        onset = ONSET
+        roll = roll + hold_then(t, onset, rng.uniform(50.0, 80.0))
+    elif kind == "free-fall":
+        # Thrust lost: falling for 0.4 s, hitting the ground, ending up on its side
+        onset = ONSET
+        roll = roll + hold_then(t, onset + 0.4, 900.0)
+    elif kind == "collision":
+        # Hitting an obstacle: a saturated jolt, then tumbling at a moderate rate
+        onset = ONSET
+        pitch = pitch + hold_then(t, onset + 0.02, rng.uniform(120.0, 180.0))
+
+    if kind != "touchdown":
+        accel, gyro = imu_stream(pitch, roll, rng, vibration, thrust, gyro_noise)
+    if kind == "free-fall":
+        falling = (t >= onset) & (t < onset + 0.4)
+        accel[falling] = rng.normal(0.0, 0.05, (falling.sum(), 3))
+        accel[(t >= onset + 0.4) & (t < onset + 0.43)] += (0.0, 0.0, 3.0)
+    elif kind == "collision":
+        accel[(t >= onset) & (t < onset + 0.015)] += (-3.0, 0.5, 0.0)
+    elif kind == "vibration":
+        # Chipped prop shaking: 0.4 g at the motor rate, aliased to 20-60 Hz, on every axis
+        frequency = rng.uniform(20.0, 60.0)
+        accel += 0.4 * np.sin(2 * np.pi * frequency * t[:, None] + rng.uniform(0, 2 * np.pi, 3))
+    add_glitches(accel, gyro, rng)
+    accel, gyro = clip(accel, gyro)
+    return t * 1000.0, accel, gyro, None if onset is None else onset * 1000.0
+
+
+NORMAL_FLIGHTS = ("hover", "climb", "aggressive", "gusty", "vibration", "touchdown")
+CRASH_FLIGHTS = ("flip", "tip-over", "free-fall", "collision")
+
+
+def evaluate(trials=50, seed=0):
+    """Detection latencies and false positives of both checks over synthetic flights, printed per kind."""
+    rng = np.random.default_rng(seed)
+    print(f"{'flight':<12}{'trials':>7}{'legacy ms':>11}{'missed':>8}{'detector ms':>13}{'missed':>8}  reasons")
+    for kind in CRASH_FLIGHTS + NORMAL_FLIGHTS:
+        legacy, detected, reasons = [], [], {}
+        legacy_missed = detector_missed = 0
+        for _ in range(trials):
+            time_ms, accel, gyro, onset_ms = simulate(kind, rng)
+            legacy_ms, detector_ms, reason = replay(time_ms, accel, gyro)
+            if reason:
+                reasons[reason] = reasons.get(reason, 0) + 1
+            if onset_ms is None:
+                # Any firing on a normal flight is a false positive
+                legacy_missed += legacy_ms is not None
+                detector_missed += detector_ms is not None
+                continue
+            if legacy_ms is None:
+                legacy_missed += 1
+            else:
+                legacy.append(legacy_ms - onset_ms)
+            if detector_ms is None:
+                detector_missed += 1
+            else:
+                detected.append(detector_ms - onset_ms)
+        legacy_text = f"{np.mean(legacy):.0f}" if legacy else "-"
+        detector_text = f"{np.mean(detected):.0f}" if detected else "-"
+        label = "missed" if kind in CRASH_FLIGHTS else "false+"
+        print(f"{kind:<12}{trials:>7}{legacy_text:>11}{legacy_missed:>7} {detector_text:>12}{detector_missed:>7} {label}  "
+              + ", ".join(f"{name} {count}" for name, count in sorted(reasons.items())))
+
+
+def benchmark(samples=20_000):
+    """Per-sample cost of the previous check and of the raw-sample detector, in CPython."""
+    rng = np.random.default_rng(1)
+    detector = CrashDetector()
+    data = {'accel': {'x': 0.01, 'y': -0.02, 'z': 1.0}, 'gyro': {'x': 1.0, 'y': -2.0, 'z': 0.5}}
+    angles = {'pitch': 1.0, 'roll': -1.0, 'yaw': 0.0}
+    values = rng.normal(0.0, 0.05, (samples, 2)).tolist()
+
+    start = time.perf_counter()
+    for pitch, roll in values:
+        angles['pitch'], angles['roll'] = pitch, roll
+        detector.detect_crash(angles)
+    legacy = (time.perf_counter() - start) / samples * 1e6
+
+    start = time.perf_counter()
+    for pitch, roll in values:
+        angles['pitch'], angles['roll'] = pitch, roll
+        detector.update(data, angles, 0.005)
+    raw = (time.perf_counter() - start) / samples * 1e6
+    print(f"Per sample: angle check {legacy:.2f} us, raw-sample detector {raw:.2f} us")
+
+
+if __name__ == "__main__":
+    # Usage: python crash_replay.py                        synthetic flights and per-sample cost
+    #        python crash_replay.py <log_file>[:onset_ms] ...   replay recorded IMU logs
+    if len(sys.argv) < 2:
+        evaluate()
+        benchmark()
+    for argument in sys.argv[1:]:
+        path, _, onset = argument.partition(':')
+        time_ms, accel, gyro = parse_imu_log(path)
+        if len(time_ms) == 0:
+            print(f"{path}: no IMU samples")
+            continue
+        legacy_ms, detector_ms, reason = replay(time_ms, accel, gyro)
+        reference = float(onset) if onset else time_ms[0]
+        legacy_text = "never" if legacy_ms is None else f"{legacy_ms - reference:.0f} ms"
+        detector_text = "never" if detector_ms is None else f"{detector_ms - reference:.0f} ms ({reason})"
+        print(f"{path}: angle check {legacy_text}, raw-sample detector {detector_text}")
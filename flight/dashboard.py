@@ -0,0 +1,333 @@
+import asyncio
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+from flask import Flask, Response, abort, jsonify
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'pipeline'))
+
+import metrics
+from gas_heatmap import GasHeatmap, colorize, encode_png
+
+app = Flask(__name__)
+
+MAX_FPS = 10                # Frames per second pushed to each browser at most
+CLIENT_QUEUE_SIZE = 32      # Frames buffered per client before it is dropped as too slow
+HEARTBEAT_INTERVAL = 15.0   # Seconds between keep-alive comments on an idle stream
+SURVEY_ORIGIN = (45.805, 15.97)            # Latitude, longitude of the survey area's south-west corner
+SURVEY_AREA = (0.0, 0.0, 2000.0, 2000.0)   # Heatmap bounds in metres east/north of the survey origin
+
+PAGE = """<!doctype html>
+<html>
+<head><title>Live Dashboard</title></head>
+<body>
+<h1>Current Gas Level: <span id="gas">{gas}</span> ppm</h1>
+<img src="/heatmap/{zoom}/0/0.png" width="512" height="512" style="image-rendering: pixelated">
+<table id="values"></table>
+<script>
+const values = {{}};
+const source = new EventSource("/stream");
+source.onmessage = (event) => {{
+    Object.assign(values, JSON.parse(event.data));
+    const gas = Object.entries(values).find(([key]) => key.startsWith("gas"));
+    if (gas) document.getElementById("gas").textContent = gas[1].value.toFixed(2);
+    document.getElementById("values").innerHTML = Object.entries(values).sort().map(([key, v]) =>
+        "<tr><td>" + key + "</td><td>" + (v.value !== undefined ? v.value.toFixed(2) + " " + (v.unit || "")
+        : JSON.stringify(v)) + "</td></tr>").join("");
+}};
+</script>
+</body>
+</html>
+"""
+
+
+class Client:
+    def __init__(self):
+        self.queue = queue.Queue(CLIENT_QUEUE_SIZE)
+        self.dropped = False
+
+
+class Broadcaster:
+    """
+    Pushes live values to any number of streaming clients.
+
+    update() only records the latest value per key, so bursts of readings
+    are coalesced. A broadcaster thread serializes the changed values once
+    per frame (at most MAX_FPS) and offers the frame to every client's
+    bounded queue without blocking; a client whose queue is full is dropped
+    and has to reconnect.
+    """
+
+    def __init__(self, max_fps=MAX_FPS):
+        self.period = 1.0 / max_fps
+        self.lock = threading.Lock()
+        self.state = {}
+        self.pending = {}
+        self.clients = set()
+        self.frames = 0
+        self.slow_clients = 0
+        self.thread = None
+
+    def update(self, key, value):
+        with self.lock:
+            self.state[key] = value
+            self.pending[key] = value
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.state)
+
+    def connect(self):
+        client = Client()
+        with self.lock:
+            # Register before taking the snapshot so no update falls between
+            # them; a new viewer starts from the full current state
+            self.clients.add(client)
+            client.queue.put_nowait(self._frame(self.state))
+        return client
+
+    def disconnect(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    @staticmethod
+    def _frame(values):
+        return f"data: {json.dumps(values)}\n\n"
+
+    def _broadcast(self):
+        while True:
+            time.sleep(self.period)
+            with self.lock:
+                if not self.pending:
+                    continue
+                changes, self.pending = self.pending, {}
+                clients = list(self.clients)
+            frame = self._frame(changes)
+            self.frames += 1
+            for client in clients:
+                try:
+                    client.queue.put_nowait(frame)
+                except queue.Full:
+                    client.dropped = True
+                    self.slow_clients += 1
+                    self.disconnect(client)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._broadcast, daemon=True)
+        self.thread.start()
+
+    def stats(self):
+        return {"clients": len(self.clients), "frames": self.frames,
+                "slow_clients_dropped": self.slow_clients, "keys": len(self.state)}
+
+
+broadcaster = Broadcaster()
+heatmap = GasHeatmap(SURVEY_AREA)
+heatmap_lock = threading.Lock()
+metrics.gauge("dashboard_clients", "Connected dashboard viewers", function=lambda: len(broadcaster.clients))
+metrics.gauge("dashboard_slow_clients_dropped", "Viewers dropped for falling behind",
+              function=lambda: broadcaster.slow_clients)
+
+
+@app.route('/')
+def index():
+    gas = next((value["value"] for key, value in broadcaster.snapshot().items() if key.startswith("gas")), 0.0)
+    return PAGE.format(gas=gas, zoom=heatmap.levels - 1)
+
+
+@app.route('/stream')
+def stream():
+    client = broadcaster.connect()
+
+    def events():
+        try:
+            while not client.dropped:
+                try:
+                    yield client.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            broadcaster.disconnect(client)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/stats')
+def stats():
+    return jsonify(broadcaster.stats())
+
+
+@app.route('/heatmap/<int:zoom>/<int:tile_x>/<int:tile_y>.png')
+def heatmap_tile(zoom, tile_x, tile_y):
+    """Gas concentration tile; zoom 0 is full resolution, each level up halves it."""
+    if not heatmap.has_tile(zoom, tile_x, tile_y):
+        abort(404)
+    with heatmap_lock:
+        estimate = heatmap.tile(zoom, tile_x, tile_y)
+    return Response(encode_png(colorize(estimate)), mimetype='image/png', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Metrics of this process only (ingestion, telemetry, viewers); the
+    # detection and alerting processes serve their own with metrics.serve()
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+# Data sources
+
+async def forward_sensors(specs):
+    """Feed readings from the sensor ingestion service (specs as sensor_type=device[:baudrate])."""
+    from sensor_ingestion import SensorIngestion
+    ingestion = SensorIngestion()
+    for spec in specs:
+        sensor_type, _, device = spec.partition('=')
+        device, _, baudrate = device.partition(':')
+        ingestion.add_port(device, sensor_type, int(baudrate or 9600))
+    subscription = ingestion.subscribe(policy="drop_oldest")
+    ingestion.start()
+    while True:
+        reading = await subscription.get()
+        broadcaster.update(reading.sensor_id, {"value": reading.value, "unit": reading.unit,
+                                               "timestamp": reading.timestamp})
+
+
+async def forward_telemetry(device):
+    """Feed attitude samples from the flight telemetry downlink."""
+    from telemetry_receiver import TelemetryReceiver
+    receiver = TelemetryReceiver(device)
+    samples = receiver.subscribe()
+    receiver_task = asyncio.create_task(receiver.run())
+    while not receiver_task.done():
+        try:
+            # Time out now and then to notice a receiver that has stopped
+            sample = await asyncio.wait_for(samples.get(), 1.0)
+        except asyncio.TimeoutError:
+            continue
+        for axis in ('pitch', 'roll', 'yaw'):
+            broadcaster.update(f"attitude_{axis}", {"value": sample[axis], "unit": "deg",
+                                                    "timestamp": sample['received_at']})
+    if receiver_task.exception() is not None:
+        print(f"Telemetry receiver on {device} failed: {receiver_task.exception()}")
+    else:
+        print(f"Telemetry link on {device} closed")
+
+
+async def forward_ring(name):
+    """Poll the latest values from a shared-memory ring written by another process."""
+    from shared_ring import SharedRing
+    ring = SharedRing.attach(name)
+    last_counts = np.zeros(ring.channels, dtype=np.int64)
+    while True:
+        timestamps, values, counts = ring.latest_all()
+        for channel in np.flatnonzero(counts != last_counts):
+            broadcaster.update(ring.names[channel], {"value": float(values[channel]),
+                                                     "timestamp": float(timestamps[channel])})
+        last_counts = counts
+        await asyncio.sleep(broadcaster.period)
+
+
+async def forward_swarm(addresses):
+    """
+    Feed the hazard readings of a drone swarm (MAVLink over UDP) to the
+    viewers, and place gas readings on the heatmap at the position the
+    drone reported around the time of the reading.
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'swarm'))
+    from telemetry_aggregator import TelemetryAggregator
+    from geo_index import PositionTrack
+    aggregator = TelemetryAggregator()
+    await aggregator.connect_all({address: None for address in addresses})
+    changes = aggregator.subscribe()
+    track = PositionTrack(SURVEY_ORIGIN)
+    try:
+        while True:
+            events = [await changes.get()]
+            while not changes.empty():
+                events.append(changes.get_nowait())
+            xs, ys, values, timestamps = [], [], [], []
+            for event in events:
+                drone_id, changed, now = event["drone_id"], event["changes"], event["time"]
+                if "lat" in changed or "lon" in changed:
+                    entry = aggregator.state[drone_id]
+                    track.add_fix(drone_id, now, entry["lat"], entry["lon"])
+                for name, value in changed.get("sensors", {}).items():
+                    broadcaster.update(f"{name}-{drone_id}", {"value": value, "timestamp": now})
+                    if name.startswith("gas"):
+                        # Readings without a recent fix come back as NaN and are left out
+                        x, y = track.position_at(drone_id, now)
+                        xs.append(x)
+                        ys.append(y)
+                        values.append(value)
+                        timestamps.append(now)
+            if values:
+                with heatmap_lock:
+                    heatmap.update(xs, ys, values, timestamps)
+    finally:
+        aggregator.close()
+
+
+async def simulate_sources(sensors=30, rate_hz=200):
+    """Generate readings much faster than MAX_FPS to exercise coalescing."""
+    baselines = {"gas": (5, 1, "ppm"), "flood": (60, 5, "cm"), "voltage": (230, 2, "V")}
+    types = list(baselines)
+    x0, y0, x1, y1 = SURVEY_AREA
+    drones = np.column_stack((np.random.uniform(x0, x1, 10), np.random.uniform(y0, y1, 10)))
+    while True:
+        now = time.time()
+        # Drones wander over a plume centred in the survey area
+        drones = np.clip(drones + np.random.normal(0, 2, drones.shape), (x0, y0), (x1 - 1, y1 - 1))
+        distance = np.hypot(drones[:, 0] - (x0 + x1) / 2, drones[:, 1] - (y0 + y1) / 2)
+        with heatmap_lock:
+            heatmap.update(drones[:, 0], drones[:, 1], 5 + 60 * np.exp(-distance / 200), now)
+        for i in range(sensors):
+            mean, spread, unit = baselines[types[i % 3]]
+            broadcaster.update(f"{types[i % 3]}-{i}", {"value": random.gauss(mean, spread), "unit": unit,
+                                                      "timestamp": now})
+        await asyncio.sleep(1 / rate_hz)
+
+
+def start_sources(sources):
+    """Run the data source coroutines on an event loop thread next to the web server."""
+    def run():
+        async def gather():
+            await asyncio.gather(*sources)
+        asyncio.run(gather())
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+if __name__ == '__main__':
+    # Usage: python dashboard.py [gas=/dev/ttyUSB0 ...] [--telemetry /dev/ttyUSB1] [--ring NAME]
+    #                           [--swarm 127.0.0.1:14550[,127.0.0.1:14560 ...]] [--simulate]
+    args = sys.argv[1:]
+    sources = []
+    if "--simulate" in args:
+        args.remove("--simulate")
+        sources.append(simulate_sources())
+    if "--telemetry" in args:
+        position = args.index("--telemetry")
+        sources.append(forward_telemetry(args[position + 1]))
+        del args[position:position + 2]
+    if "--ring" in args:
+        position = args.index("--ring")
+        sources.append(forward_ring(args[position + 1]))
+        del args[position:position + 2]
+    if "--swarm" in args:
+        position = args.index("--swarm")
+        sources.append(forward_swarm(args[position + 1].split(',')))
+        del args[position:position + 2]
+    if args:
+        sources.append(forward_sensors(args))
+
+    broadcaster.start()
+    start_sources(sources)
+    # One thread per viewer; clients only ever wait on their own queue
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,220 @@
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from flight_controller import FlightController
+
+
+# Columns of the numeric rows written by the flight loop in main.py
+COLUMNS = ("time_ms", "pitch", "roll", "yaw",
+           "pid_pitch", "pid_roll", "pid_yaw",
+           "front_left", "rear_left", "front_right", "rear_right")
+
+ANGLE_COLS = slice(1, 4)
+PID_COLS = slice(4, 7)
+THROTTLE_COLS = slice(7, 11)
+
+MAX_THROTTLE = 65535        # Same clamp as MotorControl.MAX_THROTTLE
+SETTLING_BAND = 2.0         # Degrees around the target counted as settled
+
+# Summary columns, in the order they are printed
+SUMMARY_FIELDS = ("flight", "phase", "samples", "duration_s",
+                  "rms_pitch", "rms_roll", "rms_yaw",
+                  "overshoot_pitch", "overshoot_roll",
+                  "settling_pitch_s", "settling_roll_s",
+                  "pid_sat", "motor_sat",
+                  "loop_ms", "jitter_ms", "max_loop_ms",
+                  "crashes")
+
+
+def pid_limits():
+    """Read the PID output limits from the FlightController regulators."""
+    controller = FlightController()
+    return np.array([controller.pid_pitch.output_limits,
+                     controller.pid_roll.output_limits,
+                     controller.pid_yaw.output_limits], dtype=float)
+
+
+def parse_log(file_path):
+    """
+    Split a flight log into a numeric sample array and a list of events.
+    Returns (samples, phases, phase_names, events) where samples has one row
+    per loop iteration (see COLUMNS), phases holds the index into phase_names
+    of each row and events is a list of (time_ms, text, phase) tuples.
+    """
+    rows = []
+    phase_of_row = []
+    phase_names = ["pre-flight"]
+    events = []
+
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("Time_ms"):
+                continue
+            fields = line.split(',')
+            if len(fields) > 1 and fields[1] == "IMU":
+                continue
+            if len(fields) == len(COLUMNS):
+                try:
+                    rows.append([float(value) for value in fields])
+                except ValueError:
+                    pass
+                else:
+                    phase_of_row.append(len(phase_names) - 1)
+                    continue
+
+            time_ms, _, text = line.partition(',')
+            try:
+                time_ms = int(time_ms)
+            except ValueError:
+                continue
+            if text.startswith("Starting ") and text != "Starting flight sequence":
+                phase_names.append(text[len("Starting "):])
+            events.append((time_ms, text, len(phase_names) - 1))
+
+    samples = np.array(rows, dtype=float).reshape(-1, len(COLUMNS))
+    return samples, np.array(phase_of_row, dtype=int), phase_names, events
+
+
+def rms(values):
+    """Root mean square of every column."""
+    return np.sqrt(np.mean(values ** 2, axis=0))
+
+
+def overshoot(errors):
+    """
+    Largest excursion past the target on the side opposite to the initial error.
+    Computed per column; zero when the error never crosses the target.
+    """
+    initial_sign = np.sign(errors[0])
+    initial_sign[initial_sign == 0] = 1.0
+    return np.maximum(np.max(-initial_sign * errors, axis=0), 0.0)
+
+
+def settling_time(time_s, errors, band=SETTLING_BAND):
+    """
+    Time from the start of the phase until the error enters the band and stays there.
+    NaN when the error is still outside the band at the end of the phase.
+    """
+    outside = np.abs(errors) > band
+    # Index of the last sample outside the band, per column (-1 if none)
+    reversed_first = np.argmax(outside[::-1], axis=0)
+    last_outside = np.where(outside.any(axis=0), len(errors) - 1 - reversed_first, -1)
+
+    result = np.full(errors.shape[1], np.nan)
+    settled = last_outside < len(errors) - 1
+    result[settled] = time_s[last_outside[settled] + 1] - time_s[0]
+    return result
+
+
+def segment_metrics(samples, limits, crashes):
+    """Compute the metrics for a block of samples flown against a zero attitude target."""
+    time_ms = samples[:, 0]
+    errors = samples[:, ANGLE_COLS]     # target_angles are all zero in main.py
+    pid = samples[:, PID_COLS]
+    throttles = samples[:, THROTTLE_COLS]
+
+    pid_saturated = (pid <= limits[:, 0]) | (pid >= limits[:, 1])
+    motor_saturated = (throttles <= 0) | (throttles >= MAX_THROTTLE)
+    periods = np.diff(time_ms)
+
+    rms_error = rms(errors)
+    peaks = overshoot(errors)
+    settling = settling_time(time_ms / 1000.0, errors[:, :2])
+
+    return {
+        "samples": len(samples),
+        "duration_s": (time_ms[-1] - time_ms[0]) / 1000.0,
+        "rms_pitch": rms_error[0],
+        "rms_roll": rms_error[1],
+        "rms_yaw": rms_error[2],
+        "overshoot_pitch": peaks[0],
+        "overshoot_roll": peaks[1],
+        "settling_pitch_s": settling[0],
+        "settling_roll_s": settling[1],
+        "pid_sat": pid_saturated.any(axis=1).mean(),
+        "motor_sat": motor_saturated.any(axis=1).mean(),
+        "loop_ms": periods.mean() if len(periods) else np.nan,
+        "jitter_ms": periods.std() if len(periods) else np.nan,
+        "max_loop_ms": periods.max() if len(periods) else np.nan,
+        "crashes": crashes,
+    }
+
+
+def analyze_flight(file_path):
+    """Compute per-flight and per-phase metrics for one log file."""
+    samples, phases, phase_names, events = parse_log(file_path)
+    limits = pid_limits()
+    crash_phases = np.array([phase for _, text, phase in events if text.startswith("Crash detected")], dtype=int)
+    flight = file_path
+
+    results = []
+    if len(samples) < 2:
+        return results
+
+    whole = segment_metrics(samples, limits, len(crash_phases))
+    results.append({"flight": flight, "phase": "all", **whole})
+
+    for index, name in enumerate(phase_names):
+        rows = samples[phases == index]
+        if len(rows) < 2:
+            continue
+        metrics = segment_metrics(rows, limits, int(np.sum(crash_phases == index)))
+        results.append({"flight": flight, "phase": name, **metrics})
+
+    return results
+
+
+def find_logs(directory, file_name="flight_log.txt"):
+    """Find every flight log below a directory."""
+    logs = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name == file_name or (name.startswith("flight_log") and name.endswith(".txt")):
+                logs.append(os.path.join(root, name))
+    return sorted(logs)
+
+
+def analyze_directory(directory, workers=None):
+    """Analyze every log in a directory across a process pool."""
+    logs = find_logs(directory)
+    summary = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for log_file, results in zip(logs, pool.map(analyze_flight, logs, chunksize=8)):
+            for row in results:
+                row["flight"] = os.path.relpath(log_file, directory)
+                summary.append(row)
+    return summary
+
+
+def format_summary(summary):
+    """Format the summary rows as a fixed-width text table."""
+    def cell(value):
+        if isinstance(value, (float, np.floating)):
+            return f"{value:.3f}"
+        return str(value)
+
+    table = [SUMMARY_FIELDS] + [tuple(cell(row[field]) for field in SUMMARY_FIELDS) for row in summary]
+    widths = [max(len(row[i]) for row in table) for i in range(len(SUMMARY_FIELDS))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in table)
+
+
+def write_csv(summary, file_path):
+    """Write the summary rows as CSV."""
+    with open(file_path, 'w') as file:
+        file.write(",".join(SUMMARY_FIELDS) + "\n")
+        for row in summary:
+            file.write(",".join(str(row[field]) for field in SUMMARY_FIELDS) + "\n")
+
+
+if __name__ == "__main__":
+    # Usage: python flight_log_analytics.py <log_directory> [summary.csv]
+    log_directory = sys.argv[1] if len(sys.argv) > 1 else "."
+    summary = analyze_directory(log_directory)
+    print(format_summary(summary))
+
+    if len(sys.argv) > 2:
+        write_csv(summary, sys.argv[2])
+        print(f"Summary saved to {sys.argv[2]}")
@@ -17,6 +17,11 @@ class FlightLogger:
         if self.file:
             elapsed_time = time.ticks_diff(time.ticks_ms(), self.start_time)
             self.file.write(f"{elapsed_time},{event}\n")
+
+    def log_imu(self, data):
+        """Log a raw IMU sample (as returned by IMUSensor.read_imu) for offline attitude reconstruction."""
+        self.log(f"IMU,{data['accel']['x']:.5f},{data['accel']['y']:.5f},{data['accel']['z']:.5f}," +
+                 f"{data['gyro']['x']:.4f},{data['gyro']['y']:.4f},{data['gyro']['z']:.4f}")
             
     def flush(self):
         """ Flush the log content to flash memory. """
@@ -1,15 +1,128 @@
 from machine import Pin
 from status_led import StatusLED
+import micropython
 import time
 
+# Room for a traceback if the interrupt handler ever raises
+micropython.alloc_emergency_exception_buf(100)
+
+# Kill switch input; GP25 drives the status LED, GP23 and GP24 are not broken out on the Pico
+KILL_SWITCH_PIN = 22
+# GPIO wired to the kill switch pin for the latency self-test (None: skip the test)
+LATENCY_TEST_PIN = None
+TEST_DUTY = 1  # Far below ESC arming range, but a non-zero PWM the test can see cleared
+
+
 class KillSwitch:
-    def __init__(self, pin_num=25):
+    def __init__(self, pin_num=KILL_SWITCH_PIN):
         self.switch = Pin(pin_num, Pin.IN, Pin.PULL_UP)
+        self.motor_control = None
+        self.tripped = False
+        self.trip_us = 0
+        self.motors_off_us = 0
 
     def is_activated(self):
         """Check if the kill switch is activated (pulled to GND)."""
         return self.switch.value() == 0
 
+    def arm(self, motor_control):
+        """Cut all motors from a hard interrupt as soon as the switch is pulled to GND."""
+        self.motor_control = motor_control
+        self.tripped = False
+        self.switch.irq(trigger=Pin.IRQ_FALLING, handler=self._on_trip, hard=True)
+
+    def disarm(self):
+        self.switch.irq(handler=None)
+
+    def _on_trip(self, pin):
+        # Hard interrupt context: no allocation, no printing, no logging
+        entered = time.ticks_us()
+        self.motor_control.emergency_stop()
+        if not self.tripped:
+            self.trip_us = entered
+            self.motors_off_us = time.ticks_us()
+            self.tripped = True
+
+    def latency_us(self):
+        """Microseconds from entering the interrupt handler to all PWM outputs at zero."""
+        return time.ticks_diff(self.motors_off_us, self.trip_us)
+
+
+class AbortSequence:
+    """
+    Non-blocking response to a kill switch trip or a crash. trigger()
+    latches the motors off, starts the fast LED blink and logs the reason
+    once; update() is called every loop iteration and reports when the hold
+    time is over, so the loop keeps reading and logging the IMU meanwhile
+    instead of sleeping.
+    """
+
+    def __init__(self, motor_control, led, logger, hold_ms=5000):
+        self.motor_control = motor_control
+        self.led = led
+        self.logger = logger
+        self.hold_ms = hold_ms
+        self.reason = None
+        self.started_ms = 0
+
+    @property
+    def active(self):
+        return self.reason is not None
+
+    def trigger(self, reason, now_ms):
+        self.motor_control.emergency_stop()
+        if self.reason is not None:
+            return
+        self.reason = reason
+        self.started_ms = now_ms
+        self.led.start_blinking(0.1)
+        self.logger.log(reason)
+        print(reason)
+
+    def check_kill_switch(self, kill_switch, now_ms):
+        """Record a trip the interrupt has already acted on."""
+        if kill_switch.tripped and self.reason is None:
+            self.trigger(f"Kill switch tripped: motors off {kill_switch.latency_us()} us after the interrupt", now_ms)
+
+    def update(self, now_ms):
+        """True once the abort has been held for hold_ms (LED stopped, log flushed)."""
+        if self.reason is None or time.ticks_diff(now_ms, self.started_ms) < self.hold_ms:
+            return False
+        self.led.stop_blinking()
+        self.logger.flush()
+        return True
+
+
+def measure_latency(kill_switch, motor_control, test_pin_num, trials=100):
+    """
+    Switch-to-motors-off latency with test_pin_num wired to the switch pin.
+    The test pin pulls the line low like the switch does; the time from that
+    edge to the handler having zeroed every PWM output includes the interrupt
+    entry. Returns (min, mean, max) in microseconds. Run with props off.
+    """
+    test = Pin(test_pin_num, Pin.OPEN_DRAIN, value=1)
+    latencies = []
+    try:
+        for _ in range(trials):
+            motor_control.reset_kill()
+            kill_switch.arm(motor_control)
+            for pwm in motor_control.outputs:
+                pwm.duty_u16(TEST_DUTY)
+            start = time.ticks_us()
+            test.value(0)
+            while not kill_switch.tripped and time.ticks_diff(time.ticks_us(), start) < 10_000:
+                pass
+            if not kill_switch.tripped or any(pwm.duty_u16() for pwm in motor_control.outputs):
+                raise RuntimeError("Motors not cut within 10 ms: check the test wiring")
+            latencies.append(time.ticks_diff(kill_switch.motors_off_us, start))
+            test.value(1)
+            time.sleep_ms(5)  # Let the line settle before the next edge
+    finally:
+        kill_switch.disarm()
+        motor_control.stop_all_motors()
+        test.value(1)
+    return min(latencies), sum(latencies) / len(latencies), max(latencies)
+
 
 if __name__ == "__main__":
     # Initialize Kill Switch and Status LED
@@ -27,10 +140,25 @@ if __name__ == "__main__":
                 led.turn_on()  # Solid LED indicates activation
                 break
             time.sleep(0.1)
+
+        from motor_control import MotorControl
+        motor_control = MotorControl()
+        if LATENCY_TEST_PIN is not None:
+            fastest, mean, slowest = measure_latency(kill_switch, motor_control, LATENCY_TEST_PIN)
+            print(f"Switch to motors off: min {fastest} us, mean {mean:.1f} us, max {slowest} us")
+
+        # Live test: activating the switch cuts the motors from the interrupt
+        kill_switch.arm(motor_control)
+        print("Activate the kill switch.")
+        while not kill_switch.tripped:
+            time.sleep(0.01)
+        print(f"Kill switch tripped: motors off {kill_switch.latency_us()} us after the interrupt")
+        led.start_blinking(0.1)
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         print("Exiting test.")
     finally:
+        kill_switch.disarm()
         led.stop_blinking()
         led.turn_off()
@@ -0,0 +1,186 @@
+import gc
+import time
+
+# Shedding levels, each one also sheds everything of the levels before it
+FULL = 0
+DECIMATE_LOGGING = 1
+SKIP_TELEMETRY = 2
+POSTPONE_HOUSEKEEPING = 3  # Log flushes and garbage collection
+LEVEL_NAMES = ("full", "decimate logging", "skip telemetry", "postpone flush and gc")
+COST_DECAY_SHIFT = 4  # A postponed task's cost estimate drops by 1/16 per iteration
+
+
+class LoadGovernor:
+    """
+    Fixed-rate pacing of the flight loop with load shedding. start() waits for
+    the next period and finish() measures the slack left before it: every
+    overrun sheds one more level of non-critical work, and restore_after
+    iterations in a row with at least headroom of the period to spare give one
+    level back. Sensor reading, crash detection and motor control are never
+    shed, so attitude control keeps its rate while flash or the link are slow.
+    Every level change is written to the log with the slack that caused it.
+
+    Flushes and collections run when due and their last measured cost fits in
+    the slack left. While one is postponed its estimate decays, so a single
+    slow run cannot keep it out for good, and once it is max_postpone_ms
+    overdue it runs regardless of slack and level.
+    """
+
+    def __init__(self, logger, period_ms=5, log_every=5, headroom=0.4, restore_after=100,
+                 flush_interval_ms=1000, gc_interval_ms=1000, max_postpone_ms=2000):
+        self.logger = logger
+        self.period_us = period_ms * 1000
+        self.log_every = log_every
+        self.headroom_us = int(headroom * self.period_us)
+        self.restore_after = restore_after
+        self.flush_interval_ms = flush_interval_ms
+        self.gc_interval_ms = gc_interval_ms
+        self.max_postpone_ms = max_postpone_ms
+
+        self.level = FULL
+        self.calm = 0
+        self.log_count = 0
+        self.started_us = time.ticks_us()
+        self.next_start_us = self.started_us
+        self.last_flush_ms = self.last_gc_ms = time.ticks_ms()
+        # Cost of the last flush and collection, so they only run where they fit
+        self.flush_us = self.gc_us = 0
+
+        # Statistics for the end-of-flight summary
+        self.iterations = 0
+        self.overruns = 0
+        self.min_slack_us = self.period_us
+        self.level_changes = 0
+        self.logs_dropped = 0
+        self.forced = 0
+
+    def start(self):
+        """Wait for the start of the next period; call at the top of every loop iteration."""
+        wait = time.ticks_diff(self.next_start_us, time.ticks_us())
+        if wait > 0:
+            time.sleep_us(wait)
+        self.started_us = time.ticks_us()
+        self.next_start_us = time.ticks_add(self.started_us, self.period_us)
+
+    def slack_us(self):
+        """Microseconds left in the current period (negative once it has overrun)."""
+        return time.ticks_diff(self.next_start_us, time.ticks_us())
+
+    def finish(self):
+        """Measure the slack of this iteration and shed or restore one level."""
+        slack = self.slack_us()
+        self.iterations += 1
+        if slack < self.min_slack_us:
+            self.min_slack_us = slack
+
+        if slack < 0:
+            self.overruns += 1
+            self.calm = 0
+            if self.level < POSTPONE_HOUSEKEEPING:
+                self._set_level(self.level + 1, slack)
+        elif slack >= self.headroom_us:
+            self.calm += 1
+            if self.calm >= self.restore_after and self.level > FULL:
+                self.calm = 0
+                self._set_level(self.level - 1, slack)
+        else:
+            self.calm = 0
+
+    def _set_level(self, level, slack):
+        self.level = level
+        self.level_changes += 1
+        # One short line per decision; it is written to flash with the next flush
+        self.logger.log(f"Load governor: level {level} ({LEVEL_NAMES[level]}), slack {slack} us")
+
+    @property
+    def telemetry_shed(self):
+        return self.level >= SKIP_TELEMETRY
+
+    def log_allowed(self):
+        """True if this iteration's log row should be written (every log_every-th while decimating)."""
+        if self.level < DECIMATE_LOGGING:
+            return True
+        self.log_count += 1
+        if self.log_count >= self.log_every:
+            self.log_count = 0
+            return True
+        self.logs_dropped += 1
+        return False
+
+    def _fits(self, cost_us):
+        return self.level < POSTPONE_HOUSEKEEPING and self.slack_us() > cost_us
+
+    def _run_due(self, now, last_ms, interval_ms, cost_us):
+        """None if the task is not due, else whether to run it now."""
+        overdue = time.ticks_diff(now, last_ms) - interval_ms
+        if overdue < 0:
+            return None
+        if overdue >= self.max_postpone_ms:
+            self.forced += 1
+            return True
+        return self._fits(cost_us)
+
+    def flush(self):
+        """Flush the log when it is due and the last flush's cost fits in the slack left."""
+        now = time.ticks_ms()
+        run = self._run_due(now, self.last_flush_ms, self.flush_interval_ms, self.flush_us)
+        if not run:
+            if run is not None:
+                self.flush_us -= self.flush_us >> COST_DECAY_SHIFT
+            return False
+        start = time.ticks_us()
+        self.logger.flush()
+        self.flush_us = time.ticks_diff(time.ticks_us(), start)
+        self.last_flush_ms = now
+        return True
+
+    def collect_garbage(self):
+        """
+        Collect garbage when due and it fits in the slack left, so automatic
+        collections (which cannot be postponed) rarely hit mid-iteration.
+        """
+        now = time.ticks_ms()
+        run = self._run_due(now, self.last_gc_ms, self.gc_interval_ms, self.gc_us)
+        if not run:
+            if run is not None:
+                self.gc_us -= self.gc_us >> COST_DECAY_SHIFT
+            return False
+        start = time.ticks_us()
+        gc.collect()
+        self.gc_us = time.ticks_diff(time.ticks_us(), start)
+        self.last_gc_ms = now
+        return True
+
+    def summary(self):
+        return (f"Load governor: {self.iterations} iterations, {self.overruns} overruns, "
+                f"min slack {self.min_slack_us} us, {self.level_changes} level changes, "
+                f"{self.logs_dropped} log rows dropped, {self.forced} forced flushes/collections, "
+                f"level {self.level} at the end")
+
+
+if __name__ == "__main__":
+    from flight_logger import FlightLogger
+
+    # Simulated flight loop: 1 ms of control work, plus 8 ms stalls (slow flash
+    # writes) on one iteration in ten during the middle second
+    logger = FlightLogger("governor_test.txt")
+    logger.start()
+    governor = LoadGovernor(logger)
+    print("Running 3 s of simulated flight loop...")
+    start_ms = time.ticks_ms()
+    while time.ticks_diff(time.ticks_ms(), start_ms) < 3000:
+        governor.start()
+        elapsed = time.ticks_diff(time.ticks_ms(), start_ms)
+        time.sleep_us(1000)
+        if governor.log_allowed():
+            logger.log("row")
+            if 1000 <= elapsed < 2000 and governor.iterations % 10 == 0:
+                time.sleep_us(8000)
+        governor.flush()
+        governor.collect_garbage()
+        previous = governor.level
+        governor.finish()
+        if governor.level != previous:
+            print(f"{elapsed} ms: level {governor.level} ({LEVEL_NAMES[governor.level]})")
+    print(governor.summary())
+    logger.stop()
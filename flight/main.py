@@ -5,15 +5,20 @@ if __name__ == "__main__":
     from imu_sensor import IMUSensor
     from orientation_estimator import OrientationEstimator
     from status_led import StatusLED
-    from kill_switch import KillSwitch
+    from kill_switch import KillSwitch, AbortSequence
     from flight_logger import FlightLogger
     from flight_controller import FlightController
+    from telemetry_link import TelemetryLink
+    from load_governor import LoadGovernor
 
     # Flight parameters
     LIFT_OFF_DURATION = 5  # seconds
     HOVER_DURATION = 5  # seconds
     LANDING_DURATION = 5  # seconds
     MAX_BASE_THROTTLE = 50_000  # Max throttle for lift-off and hover
+    TELEMETRY_RATE = 20  # Telemetry frames per second
+    LOOP_PERIOD = 5  # ms per control loop iteration (200 Hz)
+    ABORT_HOLD = 5000  # ms of fast blinking and IMU logging after a crash or kill switch trip
 
     # Initialize modules
     kill_switch = KillSwitch()
@@ -24,8 +29,79 @@ if __name__ == "__main__":
     crash_detector = CrashDetector()
     imu = IMUSensor()
     orientation = OrientationEstimator()
+    telemetry = TelemetryLink(rate_hz=TELEMETRY_RATE)
+    abort = AbortSequence(motor_control, led, logger, hold_ms=ABORT_HOLD)
+    governor = LoadGovernor(logger, period_ms=LOOP_PERIOD)
+
+    target_angles = {'pitch': 0, 'roll': 0, 'yaw': 0}
+
+    def fly_phase(name, duration, base_throttle_at, last_time):
+        """
+        Control loop of one flight phase; base_throttle_at(progress) gives the
+        base throttle for progress 0..1 through the phase. After a crash or a
+        kill switch trip the loop keeps logging every IMU sample with the
+        motors off until the abort sequence ends, then raises. Returns the time of the
+        last iteration. The governor paces the loop and sheds logging,
+        telemetry, flushes and garbage collection when it runs late.
+        """
+        start_time = time.ticks_ms()
+
+        while abort.active or time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 < duration:
+            governor.start()
+            current_time = time.ticks_ms()
+            dt = time.ticks_diff(current_time, last_time) / 1000.0  # Convert to seconds
+            last_time = current_time
+
+            # Read IMU data and update orientation
+            imu_data = imu.read_imu()
+            measured_angles = orientation.complementary_filter(imu_data, dt)
 
+            # The kill switch interrupt has already cut the motors; this only records it
+            abort.check_kill_switch(kill_switch, current_time)
+            crash = crash_detector.update(imu_data, measured_angles, dt)
+            if crash and not abort.active:
+                abort.trigger(f"Crash detected during {name} ({crash}) at angles: pitch={measured_angles['pitch']:.2f}, "
+                              f"roll={measured_angles['roll']:.2f}", current_time)
+                logger.log(f"Last samples (|accel| g, peak gyro dps): {crash_detector.snapshot()}")
+            if abort.active:
+                logger.log_imu(imu_data)
+                if abort.update(current_time):
+                    raise RuntimeError(abort.reason)
+                governor.finish()
+                continue
+
+            # Compute motor throttles for this point of the phase
+            progress = time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 / duration
+            motor_throttles = flight_controller.compute_motor_throttles(measured_angles, target_angles, dt,
+                                                                        base_throttle_at(progress))
 
+            # Apply motor throttles
+            for motor_name, throttle in motor_throttles.items():
+                motor_control.set_motor_throttle(motor_name, throttle)
+
+            # Everything below can be shed by the governor when the loop runs late
+            # Send telemetry (rate-limited, never blocks)
+            telemetry.send(current_time, measured_angles, flight_controller.pid_outputs, motor_throttles, dt,
+                           shed=governor.telemetry_shed)
+
+            # Log the raw IMU sample (for attitude_smoother.py and crash_replay.py) and the control data
+            if governor.log_allowed():
+                logger.log_imu(imu_data)
+                logger.log(f"{measured_angles['pitch']:.2f}," +
+                           f"{measured_angles['roll']:.2f}," +
+                           f"{measured_angles['yaw']:.2f}," +
+                           f"{flight_controller.pid_outputs['pitch']:.2f}," +
+                           f"{flight_controller.pid_outputs['roll']:.2f}," +
+                           f"{flight_controller.pid_outputs['yaw']:.2f}," +
+                           f"{motor_throttles['front_left']}," +
+                           f"{motor_throttles['rear_left']}," +
+                           f"{motor_throttles['front_right']}," +
+                           f"{motor_throttles['rear_right']}")
+            # Flush the log about every second and collect garbage, where they fit
+            governor.flush()
+            governor.collect_garbage()
+            governor.finish()
+        return last_time
 
     print("Waiting for kill switch to be deactivated...")
     led.start_blinking(0.5)
@@ -40,6 +116,10 @@ if __name__ == "__main__":
         led.stop_blinking()
         led.turn_on()
 
+        # From here on, activating the switch cuts the motors from its interrupt
+        kill_switch.arm(motor_control)
+        logger.log("Kill switch armed")
+
         # Power on and calibrate the IMU
         imu.power_on()
         logger.log("IMU powered on")
@@ -50,159 +130,23 @@ if __name__ == "__main__":
         # Start flight sequence
         logger.log("Starting flight sequence")
         print("\nFlight sequence initiated.\n")
-        target_angles = {'pitch': 0, 'roll': 0, 'yaw': 0}
         last_time = time.ticks_ms()
 
-        # Lift-Off
+        # Lift-Off: base throttle rises over the phase
         logger.log("Starting lift-off")
         print("\nLifting off...")
-        start_time = time.ticks_ms()        
-        last_flush_time = time.ticks_ms()
-        
-        while time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 < LIFT_OFF_DURATION:
-            current_time = time.ticks_ms()
-            dt = time.ticks_diff(current_time, last_time) / 1000.0  # Convert to seconds
-            last_time = current_time
-
-            # Read IMU data and update orientation
-            imu_data = imu.read_imu()
-            measured_angles = orientation.complementary_filter(imu_data, dt)
-
-            # Check for crash
-            if crash_detector.detect_crash(measured_angles):
-                print("Crash detected! Stopping all motors.")
-                logger.log(f"Crash detected at angles: pitch={measured_angles['pitch']:.2f}, roll={measured_angles['roll']:.2f}")
-                motor_control.stop_all_motors()
-                led.start_blinking(0.1)
-                time.sleep(5)
-                led.stop_blinking()
-                raise RuntimeError("Crash detected during lift-off.")
-
-            # Compute motor throttles with increasing base throttle
-            base_throttle = int((time.ticks_diff(time.ticks_ms(), start_time) / 1000.0) / LIFT_OFF_DURATION * MAX_BASE_THROTTLE)
-            motor_throttles = flight_controller.compute_motor_throttles(measured_angles, target_angles, dt, base_throttle)
-
-            # Apply motor throttles
-            for motor_name, throttle in motor_throttles.items():
-                motor_control.set_motor_throttle(motor_name, throttle)
-
-            # Log data
-            logger.log(f"{measured_angles['pitch']:.2f}," +
-                       f"{measured_angles['roll']:.2f}," +
-                       f"{measured_angles['yaw']:.2f}," +
-                       f"{flight_controller.pid_outputs['pitch']:.2f}," +
-                       f"{flight_controller.pid_outputs['roll']:.2f}," +
-                       f"{flight_controller.pid_outputs['yaw']:.2f}," +
-                       f"{motor_throttles['front_left']}," +
-                       f"{motor_throttles['rear_left']}," +
-                       f"{motor_throttles['front_right']}," +
-                       f"{motor_throttles['rear_right']}")
-            # Flush the log every 1 second
-            if time.ticks_diff(time.ticks_ms(), last_flush_time) >= 1000:
-                # Log and display angles
-                last_flush_time = time.ticks_ms()
-                logger.flush()
+        last_time = fly_phase("lift-off", LIFT_OFF_DURATION,
+                              lambda progress: int(progress * MAX_BASE_THROTTLE), last_time)
 
         # Hover
         logger.log("Starting hover")
         print("\nHovering...")
-        start_time = time.ticks_ms()
-        last_flush_time = time.ticks_ms()
-        
-        while time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 < HOVER_DURATION:
-            current_time = time.ticks_ms()
-            dt = time.ticks_diff(current_time, last_time) / 1000.0
-            last_time = current_time
-
-            # Read IMU data and update orientation
-            imu_data = imu.read_imu()
-            measured_angles = orientation.complementary_filter(imu_data, dt)
+        last_time = fly_phase("hover", HOVER_DURATION, lambda progress: MAX_BASE_THROTTLE, last_time)
 
-            # Check for crash
-            if crash_detector.detect_crash(measured_angles):
-                print("Crash detected! Stopping all motors.")
-                logger.log(f"Crash detected at angles: pitch={measured_angles['pitch']:.2f}, roll={measured_angles['roll']:.2f}")
-                motor_control.stop_all_motors()
-                led.start_blinking(0.1)
-                time.sleep(5)
-                led.stop_blinking()
-                raise RuntimeError("Crash detected during hover.")
-
-            # Compute motor throttles
-            motor_throttles = flight_controller.compute_motor_throttles(measured_angles, target_angles, dt, MAX_BASE_THROTTLE)
-
-            # Apply motor throttles
-            for motor_name, throttle in motor_throttles.items():
-                motor_control.set_motor_throttle(motor_name, throttle)
-
-            # Log data
-            logger.log(f"{measured_angles['pitch']:.2f}," +
-                       f"{measured_angles['roll']:.2f}," +
-                       f"{measured_angles['yaw']:.2f}," +
-                       f"{flight_controller.pid_outputs['pitch']:.2f}," +
-                       f"{flight_controller.pid_outputs['roll']:.2f}," +
-                       f"{flight_controller.pid_outputs['yaw']:.2f}," +
-                       f"{motor_throttles['front_left']}," +
-                       f"{motor_throttles['rear_left']}," +
-                       f"{motor_throttles['front_right']}," +
-                       f"{motor_throttles['rear_right']}")
-            
-            # Flush the log every 1 second
-            if time.ticks_diff(time.ticks_ms(), last_flush_time) >= 1000:
-                # Log and display angles
-                last_flush_time = time.ticks_ms()
-                logger.flush()
-
-        # Landing
+        # Landing: base throttle falls over the phase
         logger.log("Starting landing")
         print("\nLanding...")
-        start_time = time.ticks_ms()
-        while time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 < LANDING_DURATION:
-            current_time = time.ticks_ms()
-            dt = time.ticks_diff(current_time, last_time) / 1000.0
-            last_time = current_time
-
-            # Reduce base throttle over time
-            base_throttle = int(MAX_BASE_THROTTLE * (1 - time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 / LANDING_DURATION))
-
-            # Read IMU data and update orientation
-            imu_data = imu.read_imu()
-            measured_angles = orientation.complementary_filter(imu_data, dt)
-
-            # Check for crash
-            if crash_detector.detect_crash(measured_angles):
-                print("Crash detected! Stopping all motors.")
-                logger.log(f"Crash detected at angles: pitch={measured_angles['pitch']:.2f}, roll={measured_angles['roll']:.2f}")
-                motor_control.stop_all_motors()
-                led.start_blinking(0.1)
-                time.sleep(5)
-                led.stop_blinking()
-                raise RuntimeError("Crash detected during lift-off.")
-
-             # Reduce base throttle over time
-            base_throttle = int(MAX_BASE_THROTTLE * (1 - time.ticks_diff(time.ticks_ms(), start_time) / 1000.0 / LANDING_DURATION))
-            motor_throttles = flight_controller.compute_motor_throttles(measured_angles, target_angles, dt, base_throttle)
-
-            # Apply motor throttles
-            for motor_name, throttle in motor_throttles.items():
-                motor_control.set_motor_throttle(motor_name, throttle)
-
-            # Log data
-            logger.log(f"{measured_angles['pitch']:.2f}," +
-                       f"{measured_angles['roll']:.2f}," +
-                       f"{measured_angles['yaw']:.2f}," +
-                       f"{flight_controller.pid_outputs['pitch']:.2f}," +
-                       f"{flight_controller.pid_outputs['roll']:.2f}," +
-                       f"{flight_controller.pid_outputs['yaw']:.2f}," +
-                       f"{motor_throttles['front_left']}," +
-                       f"{motor_throttles['rear_left']}," +
-                       f"{motor_throttles['front_right']}," +
-                       f"{motor_throttles['rear_right']}")
-            # Flush the log every 1 second
-            if time.ticks_diff(time.ticks_ms(), last_flush_time) >= 1000:
-                # Log and display angles
-                last_flush_time = time.ticks_ms()
-                logger.flush()
+        fly_phase("landing", LANDING_DURATION, lambda progress: int(MAX_BASE_THROTTLE * (1 - progress)), last_time)
 
         # Apply zero throttles when landing ends
         motor_control.stop_all_motors()
@@ -215,7 +159,9 @@ if __name__ == "__main__":
         print("\nExiting program.")
 
     finally:
+        kill_switch.disarm()
         motor_control.stop_all_motors()
+        logger.log(governor.summary())
         led.turn_off()
         logger.stop()
         print(f"Log saved to {logger.file_name}")
@@ -12,6 +12,8 @@ class MotorControl:
             "rear_left": X     # Motor 4
         }
         self.motors = {}
+        self.outputs = ()
+        self.killed = False
         self.initialize_motors()
 
     def initialize_motors(self):
@@ -21,17 +23,38 @@ class MotorControl:
             pwm.freq(200)  # ESCs typically require 50-500 Hz PWM frequency
             pwm.duty_u16(0)  # Start with motors off
             self.motors[name] = pwm
+        # Fixed tuple for emergency_stop(): iterating it allocates nothing inside a hard interrupt
+        self.outputs = tuple(self.motors.values())
 
     def set_motor_throttle(self, motor_name, throttle):
-        """Set the throttle for a specific motor."""
+        """Set the throttle for a specific motor; ignored once the motors have been killed."""
+        if self.killed:
+            return
         throttle = max(0, min(self.MAX_THROTTLE, int(throttle)))  # Clamp throttle
-        self.motors[motor_name].duty_u16(throttle)
+        pwm = self.motors[motor_name]
+        pwm.duty_u16(throttle)
+        # The kill interrupt may have fired between the check above and the write
+        if self.killed:
+            pwm.duty_u16(0)
 
     def stop_all_motors(self):
         """Turn off all motors."""
         for motor in self.motors.values():
             motor.duty_u16(0)
 
+    def emergency_stop(self):
+        """
+        Latch all motors off. Safe to call from a hard interrupt (no memory
+        allocation); set_motor_throttle() is ignored until reset_kill().
+        """
+        self.killed = True
+        for pwm in self.outputs:
+            pwm.duty_u16(0)
+
+    def reset_kill(self):
+        """Allow throttle commands again after an emergency stop (on the ground only)."""
+        self.killed = False
+
 
 if __name__ == "__main__":
     from status_led import StatusLED
@@ -0,0 +1,63 @@
+import time
+from telemetry_protocol import pack_attitude, FRAME_OVERHEAD, ATTITUDE_SIZE
+
+
+class TelemetryLink:
+    """
+    Rate-limited binary telemetry downlink for the flight loop.
+    Call send() every loop iteration: it tracks loop statistics and emits a
+    frame once per period. Frames are packed into a preallocated buffer and
+    skipped (not queued) while the previous one is still being transmitted,
+    or while the loop is shedding load, so the link never stalls the control
+    loop.
+    """
+
+    def __init__(self, uart_id=0, baudrate=115200, rate_hz=20, stream=None):
+        if stream is None:
+            from machine import UART
+            stream = UART(uart_id, baudrate=baudrate, txbuf=4 * (FRAME_OVERHEAD + ATTITUDE_SIZE))
+        self.stream = stream
+        self.period_ms = int(1000 / rate_hz)
+        self.buffer = bytearray(FRAME_OVERHEAD + ATTITUDE_SIZE)
+        self.view = memoryview(self.buffer)
+        self.sequence = 0
+        self.last_send = time.ticks_ms()
+
+        # Loop statistics since the previous frame
+        self.loops = 0
+        self.max_loop_us = 0
+
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    def is_busy(self):
+        """True while the previous frame is still being transmitted."""
+        txdone = getattr(self.stream, 'txdone', None)
+        return txdone is not None and not txdone()
+
+    def send(self, time_ms, angles, pid_outputs, motor_throttles, dt, shed=False):
+        """Record one loop iteration and send a frame if the period has elapsed and shed is False."""
+        self.loops += 1
+        loop_us = int(dt * 1_000_000)
+        if loop_us > self.max_loop_us:
+            self.max_loop_us = loop_us
+
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.last_send) < self.period_ms:
+            return False
+        self.last_send = now
+
+        if shed or self.is_busy():
+            # Keep the sequence so the receiver only counts radio loss as gaps;
+            # the next frame's loops and max_loop_us still cover this period
+            self.frames_skipped += 1
+            return False
+
+        length = pack_attitude(self.buffer, self.sequence, time_ms, angles, pid_outputs,
+                               motor_throttles, self.max_loop_us, self.loops)
+        self.stream.write(self.view[:length])
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        self.frames_sent += 1
+        self.loops = 0
+        self.max_loop_us = 0
+        return True
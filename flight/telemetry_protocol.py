@@ -0,0 +1,140 @@
+import struct
+
+# Frame layout (little endian):
+#   sync (2) | type (1) | length (1) | sequence (2) | payload (length) | crc16 (2)
+# The CRC covers type, length, sequence and payload.
+SYNC = b'\xa5\x5a'
+HEADER_FORMAT = "<BBH"
+HEADER_SIZE = 4
+CRC_SIZE = 2
+FRAME_OVERHEAD = len(SYNC) + HEADER_SIZE + CRC_SIZE
+
+MSG_ATTITUDE = 0x01
+
+# time_ms, pitch/roll/yaw (centidegrees), pid pitch/roll/yaw,
+# throttles front_left/rear_left/front_right/rear_right,
+# longest loop period since the previous frame (µs), loop iterations since the previous frame
+ATTITUDE_FORMAT = "<IhhhhhhHHHHHH"
+ATTITUDE_SIZE = struct.calcsize(ATTITUDE_FORMAT)
+ATTITUDE_FIELDS = ("time_ms", "pitch", "roll", "yaw",
+                   "pid_pitch", "pid_roll", "pid_yaw",
+                   "front_left", "rear_left", "front_right", "rear_right",
+                   "max_loop_us", "loops")
+
+
+def _make_crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, start=0, end=None, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE over data[start:end]."""
+    if end is None:
+        end = len(data)
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[((crc >> 8) ^ data[i]) & 0xFF]
+    return crc
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, int(value)))
+
+
+def pack_frame_into(buffer, msg_type, sequence, payload_format, *values):
+    """Pack a frame into a preallocated bytearray and return its length."""
+    length = struct.calcsize(payload_format)
+    buffer[0:2] = SYNC
+    struct.pack_into(HEADER_FORMAT, buffer, 2, msg_type, length, sequence & 0xFFFF)
+    struct.pack_into(payload_format, buffer, 2 + HEADER_SIZE, *values)
+    end = 2 + HEADER_SIZE + length
+    struct.pack_into("<H", buffer, end, crc16(buffer, 2, end))
+    return end + CRC_SIZE
+
+
+def pack_attitude(buffer, sequence, time_ms, angles, pid_outputs, motor_throttles, max_loop_us, loops):
+    """Pack one attitude/PID/throttle sample into buffer; returns the frame length."""
+    return pack_frame_into(buffer, MSG_ATTITUDE, sequence, ATTITUDE_FORMAT,
+                           time_ms & 0xFFFFFFFF,
+                           _clamp(angles['pitch'] * 100, -32768, 32767),
+                           _clamp(angles['roll'] * 100, -32768, 32767),
+                           _clamp(angles['yaw'] * 100, -32768, 32767),
+                           _clamp(pid_outputs['pitch'], -32768, 32767),
+                           _clamp(pid_outputs['roll'], -32768, 32767),
+                           _clamp(pid_outputs['yaw'], -32768, 32767),
+                           _clamp(motor_throttles['front_left'], 0, 65535),
+                           _clamp(motor_throttles['rear_left'], 0, 65535),
+                           _clamp(motor_throttles['front_right'], 0, 65535),
+                           _clamp(motor_throttles['rear_right'], 0, 65535),
+                           _clamp(max_loop_us, 0, 65535),
+                           _clamp(loops, 0, 65535))
+
+
+def decode_attitude(payload):
+    """Decode an attitude payload into a dict with angles in degrees."""
+    sample = dict(zip(ATTITUDE_FIELDS, struct.unpack(ATTITUDE_FORMAT, payload)))
+    for axis in ("pitch", "roll", "yaw"):
+        sample[axis] /= 100.0
+    return sample
+
+
+DECODERS = {MSG_ATTITUDE: decode_attitude}
+
+
+class FrameDecoder:
+    """
+    Incremental frame decoder for a byte stream.
+    Feed it whatever arrives on the link; it returns complete frames and
+    resynchronizes on the next sync word after garbage or a CRC error.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+        self.discarded_bytes = 0
+
+    def feed(self, data):
+        """Append data and return a list of (msg_type, sequence, payload) tuples."""
+        self.buffer.extend(data)
+        frames = []
+        buffer = self.buffer
+        position = 0
+
+        while True:
+            start = buffer.find(SYNC, position)
+            if start < 0:
+                # Keep a trailing sync byte that may be the first half of a sync word
+                keep = 1 if position < len(buffer) and buffer[-1:] == SYNC[:1] else 0
+                self.discarded_bytes += len(buffer) - position - keep
+                position = len(buffer) - keep
+                break
+            self.discarded_bytes += start - position
+
+            if len(buffer) - start < 2 + HEADER_SIZE:
+                position = start
+                break
+            msg_type, length, sequence = struct.unpack_from(HEADER_FORMAT, buffer, start + 2)
+            end = start + 2 + HEADER_SIZE + length
+            if len(buffer) < end + CRC_SIZE:
+                position = start
+                break
+
+            (crc,) = struct.unpack_from("<H", buffer, end)
+            if crc != crc16(buffer, start + 2, end):
+                self.crc_errors += 1
+                self.discarded_bytes += 1
+                position = start + 1
+                continue
+
+            frames.append((msg_type, sequence, bytes(buffer[start + 2 + HEADER_SIZE:end])))
+            position = end + CRC_SIZE
+
+        del buffer[:position]
+        return frames
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import sys
+import termios
+import time
+import tty
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'pipeline'))
+import metrics
+from telemetry_protocol import FrameDecoder, DECODERS
+
+FRAMES_RECEIVED = metrics.counter("telemetry_frames_total", "Telemetry frames decoded")
+FRAMES_LOST = metrics.counter("telemetry_frames_lost_total", "Telemetry frames missing from the sequence")
+LOOP_SECONDS = metrics.histogram("flight_loop_max_seconds", "Longest on-board control loop per telemetry frame",
+                                 buckets=(0.002, 0.004, 0.006, 0.008, 0.01, 0.015, 0.02, 0.05, 0.1, 0.5))
+
+BAUD_RATES = {
+    9600: termios.B9600,
+    57600: termios.B57600,
+    115200: termios.B115200,
+    230400: termios.B230400,
+}
+
+
+class TelemetryReceiver:
+    """
+    Ground-side asyncio receiver for the binary telemetry downlink.
+    Reads a serial device (or a pseudo-terminal), decodes frames, counts
+    sequence gaps and fans decoded samples out to subscriber queues.
+    """
+
+    def __init__(self, device, baudrate=115200, read_size=4096):
+        self.device = device
+        self.baudrate = baudrate
+        self.read_size = read_size
+        self.fd = None
+        self.decoder = FrameDecoder()
+        self.subscribers = []
+        self.expected_sequence = None
+
+        self.frames_received = 0
+        self.frames_lost = 0
+        self.unknown_frames = 0
+        self.subscriber_drops = 0
+
+    def open(self):
+        """Open the device in raw, non-blocking mode."""
+        self.fd = os.open(self.device, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        if os.isatty(self.fd):
+            tty.setraw(self.fd)
+            attributes = termios.tcgetattr(self.fd)
+            speed = BAUD_RATES.get(self.baudrate, termios.B115200)
+            attributes[4] = attributes[5] = speed
+            termios.tcsetattr(self.fd, termios.TCSANOW, attributes)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def subscribe(self, maxsize=1000):
+        """Return a queue that receives every decoded sample as a dict."""
+        queue = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def stats(self):
+        """Link statistics since the receiver was created."""
+        return {
+            "frames_received": self.frames_received,
+            "frames_lost": self.frames_lost,
+            "crc_errors": self.decoder.crc_errors,
+            "discarded_bytes": self.decoder.discarded_bytes,
+            "unknown_frames": self.unknown_frames,
+            "subscriber_drops": self.subscriber_drops,
+        }
+
+    def handle_data(self, data):
+        """Decode a chunk of bytes and publish the resulting samples."""
+        received_at = time.time()
+        for msg_type, sequence, payload in self.decoder.feed(data):
+            if self.expected_sequence is not None and sequence != self.expected_sequence:
+                lost = (sequence - self.expected_sequence) & 0xFFFF
+                self.frames_lost += lost
+                FRAMES_LOST.inc(lost)
+            self.expected_sequence = (sequence + 1) & 0xFFFF
+            self.frames_received += 1
+            FRAMES_RECEIVED.inc()
+
+            decode = DECODERS.get(msg_type)
+            if decode is None:
+                self.unknown_frames += 1
+                continue
+            sample = decode(payload)
+            sample["type"] = msg_type
+            sample["sequence"] = sequence
+            sample["received_at"] = received_at
+            if "max_loop_us" in sample:
+                LOOP_SECONDS.observe(sample["max_loop_us"] / 1e6)
+
+            for queue in self.subscribers:
+                try:
+                    queue.put_nowait(sample)
+                except asyncio.QueueFull:
+                    # A slow subscriber loses samples; the link is never held up
+                    self.subscriber_drops += 1
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, self.read_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            # The other end of a pseudo-terminal went away
+            data = b''
+        if not data:
+            self._closed.set()
+            return
+        self.handle_data(data)
+
+    async def run(self):
+        """Receive until the device is closed or the task is cancelled."""
+        if self.fd is None:
+            self.open()
+        loop = asyncio.get_running_loop()
+        self._closed = asyncio.Event()
+        loop.add_reader(self.fd, self._on_readable)
+        try:
+            await self._closed.wait()
+        finally:
+            loop.remove_reader(self.fd)
+            self.close()
+
+
+async def simulate_link(fd, rate_hz=50, duration=3.0, drop_every=25):
+    """Write simulated attitude frames to fd, skipping some sequence numbers."""
+    from telemetry_protocol import pack_attitude, FRAME_OVERHEAD, ATTITUDE_SIZE
+    import math
+
+    buffer = bytearray(FRAME_OVERHEAD + ATTITUDE_SIZE)
+    start = time.time()
+    sequence = 0
+    while time.time() - start < duration:
+        time_ms = int((time.time() - start) * 1000)
+        angles = {'pitch': 10 * math.sin(time_ms / 500), 'roll': 5 * math.cos(time_ms / 700), 'yaw': 0.0}
+        pid_outputs = {axis: 64 * angle for axis, angle in angles.items()}
+        throttles = {'front_left': 50000, 'rear_left': 50000, 'front_right': 50000, 'rear_right': 50000}
+        if sequence % drop_every != drop_every - 1:
+            length = pack_attitude(buffer, sequence, time_ms, angles, pid_outputs, throttles, 1200, 20)
+            os.write(fd, buffer[:length])
+        sequence += 1
+        await asyncio.sleep(1 / rate_hz)
+
+
+async def main(device, baudrate):
+    receiver = TelemetryReceiver(device, baudrate)
+    queue = receiver.subscribe()
+    receiver_task = asyncio.create_task(receiver.run())
+
+    async def printer():
+        while True:
+            sample = await queue.get()
+            print(f"#{sample['sequence']:5d} t={sample['time_ms']} ms " +
+                  f"pitch={sample['pitch']:.2f}, roll={sample['roll']:.2f}, yaw={sample['yaw']:.2f} " +
+                  f"max_loop={sample['max_loop_us']} µs loops={sample['loops']}")
+
+    printer_task = asyncio.create_task(printer())
+    try:
+        await receiver_task
+    finally:
+        printer_task.cancel()
+        print(receiver.stats())
+
+
+async def loopback():
+    """Run the receiver against a pseudo-terminal fed by a simulated drone."""
+    master, slave = os.openpty()
+    tty.setraw(master)
+    receiver = TelemetryReceiver(os.ttyname(slave))
+    # Open before the first write: switching to raw mode flushes pending input
+    receiver.open()
+    queue = receiver.subscribe()
+    receiver_task = asyncio.create_task(receiver.run())
+
+    await simulate_link(master)
+    await asyncio.sleep(0.1)
+    receiver_task.cancel()
+    os.close(master)
+    os.close(slave)
+
+    print(f"Decoded samples: {queue.qsize()}")
+    print(receiver.stats())
+
+
+if __name__ == "__main__":
+    # Usage: python telemetry_receiver.py <serial device> [baudrate]
+    #        python telemetry_receiver.py --loopback
+    if len(sys.argv) > 1 and sys.argv[1] == "--loopback":
+        asyncio.run(loopback())
+    else:
+        device = sys.argv[1] if len(sys.argv) > 1 else "/dev/ttyUSB0"
+        baudrate = int(sys.argv[2]) if len(sys.argv) > 2 else 115200
+        try:
+            asyncio.run(main(device, baudrate))
+        except KeyboardInterrupt:
+            print("\nExiting receiver.")
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from crash_replay import simulate, replay
+
+
+@pytest.mark.parametrize("kind", ["climb", "vibration", "aggressive", "touchdown"])
+def test_no_crash_on_normal_flights(kind):
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        time_ms, accel, gyro, _ = simulate(kind, rng)
+        assert replay(time_ms, accel, gyro)[1] is None
+
+
+@pytest.mark.parametrize("kind, reasons", [("collision", {"impact"}), ("flip", {"gyro spike"}),
+                                           ("free-fall", {"free-fall", "attitude limit"})])
+def test_crashes_are_detected(kind, reasons):
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        time_ms, accel, gyro, onset_ms = simulate(kind, rng)
+        _, detector_ms, detected = replay(time_ms, accel, gyro)
+        assert detected in reasons and detector_ms - onset_ms < 150
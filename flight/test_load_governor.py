@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+import load_governor
+from load_governor import LoadGovernor, POSTPONE_HOUSEKEEPING
+
+
+class Clock:
+    """MicroPython's tick functions on a simulated microsecond clock."""
+
+    def __init__(self, monkeypatch):
+        self.us = 0
+        for name, function in (("ticks_us", lambda: self.us), ("ticks_ms", lambda: self.us // 1000),
+                               ("ticks_diff", lambda a, b: a - b), ("ticks_add", lambda a, b: a + b),
+                               ("sleep_us", self.advance)):
+            monkeypatch.setattr(time, name, function, raising=False)
+        monkeypatch.setattr(load_governor.gc, "collect", lambda: self.advance(500))
+
+    def advance(self, us):
+        self.us += max(us, 0)
+
+
+class SlowLogger:
+    def __init__(self, clock, flush_costs):
+        self.clock = clock
+        self.flush_costs = list(flush_costs)
+        self.flushes = 0
+
+    def log(self, message):
+        pass
+
+    def flush(self):
+        self.clock.advance(self.flush_costs.pop(0) if self.flush_costs else 300)
+        self.flushes += 1
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    return Clock(monkeypatch)
+
+
+def fly(governor, clock, seconds, work_us=1000):
+    for _ in range(seconds * 1000 // 5):
+        governor.start()
+        clock.advance(work_us)
+        governor.flush()
+        governor.collect_garbage()
+        governor.finish()
+
+
+def test_one_slow_flush_does_not_stop_later_flushes(clock):
+    logger = SlowLogger(clock, [8000])
+    governor = LoadGovernor(logger, period_ms=5, max_postpone_ms=60_000)
+    fly(governor, clock, 6)
+    # The first flush took 8 ms, longer than any slack, yet flushing resumes
+    assert logger.flushes >= 4
+    assert governor.forced == 0
+
+
+def test_housekeeping_is_forced_when_postponed_too_long(clock):
+    logger = SlowLogger(clock, [])
+    governor = LoadGovernor(logger, period_ms=5, restore_after=10_000)
+    governor.level = POSTPONE_HOUSEKEEPING
+    fly(governor, clock, 4)
+    # Due after 1 s, forced 2 s later
+    assert logger.flushes == 1
+    assert governor.forced == 2
+    assert governor.last_gc_ms >= 3000
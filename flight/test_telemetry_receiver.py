@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+import tty
+
+from telemetry_protocol import FrameDecoder, pack_attitude, FRAME_OVERHEAD, ATTITUDE_SIZE, MSG_ATTITUDE
+from telemetry_receiver import TelemetryReceiver, simulate_link
+from telemetry_link import TelemetryLink
+
+ANGLES = {'pitch': 12.34, 'roll': -5.67, 'yaw': 179.5}
+PID_OUTPUTS = {'pitch': 120, 'roll': -80, 'yaw': 3}
+THROTTLES = {'front_left': 50000, 'rear_left': 50100, 'front_right': 49900, 'rear_right': 50000}
+
+
+def attitude_frame(sequence, time_ms=1000):
+    buffer = bytearray(FRAME_OVERHEAD + ATTITUDE_SIZE)
+    length = pack_attitude(buffer, sequence, time_ms, ANGLES, PID_OUTPUTS, THROTTLES, 1500, 20)
+    return bytes(buffer[:length])
+
+
+def test_decoder_handles_split_frames_and_garbage():
+    decoder = FrameDecoder()
+    stream = b'\x00\xa5junk' + attitude_frame(1) + b'\xa5' + attitude_frame(2)
+    frames = []
+    for i in range(0, len(stream), 3):
+        frames += decoder.feed(stream[i:i + 3])
+    assert [(msg_type, sequence) for msg_type, sequence, _ in frames] == [(MSG_ATTITUDE, 1), (MSG_ATTITUDE, 2)]
+    assert decoder.crc_errors == 0
+
+
+def test_decoder_resynchronizes_after_crc_error():
+    decoder = FrameDecoder()
+    corrupted = bytearray(attitude_frame(1))
+    corrupted[8] ^= 0xFF
+    frames = decoder.feed(bytes(corrupted) + attitude_frame(2))
+    assert [sequence for _, sequence, _ in frames] == [2]
+    assert decoder.crc_errors == 1
+
+
+def test_receiver_counts_lost_frames():
+    receiver = TelemetryReceiver("unused")
+    queue = asyncio.Queue()
+    receiver.subscribers.append(queue)
+    receiver.handle_data(attitude_frame(10) + attitude_frame(11) + attitude_frame(14))
+    assert receiver.frames_received == 3
+    assert receiver.frames_lost == 2
+    sample = queue.get_nowait()
+    assert sample['sequence'] == 10
+    assert (sample['pitch'], sample['roll'], sample['yaw']) == (12.34, -5.67, 179.5)
+    assert sample['max_loop_us'] == 1500 and sample['front_left'] == 50000
+
+
+def test_pty_loopback():
+    async def run():
+        master, slave = os.openpty()
+        tty.setraw(master)
+        receiver = TelemetryReceiver(os.ttyname(slave))
+        # Opening switches the pty to raw mode, which flushes pending input
+        receiver.open()
+        queue = receiver.subscribe()
+        receiver_task = asyncio.create_task(receiver.run())
+        await simulate_link(master, rate_hz=100, duration=0.5, drop_every=10)
+        await asyncio.sleep(0.1)
+        receiver_task.cancel()
+        os.close(master)
+        os.close(slave)
+        return receiver, queue
+
+    receiver, queue = asyncio.run(run())
+    stats = receiver.stats()
+    assert stats["frames_received"] > 20
+    assert stats["crc_errors"] == 0 and stats["discarded_bytes"] == 0
+    # Every 10th frame is not sent; each one shows up as a sequence gap
+    assert stats["frames_lost"] >= 2
+    assert stats["frames_lost"] == receiver.expected_sequence - stats["frames_received"]
+    assert queue.qsize() == stats["frames_received"]
+
+
+class FakeUART:
+    def __init__(self):
+        self.written = bytearray()
+        self.busy = False
+
+    def write(self, data):
+        self.written += data
+
+    def txdone(self):
+        return not self.busy
+
+
+def test_link_skips_frames_while_busy_or_shed(monkeypatch):
+    # MicroPython's tick functions, for CPython
+    monkeypatch.setattr(time, "ticks_ms", lambda: int(time.monotonic() * 1000), raising=False)
+    monkeypatch.setattr(time, "ticks_diff", lambda a, b: a - b, raising=False)
+    uart = FakeUART()
+    link = TelemetryLink(rate_hz=1000, stream=uart)
+    link.period_ms = 0
+    assert link.send(0, ANGLES, PID_OUTPUTS, THROTTLES, 0.005)
+    uart.busy = True
+    assert not link.send(1, ANGLES, PID_OUTPUTS, THROTTLES, 0.005)
+    uart.busy = False
+    assert not link.send(2, ANGLES, PID_OUTPUTS, THROTTLES, 0.005, shed=True)
+    assert link.send(3, ANGLES, PID_OUTPUTS, THROTTLES, 0.005)
+
+    assert link.frames_sent == 2 and link.frames_skipped == 2
+
+    # Skipped frames keep the sequence contiguous, so they are not counted as lost
+    receiver = TelemetryReceiver("unused")
+    queue = receiver.subscribe()
+    receiver.handle_data(bytes(uart.written))
+    first, second = queue.get_nowait(), queue.get_nowait()
+    assert (first['sequence'], second['sequence']) == (0, 1)
+    assert second['loops'] == 3
+    assert receiver.frames_lost == 0
+
+    # A frame lost on the radio still shows up as a gap
+    link.send(4, ANGLES, PID_OUTPUTS, THROTTLES, 0.005)
+    link.send(5, ANGLES, PID_OUTPUTS, THROTTLES, 0.005)
+    receiver.handle_data(bytes(uart.written[-(FRAME_OVERHEAD + ATTITUDE_SIZE):]))
+    assert queue.get_nowait()['sequence'] == 3
+    assert receiver.frames_lost == 1
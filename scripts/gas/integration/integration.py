@@ -1,24 +1,17 @@
-from dronekit import connect, VehicleMode
+import asyncio
+from dronekit import connect
+from vehicle_commands import VehicleCommander
 
 # Connect to the vehicle (adjust connection string accordingly)
 vehicle = connect('127.0.0.1:14550', wait_ready=True)
+commander = VehicleCommander(vehicle, name="gas-drone")
 
 def arm_and_takeoff(aTargetAltitude):
     print("Arming motors")
-    vehicle.mode = VehicleMode("GUIDED")
-    vehicle.armed = True
-    while not vehicle.armed:
-        print("Waiting for arming...")
-        time.sleep(1)
-    print("Taking off!")
-    vehicle.simple_takeoff(aTargetAltitude)
-    while True:
-        altitude = vehicle.location.global_relative_frame.alt
-        print(f"Altitude: {altitude}")
-        if altitude >= aTargetAltitude * 0.95:
-            print("Target altitude reached")
-            break
-        time.sleep(1)
+    asyncio.run(commander.arm_and_takeoff(aTargetAltitude))
+    print("Target altitude reached")
+    for command, latency in commander.latencies:
+        print(f"{command}: {latency * 1000:.0f} ms")
 
 # Example usage
 arm_and_takeoff(10)  # Take off to 10 meters altitude
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from dronekit import connect, VehicleMode
+
+
+class VehicleCommander:
+    """
+    Asynchronous, listener-driven commands for one dronekit vehicle.
+    dronekit calls attribute listeners from its own thread; they are handed
+    to the event loop, which resolves whatever command is waiting for that
+    state. Nothing polls, so a command completes as soon as the telemetry
+    shows the new state.
+    """
+
+    WATCHED_ATTRIBUTES = ('armed', 'mode', 'location.global_relative_frame')
+
+    def __init__(self, vehicle, name=None):
+        self.vehicle = vehicle
+        self.name = name or str(id(vehicle))
+        self.loop = None
+        self.waiters = []
+        self.latencies = []  # (command, seconds from command to observed state)
+
+        for attribute in self.WATCHED_ATTRIBUTES:
+            vehicle.add_attribute_listener(attribute, self._on_attribute)
+
+    def close(self):
+        """Detach the attribute listeners."""
+        for attribute in self.WATCHED_ATTRIBUTES:
+            self.vehicle.remove_attribute_listener(attribute, self._on_attribute)
+
+    def _on_attribute(self, vehicle, attribute, value):
+        # Runs in the dronekit thread
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._resolve, attribute, value)
+
+    def _resolve(self, attribute, value):
+        for waiter in list(self.waiters):
+            waiter_attribute, predicate, future = waiter
+            if waiter_attribute == attribute and not future.done() and predicate(value):
+                future.set_result(value)
+                self.waiters.remove(waiter)
+
+    def _current(self, attribute):
+        value = self.vehicle
+        for part in attribute.split('.'):
+            value = getattr(value, part)
+        return value
+
+    async def wait_for(self, attribute, predicate, timeout):
+        """Wait until predicate(attribute value) holds; raises TimeoutError after timeout seconds."""
+        self.loop = asyncio.get_running_loop()
+        future = self.loop.create_future()
+        waiter = (attribute, predicate, future)
+        self.waiters.append(waiter)
+
+        # The state may already be reached before the next listener call
+        current = self._current(attribute)
+        if predicate(current):
+            self.waiters.remove(waiter)
+            return current
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{self.name}: timed out after {timeout} s waiting for {attribute}")
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    async def _command(self, label, issue, attribute, predicate, timeout):
+        self.loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        issue()
+        value = await self.wait_for(attribute, predicate, timeout)
+        self.latencies.append((label, time.monotonic() - start))
+        return value
+
+    async def set_mode(self, mode_name, timeout=10):
+        """Switch flight mode and wait until the vehicle reports it."""
+        def issue():
+            self.vehicle.mode = VehicleMode(mode_name)
+        return await self._command(f"mode {mode_name}", issue, 'mode',
+                                   lambda mode: mode.name == mode_name, timeout)
+
+    async def arm(self, timeout=10):
+        """Arm the motors and wait until the vehicle reports armed."""
+        def issue():
+            self.vehicle.armed = True
+        return await self._command("arm", issue, 'armed', lambda armed: armed, timeout)
+
+    async def disarm(self, timeout=10):
+        def issue():
+            self.vehicle.armed = False
+        return await self._command("disarm", issue, 'armed', lambda armed: not armed, timeout)
+
+    async def takeoff(self, target_altitude, timeout=60, tolerance=0.95):
+        """Take off and wait until the relative altitude reaches tolerance * target."""
+        def issue():
+            self.vehicle.simple_takeoff(target_altitude)
+        return await self._command(f"takeoff {target_altitude} m", issue, 'location.global_relative_frame',
+                                   lambda location: location.alt is not None and
+                                   location.alt >= target_altitude * tolerance, timeout)
+
+    async def arm_and_takeoff(self, target_altitude, timeout=60):
+        """GUIDED mode, arm, and climb to target_altitude."""
+        await self.set_mode("GUIDED")
+        await self.arm()
+        await self.takeoff(target_altitude, timeout)
+
+
+async def connect_vehicle(connection_string, name=None):
+    """Connect to a vehicle without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    vehicle = await loop.run_in_executor(None, lambda: connect(connection_string, wait_ready=True))
+    return VehicleCommander(vehicle, name or connection_string)
+
+
+async def arm_and_takeoff_all(commanders, target_altitude, timeout=60):
+    """
+    Launch several vehicles concurrently.
+    Returns {name: None or the exception raised} so one failing vehicle does not stop the others.
+    """
+    results = await asyncio.gather(*(commander.arm_and_takeoff(target_altitude, timeout)
+                                     for commander in commanders), return_exceptions=True)
+    return {commander.name: result if isinstance(result, Exception) else None
+            for commander, result in zip(commanders, results)}
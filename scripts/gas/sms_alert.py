@@ -1,13 +1,21 @@
 from twilio.rest import Client
 
+account_sid = "your_account_sid"         # Your Twilio account SID
+auth_token = "your_auth_token"           # Your Twilio auth token
+from_phone = "+1234567890"               # Your Twilio phone number (in E.164 format)
+
+# Created on first use and reused for every alert
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        client = Client(account_sid, auth_token)
+    return client
+
 def send_sms_alert(message, to_phone):
-    account_sid = "your_account_sid"         # Your Twilio account SID
-    auth_token = "your_auth_token"           # Your Twilio auth token
-    client = Client(account_sid, auth_token)
-    from_phone = "+1234567890"               # Your Twilio phone number (in E.164 format)
-    
     try:
-        sms = client.messages.create(
+        sms = get_client().messages.create(
             body=message,
             from_=from_phone,
             to=to_phone
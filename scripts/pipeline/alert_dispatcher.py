@@ -0,0 +1,330 @@
+import asyncio
+import collections
+import random
+import smtplib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+import metrics
+
+OUTCOMES = ("submitted", "dropped", "deduplicated", "rate_limited", "digests", "failed", "retries", "delivered")
+ALERT_COUNTERS = {outcome: metrics.counter("alerts_total", "Alerts by outcome", outcome=outcome) for outcome in OUTCOMES}
+DELIVERY_SECONDS = metrics.histogram("alert_delivery_seconds", "Time from submit to delivery of an alert")
+
+
+class TwilioSmsProvider:
+    """SMS through Twilio; one client is created and reused for every message."""
+
+    def __init__(self, account_sid, auth_token, from_phone):
+        from twilio.rest import Client
+        self.client = Client(account_sid, auth_token)
+        self.from_phone = from_phone
+
+    def send(self, recipient, subject, message):
+        sms = self.client.messages.create(body=message, from_=self.from_phone, to=recipient)
+        return sms.sid
+
+
+class SmtpEmailProvider:
+    """E-mail over SMTP; the connection is kept open and re-established on failure."""
+
+    def __init__(self, host, port=587, username=None, password=None, from_address=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_address = from_address or username
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=10)
+        connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def send(self, recipient, subject, message):
+        email = EmailMessage()
+        email["Subject"] = subject
+        email["From"] = self.from_address
+        email["To"] = recipient
+        email.set_content(message)
+        with self.lock:
+            try:
+                if self.connection is None:
+                    self.connection = self._connect()
+                self.connection.send_message(email)
+            except OSError:
+                # SMTP errors and dropped sockets alike: reconnect on the next message
+                if self.connection is not None:
+                    self.connection.close()
+                self.connection = None
+                raise
+
+
+class StubProvider:
+    """Local stand-in that records deliveries; can simulate latency and failures."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+
+    def send(self, recipient, subject, message):
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise ConnectionError("stub provider failure")
+        self.sent.append((time.time(), recipient, subject, message))
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.rate = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AlertDispatcher:
+    """
+    Background alert delivery.
+
+    submit() never blocks the caller. Repeats of the same alert (same channel,
+    recipient and key) inside dedup_window, and alerts beyond a recipient's
+    rate limit, are coalesced into a digest sent every digest_interval.
+    Deliveries run on a worker pool with retries and exponential backoff,
+    and the time from submit to delivery is recorded.
+    """
+
+    def __init__(self, providers, workers=4, rate_limit=(5, 60.0), dedup_window=60.0,
+                 digest_interval=30.0, max_retries=3, backoff=1.0, queue_size=10000):
+        self.providers = providers
+        self.workers = workers
+        self.burst, self.period = rate_limit
+        self.dedup_window = dedup_window
+        self.digest_interval = digest_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.queue_size = queue_size
+
+        self.buckets = {}
+        self.last_sent = {}
+        self.digests = collections.defaultdict(dict)
+        self.latencies = collections.deque(maxlen=10000)
+        self.counters = collections.Counter()
+
+        self.loop = None
+        self.queue = None
+        self.executor = None
+        self.tasks = []
+        self.thread = None
+        self.pending_retries = 0
+
+    def _count(self, outcome):
+        self.counters[outcome] += 1
+        ALERT_COUNTERS[outcome].inc()
+
+    # Submission
+
+    def submit(self, channel, recipient, subject, message, key=None):
+        """
+        Queue an alert; returns False if it was dropped because the queue is
+        full or failed because no provider handles its channel.
+        """
+        alert = {"channel": channel, "recipient": recipient, "subject": subject, "message": message,
+                 "key": key or subject, "submitted": time.monotonic(), "attempt": 0}
+        self._count("submitted")
+        if channel not in self.providers:
+            self._count("failed")
+            print(f"No provider for {channel} alert to {recipient}")
+            return False
+        if self._is_duplicate(alert):
+            return True
+        if not self._take_token(alert):
+            return True
+        try:
+            self.queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            self._count("dropped")
+            return False
+        return True
+
+    def submit_threadsafe(self, channel, recipient, subject, message, key=None):
+        """submit() for callers outside the dispatcher's event loop (e.g. a blocking sensor loop)."""
+        self.loop.call_soon_threadsafe(self.submit, channel, recipient, subject, message, key)
+
+    def _is_duplicate(self, alert):
+        identity = (alert["channel"], alert["recipient"], alert["key"])
+        last = self.last_sent.get(identity)
+        if last is not None and alert["submitted"] - last < self.dedup_window:
+            self._count("deduplicated")
+            self._add_to_digest(alert)
+            return True
+        self.last_sent[identity] = alert["submitted"]
+        return False
+
+    def _take_token(self, alert):
+        target = (alert["channel"], alert["recipient"])
+        bucket = self.buckets.get(target)
+        if bucket is None:
+            bucket = self.buckets[target] = TokenBucket(self.burst, self.burst / self.period)
+        if bucket.take():
+            return True
+        self._count("rate_limited")
+        self._add_to_digest(alert)
+        return False
+
+    def _add_to_digest(self, alert):
+        pending = self.digests[(alert["channel"], alert["recipient"])]
+        entry = pending.get(alert["key"])
+        if entry is None:
+            pending[alert["key"]] = {"count": 1, "first": alert["submitted"], "last_message": alert["message"]}
+        else:
+            entry["count"] += 1
+            entry["last_message"] = alert["message"]
+
+    # Delivery
+
+    async def _flush_digests(self):
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            for (channel, recipient), pending in list(self.digests.items()):
+                if not pending:
+                    continue
+                bucket = self.buckets.get((channel, recipient))
+                if bucket is not None and not bucket.take():
+                    continue
+                total = sum(entry["count"] for entry in pending.values())
+                lines = [f"{key}: x{entry['count']} (last: {entry['last_message']})" for key, entry in pending.items()]
+                first = min(entry["first"] for entry in pending.values())
+                self.digests[(channel, recipient)] = {}
+                self._count("digests")
+                await self.queue.put({"channel": channel, "recipient": recipient,
+                                      "subject": f"{total} repeated alerts", "message": "\n".join(lines),
+                                      "key": None, "submitted": first, "attempt": 0})
+
+    async def _worker(self):
+        while True:
+            alert = await self.queue.get()
+            try:
+                provider = self.providers.get(alert["channel"])
+                if provider is None:
+                    # A bad alert must not take the worker (and stop()) down with it
+                    self._count("failed")
+                    print(f"No provider for {alert['channel']} alert to {alert['recipient']}")
+                    continue
+                await self.loop.run_in_executor(self.executor, provider.send,
+                                                alert["recipient"], alert["subject"], alert["message"])
+            except Exception as error:
+                alert["attempt"] += 1
+                if alert["attempt"] > self.max_retries:
+                    self._count("failed")
+                    print(f"Failed to send {alert['channel']} alert to {alert['recipient']}: {error}")
+                else:
+                    self._count("retries")
+                    self.pending_retries += 1
+                    delay = self.backoff * 2 ** (alert["attempt"] - 1) * random.uniform(0.5, 1.5)
+                    self.loop.call_later(delay, self._retry, alert)
+            else:
+                self._count("delivered")
+                latency = time.monotonic() - alert["submitted"]
+                self.latencies.append(latency)
+                DELIVERY_SECONDS.observe(latency)
+            finally:
+                self.queue.task_done()
+
+    def _retry(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            # The alert was already accepted: wait for room rather than lose it
+            self.loop.call_later(self.backoff, self._retry, alert)
+            return
+        self.pending_retries -= 1
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        self.executor = ThreadPoolExecutor(self.workers)
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self._flush_digests()))
+
+    async def stop(self):
+        """Wait for queued deliveries and retries, then stop the workers."""
+        await self.queue.join()
+        while self.pending_retries:
+            await asyncio.sleep(0.05)
+            await self.queue.join()
+        for task in self.tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    def start_background(self):
+        """Run the dispatcher on its own event loop thread; use submit_threadsafe() afterwards."""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+
+    # Metrics
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else None
+
+        return dict(self.counters,
+                    queued=self.queue.qsize() if self.queue else 0,
+                    latency_p50=percentile(0.5), latency_p95=percentile(0.95),
+                    latency_max=latencies[-1] if latencies else None)
+
+
+async def demo():
+    """Flood the dispatcher the way the voltage loop would and show what gets delivered."""
+    sms = StubProvider(latency=0.05, failure_rate=0.2)
+    email = StubProvider(latency=0.1)
+    dispatcher = AlertDispatcher({"sms": sms, "email": email}, rate_limit=(3, 60.0),
+                                 dedup_window=5.0, digest_interval=1.0, backoff=0.05)
+    await dispatcher.start()
+
+    # An anomalous reading every 0.5 s would mean 20 alerts in 10 s; simulate 200 quickly
+    for i in range(200):
+        message = f"ALERT: Voltage anomaly detected! Current reading: {245 + i % 7} V"
+        dispatcher.submit("email", "recipient@example.com", "Voltage Anomaly Alert", message, key="voltage")
+        dispatcher.submit("sms", "+19876543210", "Voltage Anomaly Alert", message, key="voltage")
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(1.5)
+    await dispatcher.stop()
+
+    print(f"SMS delivered: {len(sms.sent)}, e-mails delivered: {len(email.sent)}")
+    print(dispatcher.stats())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--demo":
+        asyncio.run(demo())
+    else:
+        print("Usage: python alert_dispatcher.py --demo")
@@ -0,0 +1,273 @@
+import sys
+import time
+import numpy as np
+
+import metrics
+
+DETECTORS = ("threshold", "rate", "cusum", "ewma")
+
+# Per sensor type settings. Thresholds are the ones used by the hazard scripts:
+# gas THRESHOLD = 10 ppm, flood PRAG = 100 cm, voltage THRESHOLD = 240 V.
+# A detector set to None is disabled for that sensor type.
+DETECTOR_CONFIG = {
+    "gas": {
+        "threshold": 10.0,      # ppm
+        "rate": 5.0,            # ppm/s
+        "cusum": (0.5, 8.0),    # (drift k, decision h) in standard deviations
+        "ewma": 4.0,            # band half-width in standard deviations
+    },
+    "flood": {
+        "threshold": 100.0,     # cm
+        "rate": 20.0,           # cm/s
+        "cusum": (0.5, 8.0),
+        "ewma": 4.0,
+    },
+    "voltage": {
+        "threshold": 240.0,     # V
+        "rate": 50.0,           # V/s
+        "cusum": (0.5, 8.0),
+        "ewma": 5.0,
+    },
+}
+
+READINGS_EVALUATED = metrics.counter("anomaly_readings_total", "Readings evaluated by the anomaly engine")
+BATCH_SECONDS = metrics.histogram("anomaly_batch_seconds", "Time to evaluate one batch of readings")
+ALERTS_RAISED = metrics.counter("anomaly_alerts_total", "Detector state transitions", state="raised")
+ALERTS_CLEARED = metrics.counter("anomaly_alerts_total", "Detector state transitions", state="cleared")
+
+DEFAULTS = {
+    "hysteresis": 0.1,      # release level = trigger level * (1 - hysteresis)
+    "on_count": 3,          # consecutive triggering readings before an alert is raised
+    "off_count": 5,         # consecutive releasing readings before it is cleared
+    "warmup": 20,           # readings before the statistical detectors are armed
+    "alpha_slow": 0.01,     # baseline EWMA for CUSUM
+    "alpha_fast": 0.2,      # EWMA band
+}
+
+
+class AnomalyEngine:
+    """
+    Streaming anomaly detection over many channels at once.
+
+    State is kept in per-channel NumPy arrays and every batch of readings is
+    evaluated with array operations: all detectors of all channels in a
+    batch produce trigger/release matrices, which drive a debounced alert
+    state machine with hysteresis. Only state transitions become Python
+    event dicts.
+    """
+
+    def __init__(self, config=None, capacity=64, **settings):
+        self.config = config or DETECTOR_CONFIG
+        self.settings = dict(DEFAULTS, **settings)
+        self.channel_ids = []
+        self.channel_types = []
+        self.index = {}
+        self.capacity = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Create or grow the per-channel arrays."""
+        fields = {
+            # State
+            "count": (np.int64, 0), "last_value": (np.float64, 0.0), "last_time": (np.float64, 0.0),
+            "slow_mean": (np.float64, 0.0), "slow_var": (np.float64, 0.0),
+            "fast_mean": (np.float64, 0.0), "fast_var": (np.float64, 0.0),
+            "cusum_pos": (np.float64, 0.0), "cusum_neg": (np.float64, 0.0),
+            # Parameters
+            "threshold": (np.float64, np.inf), "rate": (np.float64, np.inf),
+            "cusum_k": (np.float64, 0.0), "cusum_h": (np.float64, np.inf),
+            "ewma_n": (np.float64, np.inf),
+        }
+        detector_fields = {"active": (bool, False), "on_run": (np.int64, 0), "off_run": (np.int64, 0)}
+
+        for name, (dtype, fill) in fields.items():
+            array = np.full(capacity, fill, dtype=dtype)
+            if self.capacity:
+                array[:self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        for name, (dtype, fill) in detector_fields.items():
+            array = np.full((capacity, len(DETECTORS)), fill, dtype=dtype)
+            if self.capacity:
+                array[:self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def add_channel(self, channel_id, sensor_type):
+        """Register a channel and return its index."""
+        key = (channel_id, sensor_type)
+        if key in self.index:
+            return self.index[key]
+        position = len(self.channel_ids)
+        if position >= self.capacity:
+            self._allocate(2 * self.capacity)
+
+        config = self.config.get(sensor_type, {})
+        if config.get("threshold") is not None:
+            self.threshold[position] = config["threshold"]
+        if config.get("rate") is not None:
+            self.rate[position] = config["rate"]
+        if config.get("cusum") is not None:
+            self.cusum_k[position], self.cusum_h[position] = config["cusum"]
+        if config.get("ewma") is not None:
+            self.ewma_n[position] = config["ewma"]
+
+        self.channel_ids.append(channel_id)
+        self.channel_types.append(sensor_type)
+        self.index[key] = position
+        return position
+
+    def process(self, channels, values, timestamps):
+        """
+        Evaluate a batch of readings; channels are indices from add_channel.
+        Readings of the same channel are applied in order. Returns a list of
+        alert events (raised and cleared).
+        """
+        channels = np.asarray(channels, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        events = []
+        if len(channels) == 0:
+            return events
+        started = time.perf_counter()
+
+        # Rank of every reading within its channel; each rank is one vectorized round
+        order = np.argsort(channels, kind='stable')
+        sorted_channels = channels[order]
+        starts = np.flatnonzero(np.r_[True, sorted_channels[1:] != sorted_channels[:-1]])
+        ranks = np.empty(len(channels), dtype=np.int64)
+        ranks[order] = np.arange(len(channels)) - np.repeat(starts, np.diff(np.r_[starts, len(channels)]))
+
+        if ranks.max() == 0:
+            self._round(channels, values, timestamps, events)
+        else:
+            for rank in range(ranks.max() + 1):
+                selected = ranks == rank
+                self._round(channels[selected], values[selected], timestamps[selected], events)
+
+        READINGS_EVALUATED.inc(len(channels))
+        BATCH_SECONDS.observe(time.perf_counter() - started)
+        if events:
+            raised = sum(event["state"] == "raised" for event in events)
+            ALERTS_RAISED.inc(raised)
+            ALERTS_CLEARED.inc(len(events) - raised)
+        return events
+
+    def _round(self, idx, x, t, events):
+        s = self.settings
+        count = self.count[idx]
+        seen = count > 0
+        warm = count >= s["warmup"]
+
+        # Rate of change since the previous reading of the channel
+        dt = t - self.last_time[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(seen & (dt > 0), (x - self.last_value[idx]) / dt, 0.0)
+
+        # CUSUM on the deviation from the slow baseline, in standard deviations
+        sigma = np.sqrt(self.slow_var[idx]) + 1e-9
+        z = (x - self.slow_mean[idx]) / sigma
+        k = self.cusum_k[idx]
+        cusum_h = self.cusum_h[idx]
+        # Capped at h so the sums drain in a bounded time once the shift is over
+        cusum_pos = np.where(warm, np.clip(self.cusum_pos[idx] + z - k, 0.0, cusum_h), 0.0)
+        cusum_neg = np.where(warm, np.clip(self.cusum_neg[idx] - z - k, 0.0, cusum_h), 0.0)
+        cusum = np.maximum(cusum_pos, cusum_neg)
+
+        # Distance from the fast EWMA, in its standard deviations
+        band = np.abs(x - self.fast_mean[idx]) / (np.sqrt(self.fast_var[idx]) + 1e-9)
+
+        keep = 1.0 - s["hysteresis"]
+        threshold = self.threshold[idx]
+        rate_limit = self.rate[idx]
+        ewma_n = self.ewma_n[idx]
+        trigger = np.column_stack([
+            x > threshold,
+            seen & (np.abs(rate) > rate_limit),
+            warm & (cusum >= cusum_h),
+            warm & (band > ewma_n),
+        ])
+        release = np.column_stack([
+            x < threshold - s["hysteresis"] * np.abs(threshold),
+            np.abs(rate) < rate_limit * keep,
+            cusum < cusum_h / 2,
+            band < ewma_n * keep,
+        ])
+
+        # Debounced state machine
+        active = self.active[idx]
+        on_run = np.where(trigger, self.on_run[idx] + 1, 0)
+        off_run = np.where(release, self.off_run[idx] + 1, 0)
+        raised = ~active & (on_run >= s["on_count"])
+        cleared = active & (off_run >= s["off_count"])
+        active = (active | raised) & ~cleared
+        self.active[idx] = active
+        self.on_run[idx] = on_run
+        self.off_run[idx] = off_run
+
+        # Baselines learn only while the channel is quiet; cumulative averages during warm-up
+        quiet = ~active.any(axis=1)
+        warmup_alpha = 1.0 / (count + 1)
+        for mean_name, var_name, alpha in (("slow_mean", "slow_var", s["alpha_slow"]),
+                                           ("fast_mean", "fast_var", s["alpha_fast"])):
+            a = np.where(quiet, np.maximum(alpha, warmup_alpha), 0.0)
+            mean = getattr(self, mean_name)[idx]
+            delta = x - mean
+            getattr(self, mean_name)[idx] = mean + a * delta
+            getattr(self, var_name)[idx] = (1 - a) * (getattr(self, var_name)[idx] + a * delta * delta)
+
+        self.cusum_pos[idx] = cusum_pos
+        self.cusum_neg[idx] = cusum_neg
+        self.last_value[idx] = x
+        self.last_time[idx] = t
+        self.count[idx] = count + 1
+
+        if raised.any() or cleared.any():
+            for row, column in zip(*np.nonzero(raised | cleared)):
+                channel = int(idx[row])
+                events.append({
+                    "channel": self.channel_ids[channel],
+                    "sensor_type": self.channel_types[channel],
+                    "detector": DETECTORS[column],
+                    "state": "raised" if raised[row, column] else "cleared",
+                    "value": float(x[row]),
+                    "timestamp": float(t[row]),
+                })
+
+    def process_readings(self, readings):
+        """Evaluate Reading tuples from the sensor ingestion service."""
+        channels = [self.add_channel(reading.sensor_id, reading.sensor_type) for reading in readings]
+        return self.process(channels,
+                            [reading.value for reading in readings],
+                            [reading.timestamp for reading in readings])
+
+    def active_alerts(self):
+        """List of (channel_id, detector) pairs currently in alert."""
+        rows, columns = np.nonzero(self.active[:len(self.channel_ids)])
+        return [(self.channel_ids[row], DETECTORS[column]) for row, column in zip(rows, columns)]
+
+
+def benchmark(channels=3000, ticks=200):
+    """Feed random readings for every channel on every tick and report the throughput."""
+    rng = np.random.default_rng(0)
+    engine = AnomalyEngine()
+    types = ["gas", "flood", "voltage"]
+    baselines = {"gas": 5.0, "flood": 60.0, "voltage": 230.0}
+    index = np.array([engine.add_channel(f"{types[i % 3]}-{i}", types[i % 3]) for i in range(channels)])
+    base = np.array([baselines[types[i % 3]] for i in range(channels)])
+
+    events = 0
+    start = time.perf_counter()
+    for tick in range(ticks):
+        values = base + rng.normal(0, 0.01 * base)
+        if tick > 100:
+            values[::97] *= 1.5     # a few channels go anomalous
+        events += len(engine.process(index, values, np.full(channels, tick * 0.5)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{channels * ticks / elapsed:.0f} readings/s over {channels} channels, {events} events, " +
+          f"{len(engine.active_alerts())} active alerts")
+
+
+if __name__ == "__main__":
+    # Usage: python anomaly_engine.py [channels]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,280 @@
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+
+# Detector settings of the hazard scripts (scripts/*/data/data_processing.py); None disables a rule.
+#   threshold     fixed level (gas THRESHOLD, flood PRAG, voltage THRESHOLD)
+#   window, z     |x - moving mean| > z moving std, against the previous window readings
+#   alpha, ewma_z |x - EWMA| > ewma_z EWMA std (RollingWindow with alpha)
+#   min_readings  readings before the statistical rules apply
+#   on_count      consecutive anomalous readings before an alert
+#   cooldown      seconds an alert suppresses the next ones (AlertDispatcher dedup_window)
+DEFAULT_CONFIG = {"threshold": None, "window": None, "z": None, "alpha": None, "ewma_z": None,
+                  "min_readings": 5, "on_count": 1, "cooldown": 60.0}
+
+# An alert up to GRACE seconds after an incident still counts towards it
+GRACE = 60.0
+
+_series = []
+
+
+def config_grid(**choices):
+    """Every combination of the given setting choices, e.g. config_grid(threshold=[230, 240], on_count=[1, 3])."""
+    names = list(choices)
+    return [dict(DEFAULT_CONFIG, **dict(zip(names, values))) for values in itertools.product(*choices.values())]
+
+
+def linear_filter(u, r, initial=0.0):
+    """
+    y[t] = r * y[t - 1] + u[t] with y[-1] = initial, vectorized: the series
+    is cut into blocks short enough for r**-block to stay finite, each block
+    is a scaled cumulative sum, and only the block carries are sequential.
+    """
+    n = len(u)
+    if n == 0:
+        return np.empty(0)
+    block = max(1, min(n, int(200 / -math.log(r)) if 0 < r < 1 else n))
+    blocks = -(-n // block)
+    padded = np.zeros(blocks * block)
+    padded[:n] = u
+    padded = padded.reshape(blocks, block)
+    powers = r ** np.arange(1, block + 1)
+    # Within a block, from a zero start
+    within = np.cumsum(padded / powers, axis=1) * powers
+    carry = np.empty(blocks)
+    previous = initial
+    decay = powers[-1]
+    ends = within[:, -1].tolist()
+    for j in range(blocks):
+        carry[j] = previous
+        previous = decay * previous + ends[j]
+    return (within + carry[:, None] * powers).ravel()[:n]
+
+
+def moving_zscore(x, window):
+    """Z-score of every reading against the previous window readings (fewer at the start), as RollingWindow.zscore."""
+    centred = x - x.mean()
+    sums = np.r_[0.0, np.cumsum(centred)]
+    squares = np.r_[0.0, np.cumsum(centred * centred)]
+    index = np.arange(len(x))
+    first = np.maximum(index - window, 0)
+    count = np.maximum(index - first, 1)
+    mean = (sums[index] - sums[first]) / count
+    var = np.maximum((squares[index] - squares[first]) / count - mean * mean, 0.0)
+    std = np.sqrt(var)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 1e-9 * (np.abs(mean) + 1), (centred - mean) / std, 0.0)
+
+
+def ewma_zscore(x, alpha):
+    """Z-score of every reading against the EWMA band of the readings before it, as RollingWindow.ewma_zscore."""
+    r = 1.0 - alpha
+    base = x[0]
+    # mean[t] = r * mean[t - 1] + alpha * x[t], starting at the first reading
+    mean = linear_filter(alpha * (x[1:] - base), r) + base
+    mean = np.r_[base, mean]
+    delta = x[1:] - mean[:-1]
+    var = np.r_[0.0, linear_filter(r * alpha * delta * delta, r)]
+    std = np.sqrt(var[:-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.r_[0.0, np.where(std > 0, delta / std, 0.0)]
+
+
+def run_lengths(flags):
+    """Length of the run of True values ending at every position (0 where False)."""
+    index = np.arange(1, len(flags) + 1)
+    last_false = np.maximum.accumulate(np.where(flags, 0, index))
+    return np.where(flags, index - last_false, 0)
+
+
+def deduplicate(times, cooldown):
+    """Times kept when each kept alert suppresses the following ones for cooldown seconds."""
+    if not cooldown or len(times) < 2:
+        return times
+    kept = []
+    position = 0
+    while position < len(times):
+        kept.append(position)
+        position = int(np.searchsorted(times, times[position] + cooldown, side='left'))
+    return times[kept]
+
+
+def score(alerts, incidents, duration, grace=GRACE):
+    """True/false alerts, detected incidents and detection delays of alert times against (start, end) incidents."""
+    incidents = np.asarray(incidents, dtype=np.float64).reshape(-1, 2)
+    starts, ends = incidents[:, 0], incidents[:, 1] + grace
+    # Incidents are sorted and disjoint: an alert belongs to the last one starting before it
+    owner = np.searchsorted(starts, alerts, side='right') - 1
+    true = (owner >= 0) & (alerts <= ends[np.maximum(owner, 0)])
+    first = np.full(len(incidents), np.inf)
+    np.minimum.at(first, owner[true], alerts[true])
+    detected = np.isfinite(first)
+    return {
+        "alerts": len(alerts),
+        "true_alerts": int(true.sum()),
+        "false_alerts": int((~true).sum()),
+        "detected": int(detected.sum()),
+        "missed": int((~detected).sum()),
+        "delays": (first - starts)[detected],
+        "alerts_per_day": len(alerts) * 86400.0 / max(duration, 1.0),
+    }
+
+
+def _rules(config):
+    return tuple(-math.inf if config[name] is None else config[name]
+                 for name in ("threshold", "z", "ewma_z", "min_readings"))
+
+
+def evaluate_group(task):
+    """All configurations sharing window and alpha, on one series: the statistics are computed once."""
+    series_index, window, alpha, configs = task
+    t, x, incidents = _series[series_index]
+    moving = np.abs(moving_zscore(x, window)) if window else None
+    ewma = np.abs(ewma_zscore(x, alpha)) if alpha else None
+    results = []
+    # Configurations differing only in debounce and cooldown share their anomaly runs
+    key = None
+    for number, config in sorted(configs, key=lambda item: _rules(item[1])):
+        if _rules(config) != key:
+            key = _rules(config)
+            anomaly = x > config["threshold"] if config["threshold"] is not None else np.zeros(len(x), dtype=bool)
+            statistical = np.zeros(len(x), dtype=bool)
+            if moving is not None and config["z"] is not None:
+                statistical |= moving > config["z"]
+            if ewma is not None and config["ewma_z"] is not None:
+                statistical |= ewma > config["ewma_z"]
+            statistical[:config["min_readings"]] = False
+            anomaly |= statistical
+            runs = run_lengths(anomaly)
+        # Every reading of a long enough run would alert; the dispatcher drops repeats inside the cooldown
+        candidates = t[runs >= config["on_count"]]
+        alerts = deduplicate(candidates, config["cooldown"])
+        results.append((number, series_index, score(alerts, incidents, t[-1] - t[0] if len(t) else 0.0)))
+    return results
+
+
+def backtest(series, configs, processes=None):
+    """
+    Replay every series (timestamps, values, incidents) through every
+    configuration on a process pool. Returns one summary per configuration,
+    totals over all series.
+    """
+    global _series
+    _series = [(np.asarray(t, dtype=np.float64), np.asarray(x, dtype=np.float64), sorted(incidents))
+               for t, x, incidents in series]
+    groups = {}
+    for number, config in enumerate(configs):
+        groups.setdefault((config["window"], config["alpha"]), []).append((number, config))
+    tasks = [(index, window, alpha, members) for index in range(len(_series))
+             for (window, alpha), members in groups.items()]
+
+    # Workers are forked after the series are set, so they share them instead of receiving copies
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        outputs = pool.map(evaluate_group, tasks, chunksize=1)
+
+    totals = [{"config": config, "alerts": 0, "true_alerts": 0, "false_alerts": 0, "detected": 0, "missed": 0,
+               "delays": [], "alerts_per_day": 0.0} for config in configs]
+    for output in outputs:
+        for number, _, result in output:
+            total = totals[number]
+            for key in ("alerts", "true_alerts", "false_alerts", "detected", "missed", "alerts_per_day"):
+                total[key] += result[key]
+            total["delays"].append(result["delays"])
+    for total in totals:
+        delays = np.concatenate(total.pop("delays"))
+        total["median_delay"] = float(np.median(delays)) if len(delays) else math.inf
+        total["max_delay"] = float(delays.max()) if len(delays) else math.inf
+        incidents = total["detected"] + total["missed"]
+        total["recall"] = total["detected"] / incidents if incidents else 1.0
+        total["precision"] = total["true_alerts"] / total["alerts"] if total["alerts"] else 1.0
+    return totals
+
+
+def rank(results):
+    """Best first: fewest missed incidents, fewest false alerts, shortest delay, then fewest rules."""
+    return sorted(results, key=lambda r: (r["missed"], r["false_alerts"], r["median_delay"],
+                                          sum(r["config"][name] is not None for name in ("threshold", "window", "alpha"))))
+
+
+def report(results, top=10):
+    print(f"{'missed':>6} {'false':>6} {'true':>6} {'per day':>8} {'delay':>7} {'max':>7}  configuration")
+    for result in rank(results)[:top]:
+        settings = ", ".join(f"{key}={value}" for key, value in result["config"].items()
+                             if value is not None and value != DEFAULT_CONFIG[key])
+        print(f"{result['missed']:>6} {result['false_alerts']:>6} {result['true_alerts']:>6} "
+              f"{result['alerts_per_day']:>8.1f} {result['median_delay']:>6.1f}s {result['max_delay']:>6.1f}s  {settings}")
+
+
+def load_store(path, sensor_type, labels_path, drone_id=None):
+    """Series of one sensor type from a TimeSeriesStore database, with incidents from a JSON labels file."""
+    from timeseries_store import TimeSeriesStore
+    with open(labels_path) as f:
+        labels = json.load(f)     # [{"drone_id": ..., "sensor_type": ..., "start": ..., "end": ...}, ...]
+    store = TimeSeriesStore(path)
+    series = []
+    for (drone, kind, _), series_id in store.series_ids.items():
+        if kind != sensor_type or (drone_id is not None and drone != drone_id):
+            continue
+        t, x = store.range(series_id, -math.inf, math.inf)
+        incidents = [(label["start"], label["end"]) for label in labels
+                     if label.get("sensor_type", sensor_type) == sensor_type and label.get("drone_id", drone) == drone]
+        if len(t):
+            series.append((t, x, incidents))
+    store.close()
+    return series
+
+
+def simulate_month(days=30, period=0.5, incidents=12, seed=0):
+    """A month of voltage readings every 0.5 s: slow drift, noise, harmless spikes and labelled over-voltage incidents."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, days * 86400, period)
+    x = 230 + 2 * np.sin(2 * np.pi * t / 86400) + rng.normal(0, 1.0, len(t))
+    spikes = rng.integers(0, len(t), days * 20)
+    x[spikes] += rng.normal(0, 8, len(spikes))
+    labels = []
+    for start in np.sort(rng.uniform(0.02, 0.98, incidents)) * t[-1]:
+        length = rng.uniform(60, 600)
+        ramp = np.clip((t - start) / 30, 0, 1) * (t < start + length)
+        x += ramp * rng.uniform(8, 20)
+        labels.append((float(start), float(start + length)))
+    return t, x, labels
+
+
+def benchmark(processes=None):
+    """Several hundred configurations over a simulated month of 0.5 s voltage readings from two drones."""
+    series = [simulate_month(seed=seed) for seed in range(2)]
+    configs = config_grid(threshold=[None, 236.0, 238.0, 240.0, 242.0],
+                          window=[None, 10, 60], z=[3.0, 4.0, 5.0],
+                          alpha=[None, 0.05, 0.2], ewma_z=[4.0, 6.0],
+                          on_count=[1, 3, 5])
+    # z and ewma_z only matter with their window/alpha; drop the duplicates
+    configs = [dict(config, z=config["z"] if config["window"] else None,
+                    ewma_z=config["ewma_z"] if config["alpha"] else None) for config in configs]
+    configs = list({json.dumps(config, sort_keys=True): config for config in configs}.values())
+    configs = [config for config in configs if any(config[key] is not None for key in ("threshold", "window", "alpha"))]
+    readings = sum(len(t) for t, _, _ in series)
+    start = time.perf_counter()
+    results = backtest(series, configs, processes)
+    elapsed = time.perf_counter() - start
+    print(f"{len(configs)} configurations x {readings} readings on {processes or os.cpu_count()} processes "
+          f"in {elapsed:.1f} s ({len(configs) * readings / elapsed / 1e6:.0f} M reading-evaluations/s)")
+    report(results)
+
+
+if __name__ == "__main__":
+    # Usage: python backtest.py [processes]                                     benchmark on simulated data
+    #        python backtest.py DB SENSOR_TYPE LABELS.json [DRONE_ID]           replay a TimeSeriesStore
+    if len(sys.argv) > 3:
+        series = load_store(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+        defaults = {"gas": [5.0, 8.0, 10.0, 12.0], "flood": [80.0, 90.0, 100.0, 110.0],
+                    "voltage": [236.0, 238.0, 240.0, 242.0]}
+        configs = config_grid(threshold=defaults.get(sys.argv[2], [None]), window=[None, 10, 60], z=[3.0, 4.0, 5.0],
+                              on_count=[1, 3, 5])
+        report(backtest(series, configs))
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else None)
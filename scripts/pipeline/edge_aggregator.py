@@ -0,0 +1,369 @@
+import asyncio
+import collections
+import math
+import socket
+import struct
+import sys
+import time
+import numpy as np
+
+import metrics
+from anomaly_engine import AnomalyEngine, DETECTORS
+from sensor_protocol import encode_batch
+
+# Downlink messages (little endian), one per datagram:
+#   'C' channel (2) | sensor id length (1) | sensor id | sensor type length (1) | sensor type
+#   'S' window start (8) | window length (4) | count (2) | count x SUMMARY_FORMAT
+#   'A' channel (2) | detector (1) | raised (1) | timestamp (8) | value (4)
+#   'R' channel (2) | first timestamp (8) | count (2) | count x (time offset (4), value (4))
+SUMMARY_FORMAT = "<HHfffffB"    # channel, count, min, max, mean, last, last time offset, anomaly flags
+SUMMARY_SIZE = struct.calcsize(SUMMARY_FORMAT)
+ALERT_FORMAT = "<HBBdf"
+RAW_HEADER = "<Hd H".replace(" ", "")
+MAX_PAYLOAD = 1024
+METRICS_PORT = 9101  # Detection metrics of the --send process, at http://<host>:9101/metrics
+MAX_RAW_SAMPLES = (MAX_PAYLOAD - 1 - struct.calcsize(RAW_HEADER)) // 8
+MAX_SUMMARIES = (MAX_PAYLOAD - 1 - struct.calcsize("<dfH")) // SUMMARY_SIZE
+
+
+class EdgeAggregator:
+    """
+    Runs next to the sensor reader on the drone and replaces the raw stream
+    by one summary per channel and window (count, min, max, mean, last and
+    the detectors that fired). The anomaly engine runs here on every raw
+    reading: its raise/clear events are sent as they happen, together with
+    the raw samples of the channel from pre_samples before to post_samples
+    after each event.
+    """
+
+    def __init__(self, send, window=10.0, pre_samples=20, post_samples=20, engine=None):
+        self.send = send
+        self.window = window
+        self.pre_samples = pre_samples
+        self.post_samples = post_samples
+        self.engine = engine or AnomalyEngine()
+        self.announced = 0
+        self.window_index = None
+        self.history = []
+        self.capturing = []       # None, or raw samples still to send after the last event
+        self.raw = {}
+        self._reset_window(0)
+        self.bytes_sent = 0
+        self.messages_sent = 0
+
+    def _reset_window(self, channels):
+        self.count = np.zeros(channels, dtype=np.int64)
+        self.min = np.full(channels, np.inf)
+        self.max = np.full(channels, -np.inf)
+        self.sum = np.zeros(channels)
+        self.last = np.zeros(channels)
+        self.last_time = np.zeros(channels)
+        self.flags = np.zeros(channels, dtype=np.int64)
+
+    def _emit(self, message):
+        self.bytes_sent += len(message)
+        self.messages_sent += 1
+        self.send(message)
+
+    def add_channel(self, sensor_id, sensor_type):
+        channel = self.engine.add_channel(sensor_id, sensor_type)
+        while len(self.history) <= channel:
+            self.history.append(collections.deque(maxlen=self.pre_samples))
+            self.capturing.append(None)
+        if len(self.count) <= channel:
+            grow = max(channel + 1, 2 * len(self.count)) - len(self.count)
+            for name, fill in (("count", 0), ("min", np.inf), ("max", -np.inf), ("sum", 0.0), ("last", 0.0),
+                               ("last_time", 0.0), ("flags", 0)):
+                array = getattr(self, name)
+                setattr(self, name, np.r_[array, np.full(grow, fill, dtype=array.dtype)])
+        return channel
+
+    def _announce(self):
+        for channel in range(self.announced, len(self.engine.channel_ids)):
+            sensor_id = self.engine.channel_ids[channel].encode()
+            sensor_type = self.engine.channel_types[channel].encode()
+            self._emit(b'C' + struct.pack("<HB", channel, len(sensor_id)) + sensor_id +
+                       struct.pack("<B", len(sensor_type)) + sensor_type)
+        self.announced = len(self.engine.channel_ids)
+
+    def add(self, channels, values, timestamps):
+        """Aggregate a batch of readings (channels from add_channel), flushing every finished window."""
+        channels = np.asarray(channels, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(channels):
+            return
+        self._announce()
+        windows = np.floor(timestamps / self.window).astype(np.int64)
+        if self.window_index is None:
+            self.window_index = int(windows[0])
+        # Readings of a later window start a new summary; late ones count towards the current one
+        for window in np.unique(windows[windows > self.window_index]).tolist():
+            selected = windows < window
+            self._aggregate(channels[selected], values[selected], timestamps[selected])
+            channels, values, timestamps, windows = (channels[~selected], values[~selected],
+                                                     timestamps[~selected], windows[~selected])
+            self.flush(window)
+        self._aggregate(channels, values, timestamps)
+
+    def _aggregate(self, channels, values, timestamps):
+        if not len(channels):
+            return
+        events = self.engine.process(channels, values, timestamps)
+        np.add.at(self.count, channels, 1)
+        np.minimum.at(self.min, channels, values)
+        np.maximum.at(self.max, channels, values)
+        np.add.at(self.sum, channels, values)
+        order = np.lexsort((timestamps, channels))
+        last = order[np.r_[channels[order][1:] != channels[order][:-1], True]]
+        self.last[channels[last]] = values[last]
+        self.last_time[channels[last]] = timestamps[last]
+
+        changed = set()
+        for event in events:
+            channel = self.engine.index[(event["channel"], event["sensor_type"])]
+            detector = DETECTORS.index(event["detector"])
+            is_raised = event["state"] == "raised"
+            self._emit(b'A' + struct.pack(ALERT_FORMAT, channel, detector, is_raised,
+                                          event["timestamp"], event["value"]))
+            changed.add(channel)
+            if is_raised:
+                self.flags[channel] |= 1 << detector
+        active = self.engine.active[:len(self.count)]
+        self.flags[:len(active)] |= (active * (1 << np.arange(len(DETECTORS)))).sum(axis=1)
+
+        # Raw capture, decided per channel for the whole batch
+        for channel in np.unique(channels).tolist():
+            mine = channels == channel
+            samples = list(zip(timestamps[mine].tolist(), values[mine].tolist()))
+            remaining = self.capturing[channel]
+            if remaining is None and channel not in changed:
+                self.history[channel].extend(samples)
+                continue
+            pending = self.raw.setdefault(channel, [])
+            if remaining is None:
+                pending.extend(self.history[channel])
+                self.history[channel].clear()
+            pending.extend(samples)
+            if channel in changed:
+                self.capturing[channel] = self.post_samples
+            else:
+                remaining -= len(samples)
+                self.capturing[channel] = remaining if remaining > 0 else None
+
+    def flush(self, next_window=None):
+        """Send the summaries and raw captures of the current window and start the next one."""
+        if self.window_index is None:
+            return
+        start = self.window_index * self.window
+        used = np.flatnonzero(self.count)
+        for first in range(0, len(used), MAX_SUMMARIES):
+            rows = used[first:first + MAX_SUMMARIES]
+            mean = self.sum[rows] / self.count[rows]
+            body = b"".join(struct.pack(SUMMARY_FORMAT, c, min(n, 0xFFFF), lo, hi, m, last, t - start, flags)
+                            for c, n, lo, hi, m, last, t, flags in zip(
+                                rows.tolist(), self.count[rows].tolist(), self.min[rows].tolist(),
+                                self.max[rows].tolist(), mean.tolist(), self.last[rows].tolist(),
+                                self.last_time[rows].tolist(), self.flags[rows].tolist()))
+            self._emit(b'S' + struct.pack("<dfH", start, self.window, len(rows)) + body)
+        for channel, samples in self.raw.items():
+            for first in range(0, len(samples), MAX_RAW_SAMPLES):
+                chunk = np.array(samples[first:first + MAX_RAW_SAMPLES])
+                packed = np.empty((len(chunk), 2), dtype='<f4')
+                packed[:, 0] = chunk[:, 0] - chunk[0, 0]
+                packed[:, 1] = chunk[:, 1]
+                self._emit(b'R' + struct.pack(RAW_HEADER, channel, chunk[0, 0], len(chunk)) + packed.tobytes())
+        self.raw = {}
+        self._reset_window(len(self.count))
+        self.window_index = self.window_index + 1 if next_window is None else next_window
+
+    def add_readings(self, readings):
+        """Aggregate Reading tuples from the sensor ingestion service."""
+        channels = [self.add_channel(reading.sensor_id, reading.sensor_type) for reading in readings]
+        self.add(channels, [reading.value for reading in readings], [reading.timestamp for reading in readings])
+
+
+class GroundExpander:
+    """
+    Ground side of the edge aggregation: decodes the downlink messages and
+    rebuilds every channel's time series, exact where raw samples were sent
+    and one point per window (the window mean at its middle) elsewhere.
+    """
+
+    def __init__(self):
+        self.channels = {}
+        self.summaries = collections.defaultdict(list)
+        self.raw = collections.defaultdict(list)
+        self.alerts = []
+
+    def feed(self, message):
+        kind, body = message[:1], message[1:]
+        if kind == b'C':
+            channel, length = struct.unpack_from("<HB", body)
+            sensor_id = body[3:3 + length].decode()
+            type_length = body[3 + length]
+            self.channels[channel] = (sensor_id, body[4 + length:4 + length + type_length].decode())
+        elif kind == b'S':
+            start, window, count = struct.unpack_from("<dfH", body)
+            offset = struct.calcsize("<dfH")
+            for row in struct.iter_unpack(SUMMARY_FORMAT, body[offset:offset + count * SUMMARY_SIZE]):
+                channel, n, lo, hi, mean, last, last_offset, flags = row
+                self.summaries[channel].append((start, window, n, lo, hi, mean, last, start + last_offset, flags))
+        elif kind == b'A':
+            channel, detector, raised, timestamp, value = struct.unpack(ALERT_FORMAT, body)
+            sensor_id, sensor_type = self.channels.get(channel, (str(channel), ""))
+            self.alerts.append({"channel": sensor_id, "sensor_type": sensor_type, "detector": DETECTORS[detector],
+                                "state": "raised" if raised else "cleared", "value": value, "timestamp": timestamp})
+        elif kind == b'R':
+            channel, first, count = struct.unpack_from(RAW_HEADER, body)
+            samples = np.frombuffer(body, dtype='<f4', count=2 * count,
+                                    offset=struct.calcsize(RAW_HEADER)).reshape(-1, 2).astype(np.float64)
+            samples[:, 0] += first
+            self.raw[channel].append(samples)
+
+    def channel_index(self, sensor_id):
+        return next(channel for channel, (name, _) in self.channels.items() if name == sensor_id)
+
+    def windows(self, sensor_id):
+        """Summaries of a channel as an array of (start, length, count, min, max, mean, last, last time, flags)."""
+        return np.array(self.summaries[self.channel_index(sensor_id)]).reshape(-1, 9)
+
+    def series(self, sensor_id):
+        """(timestamps, values, exact) of a channel; exact marks raw samples."""
+        channel = self.channel_index(sensor_id)
+        raw = np.vstack(self.raw[channel]) if self.raw[channel] else np.empty((0, 2))
+        windows = self.windows(sensor_id)
+        start, length = windows[:, 0], windows[:, 1]
+        # Windows covered by raw samples are represented by those samples only
+        covered = np.zeros(len(windows), dtype=bool)
+        if len(raw) and len(windows):
+            index = np.searchsorted(start, raw[:, 0], side='right') - 1
+            covered[np.unique(index[index >= 0])] = True
+        t = np.r_[raw[:, 0], (start + length / 2)[~covered]]
+        v = np.r_[raw[:, 1], windows[~covered, 5]]
+        exact = np.r_[np.ones(len(raw), dtype=bool), np.zeros(int((~covered).sum()), dtype=bool)]
+        order = np.argsort(t, kind='stable')
+        return t[order], v[order], exact[order]
+
+
+def simulate_drone(duration=3600.0, rate_hz=2.0, incidents=4, seed=0):
+    """Gas, flood and voltage readings of one drone (every 0.5 s, like the hazard scripts) with a few gas leaks."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, duration, 1 / rate_hz)
+    gas = 5 + rng.normal(0, 0.3, len(t))
+    for start in rng.uniform(0.1, 0.9, incidents) * duration:
+        rise = np.clip((t - start) / 20, 0, 1) * np.clip((start + 120 - t) / 20, 0, 1)
+        gas += 15 * rise
+    flood = 60 + np.cumsum(rng.normal(0, 0.02, len(t))) + rng.normal(0, 0.5, len(t))
+    voltage = 230 + rng.normal(0, 1.0, len(t))
+    return t, {"gas-1": ("gas", gas), "flood-1": ("flood", flood), "voltage-1": ("voltage", voltage)}
+
+
+def aggregate(t, channels, window, send):
+    """Feed simulated readings through an EdgeAggregator one sample time at a time."""
+    aggregator = EdgeAggregator(send, window=window)
+    ids = [aggregator.add_channel(sensor_id, sensor_type) for sensor_id, (sensor_type, _) in channels.items()]
+    values = np.column_stack([v for _, v in channels.values()])
+    for row in range(len(t)):
+        aggregator.add(ids, values[row], np.full(len(ids), t[row]))
+    aggregator.flush()
+    return aggregator
+
+
+def benchmark(duration=3600.0, rate_hz=2.0, windows=(5.0, 10.0, 30.0)):
+    """One simulated drone-hour: bytes on the link with and without edge aggregation, and alert fidelity."""
+    t, channels = simulate_drone(duration, rate_hz)
+    readings = len(t) * len(channels)
+    # Today every reading goes down as a MAVLink NAMED_VALUE_FLOAT (30 bytes)
+    named_values = readings * 30
+    print(f"{readings} readings, raw NAMED_VALUE_FLOAT: {named_values / duration:.1f} B/s")
+    for window in windows:
+        ground = GroundExpander()
+        start = time.perf_counter()
+        aggregator = aggregate(t, channels, window, ground.feed)
+        elapsed = time.perf_counter() - start
+        per_frame = min(int(rate_hz * window), 255)
+        frames = sum(len(encode_batch(sensor_type, 0, 0, int(1000 / rate_hz), v[i:i + per_frame]))
+                     for sensor_type, v in channels.values() for i in range(0, len(v), per_frame))
+        print(f"Window {window:.0f} s: {aggregator.bytes_sent / duration:.1f} B/s "
+              f"({named_values / aggregator.bytes_sent:.1f}x less than NAMED_VALUE_FLOAT, "
+              f"{frames / aggregator.bytes_sent:.1f}x less than raw sensor frames), "
+              f"{aggregator.messages_sent} messages, {elapsed * 1e6 / readings:.0f} us per reading")
+
+    # Alert fidelity: the ground must see exactly what a detector on the raw stream would raise
+    reference = AnomalyEngine()
+    ref_ids = [reference.add_channel(sensor_id, sensor_type) for sensor_id, (sensor_type, _) in channels.items()]
+    values = np.column_stack([v for _, v in channels.values()])
+    expected = []
+    for row in range(len(t)):
+        expected += reference.process(ref_ids, values[row], np.full(len(ref_ids), t[row]))
+    key = [(e["channel"], e["detector"], e["state"], e["timestamp"]) for e in expected]
+    received = [(a["channel"], a["detector"], a["state"], a["timestamp"]) for a in ground.alerts]
+    print(f"Alerts: {len(received)} received, {len(key)} expected, {'match' if received == key else 'DIFFER'}")
+
+    series_t, series_v, exact = ground.series("gas-1")
+    error = np.abs(np.interp(t, series_t, series_v) - channels["gas-1"][1])
+    print(f"gas-1 rebuilt from {window:.0f} s windows, {len(series_t)} points ({int(exact.sum())} raw): "
+          f"mean error {error.mean():.2f} ppm, max error {error.max():.2f} ppm")
+
+
+async def run(specs, address, window):
+    """Aggregate live sensor ports and send the downlink messages to a ground station over UDP."""
+    from sensor_ingestion import SensorIngestion
+    host, _, port = address.rpartition(':')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = (host or "127.0.0.1", int(port))
+    aggregator = EdgeAggregator(lambda message: sock.sendto(message, target), window=window)
+    ingestion = SensorIngestion()
+    for spec in specs:
+        sensor_type, _, device = spec.partition('=')
+        device, _, baudrate = device.partition(':')
+        ingestion.add_port(device, sensor_type, int(baudrate or 9600))
+    subscription = ingestion.subscribe()
+    ingestion.start()
+    metrics.serve(METRICS_PORT)
+    try:
+        while True:
+            try:
+                reading = await asyncio.wait_for(subscription.get(), timeout=window)
+            except asyncio.TimeoutError:
+                # Silent sensors still close their windows on time
+                aggregator.flush(math.floor(time.time() / window))
+                continue
+            batch = [reading]
+            while not subscription.queue.empty():
+                batch.append(subscription.queue.get_nowait())
+            aggregator.add_readings(batch)
+    finally:
+        ingestion.stop()
+
+
+def listen(port):
+    """Ground station: print decoded summaries and alerts."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("0.0.0.0", port))
+    ground = GroundExpander()
+    while True:
+        message, _ = sock.recvfrom(65536)
+        alerts = len(ground.alerts)
+        ground.feed(message)
+        if message[:1] == b'S':
+            start, _, count = struct.unpack_from("<dfH", message, 1)
+            print(f"{time.strftime('%H:%M:%S', time.localtime(start))}: {count} channel summaries")
+        for alert in ground.alerts[alerts:]:
+            print(f"ALERT {alert['state']}: {alert['channel']} {alert['detector']} = {alert['value']:.2f}")
+
+
+if __name__ == "__main__":
+    # Usage: python edge_aggregator.py                                  benchmark on a simulated drone-hour
+    #        python edge_aggregator.py --send HOST:PORT gas=/dev/ttyUSB0 [flood=/dev/ttyUSB1 ...]
+    #        python edge_aggregator.py --listen PORT
+    if len(sys.argv) > 2 and sys.argv[1] == "--send":
+        try:
+            asyncio.run(run(sys.argv[3:] or ["gas=/dev/ttyUSB0"], sys.argv[2], window=10.0))
+        except KeyboardInterrupt:
+            print("\nExiting edge aggregation.")
+    elif len(sys.argv) > 2 and sys.argv[1] == "--listen":
+        listen(int(sys.argv[2]))
+    else:
+        benchmark()
@@ -0,0 +1,220 @@
+import math
+import struct
+import time
+import zlib
+import numpy as np
+
+TILE_SIZE = 256
+MAX_EXPONENT = 30.0     # Rebase the decay weights before exp() gets this large
+
+
+class GasHeatmap:
+    """
+    Gas concentration field over a survey area, estimated by Gaussian-kernel
+    smoothing of geo-tagged readings.
+
+    Every reading adds its kernel weight w and w * value to the cells within
+    three sigmas, so an update costs O(batch * stencil). The estimate of a
+    cell is sum(w * value) / sum(w). Time decay is applied by weighting new
+    readings by exp(t / tau) instead of shrinking the whole map; the ratio
+    is unaffected and the absolute weight tells how fresh a cell is.
+
+    Tiles of TILE_SIZE cells are served from a pyramid where zoom level z
+    aggregates 2^z x 2^z cells. Pyramid tiles are cached and only the
+    tiles above the cells touched by an update are rebuilt.
+    """
+
+    def __init__(self, bounds, resolution=5.0, sigma=10.0, half_life=600.0, min_weight=0.05):
+        self.x0, self.y0, x1, y1 = bounds
+        self.resolution = resolution
+        self.width = math.ceil((x1 - self.x0) / resolution)
+        self.height = math.ceil((y1 - self.y0) / resolution)
+        self.tiles_x = math.ceil(self.width / TILE_SIZE)
+        self.tiles_y = math.ceil(self.height / TILE_SIZE)
+        self.levels = max(1, math.ceil(math.log2(max(self.tiles_x, self.tiles_y)))) + 1
+        self.tau = half_life / math.log(2)
+        self.min_weight = min_weight
+
+        # Padded to whole tiles so every tile is a plain slice
+        shape = (self.tiles_y * TILE_SIZE, self.tiles_x * TILE_SIZE)
+        self.weight = np.zeros(shape)
+        self.weighted_sum = np.zeros(shape)
+        self.reference_time = None
+
+        radius = math.ceil(3 * sigma / resolution)
+        dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        self.stencil_dx = dx.ravel()
+        self.stencil_dy = dy.ravel()
+        self.sigma = sigma
+
+        self.cache = {}
+        self.readings = 0
+
+    def update(self, x, y, values, timestamps):
+        """Add a batch of readings at local coordinates (metres)."""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), values.shape)
+        keep = ~(np.isnan(x) | np.isnan(y) | np.isnan(values))
+        x, y, values, timestamps = x[keep], y[keep], values[keep], timestamps[keep]
+        if not len(values):
+            return
+        if self.reference_time is None:
+            self.reference_time = float(timestamps.min())
+        if (timestamps.max() - self.reference_time) / self.tau > MAX_EXPONENT:
+            self._rebase(float(timestamps.max()))
+
+        column = (x - self.x0) / self.resolution
+        row = (y - self.y0) / self.resolution
+        cell_x = np.floor(column).astype(np.int64)[:, None] + self.stencil_dx
+        cell_y = np.floor(row).astype(np.int64)[:, None] + self.stencil_dy
+
+        # Exact kernel from each reading to the centres of its stencil cells
+        dx = (cell_x + 0.5 - column[:, None]) * self.resolution
+        dy = (cell_y + 0.5 - row[:, None]) * self.resolution
+        age = np.exp((timestamps - self.reference_time) / self.tau)
+        weights = np.exp(-(dx * dx + dy * dy) / (2 * self.sigma ** 2)) * age[:, None]
+
+        inside = (cell_x >= 0) & (cell_x < self.width) & (cell_y >= 0) & (cell_y < self.height)
+        flat = (cell_y * self.weight.shape[1] + cell_x)[inside]
+        weights_inside = weights[inside]
+        self._accumulate(self.weight, flat, weights_inside)
+        self._accumulate(self.weighted_sum, flat, weights_inside * np.broadcast_to(values[:, None], inside.shape)[inside])
+        self.readings += len(values)
+
+        # A stencil spans at most two tiles per axis: its corners find every touched tile
+        corner_x = np.clip(cell_x[:, [0, -1]], 0, self.width - 1) // TILE_SIZE
+        corner_y = np.clip(cell_y[:, [0, -1]], 0, self.height - 1) // TILE_SIZE
+        touched = np.unique((corner_y[:, :, None] * self.tiles_x + corner_x[:, None, :]).ravel())
+        self._invalidate(zip((touched % self.tiles_x).tolist(), (touched // self.tiles_x).tolist()))
+
+    @staticmethod
+    def _accumulate(target, flat, weights):
+        """target.flat[flat] += weights, with repeated indices summed."""
+        if len(flat) > target.size // 8:
+            target += np.bincount(flat, weights, minlength=target.size).reshape(target.shape)
+        else:
+            np.add.at(target.reshape(-1), flat, weights)
+
+    def _rebase(self, timestamp):
+        """Move the decay reference forward, scaling all weights down."""
+        scale = math.exp(-(timestamp - self.reference_time) / self.tau)
+        self.weight *= scale
+        self.weighted_sum *= scale
+        self.reference_time = timestamp
+        self.cache.clear()
+
+    def _invalidate(self, tiles):
+        tiles = list(tiles)
+        for level in range(1, self.levels):
+            for tile_x, tile_y in {(tx >> level, ty >> level) for tx, ty in tiles}:
+                self.cache.pop((level, tile_x, tile_y), None)
+
+    def has_tile(self, level, tile_x, tile_y):
+        """True if the pyramid has this tile, i.e. it covers some of the survey area."""
+        return (0 <= level < self.levels and 0 <= tile_x and 0 <= tile_y and
+                tile_x << level < self.tiles_x and tile_y << level < self.tiles_y)
+
+    def _tile_sums(self, level, tile_x, tile_y):
+        """(weight, weighted_sum) of one pyramid tile, built from its four children."""
+        # Children outside the survey area are skipped, never descended into
+        if tile_x << level >= self.tiles_x or tile_y << level >= self.tiles_y:
+            return None
+        if level == 0:
+            rows = slice(tile_y * TILE_SIZE, (tile_y + 1) * TILE_SIZE)
+            columns = slice(tile_x * TILE_SIZE, (tile_x + 1) * TILE_SIZE)
+            return self.weight[rows, columns], self.weighted_sum[rows, columns]
+        key = (level, tile_x, tile_y)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        weight = np.zeros((2 * TILE_SIZE, 2 * TILE_SIZE))
+        weighted_sum = np.zeros((2 * TILE_SIZE, 2 * TILE_SIZE))
+        for j in range(2):
+            for i in range(2):
+                child = self._tile_sums(level - 1, 2 * tile_x + i, 2 * tile_y + j)
+                if child is not None:
+                    weight[j * TILE_SIZE:(j + 1) * TILE_SIZE, i * TILE_SIZE:(i + 1) * TILE_SIZE] = child[0]
+                    weighted_sum[j * TILE_SIZE:(j + 1) * TILE_SIZE, i * TILE_SIZE:(i + 1) * TILE_SIZE] = child[1]
+        sums = (weight.reshape(TILE_SIZE, 2, TILE_SIZE, 2).sum(axis=(1, 3)),
+                weighted_sum.reshape(TILE_SIZE, 2, TILE_SIZE, 2).sum(axis=(1, 3)))
+        self.cache[key] = sums
+        return sums
+
+    def tile(self, level, tile_x, tile_y, now=None):
+        """
+        Concentration estimate of a tile (TILE_SIZE x TILE_SIZE, rows south
+        to north); NaN where readings are missing or have decayed away, and
+        everywhere for a tile the pyramid does not have.
+        """
+        sums = self._tile_sums(level, tile_x, tile_y) if self.has_tile(level, tile_x, tile_y) else None
+        if sums is None or self.reference_time is None:
+            return np.full((TILE_SIZE, TILE_SIZE), np.nan)
+        weight, weighted_sum = sums
+        now = time.time() if now is None else now
+        freshness = math.exp(-(now - self.reference_time) / self.tau) / 4 ** level
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weight * freshness >= self.min_weight, weighted_sum / weight, np.nan)
+
+    def estimate(self, now=None):
+        """Full-resolution concentration map."""
+        tiles = [[self.tile(0, tx, ty, now) for tx in range(self.tiles_x)] for ty in range(self.tiles_y)]
+        return np.block(tiles)[:self.height, :self.width]
+
+
+def colorize(estimate, low=0.0, high=50.0):
+    """RGBA image of an estimate: transparent where unknown, green to red with concentration."""
+    level = np.clip((estimate - low) / (high - low), 0.0, 1.0)
+    image = np.zeros(estimate.shape + (4,), dtype=np.uint8)
+    image[..., 0] = np.nan_to_num(255 * np.minimum(1.0, 2 * level)).astype(np.uint8)
+    image[..., 1] = np.nan_to_num(255 * np.minimum(1.0, 2 - 2 * level)).astype(np.uint8)
+    image[..., 3] = np.where(np.isnan(estimate), 0, 180).astype(np.uint8)
+    return image[::-1]
+
+
+def encode_png(image):
+    """Minimal RGBA PNG encoder."""
+    height, width, _ = image.shape
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)]).tobytes()
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def benchmark(area=5000.0, batches=200, batch_size=500):
+    """Stream readings from drones crossing a plume and time updates and tile renders."""
+    rng = np.random.default_rng(0)
+    heatmap = GasHeatmap((0.0, 0.0, area, area), resolution=5.0, sigma=10.0)
+    positions = rng.uniform(0, area, (20, 2))
+    update_time = 0.0
+    for batch in range(batches):
+        positions = (positions + rng.normal(0, 15, positions.shape)) % area
+        points = np.repeat(positions, batch_size // 20, axis=0) + rng.normal(0, 5, (batch_size, 2))
+        distance = np.hypot(points[:, 0] - 2000, points[:, 1] - 3000)
+        values = 5 + 100 * np.exp(-distance / 300) + rng.normal(0, 1, batch_size)
+        start = time.perf_counter()
+        heatmap.update(points[:, 0], points[:, 1], values, float(batch))
+        update_time += time.perf_counter() - start
+
+    print(f"{heatmap.width} x {heatmap.height} cells, {heatmap.levels} zoom levels")
+    print(f"update: {update_time / batches * 1000:.2f} ms per batch of {batch_size}")
+    top = heatmap.levels - 1
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        tile = heatmap.tile(top, 0, 0, now=float(batches))
+        print(f"top-level tile ({label}): {(time.perf_counter() - start) * 1000:.2f} ms")
+    heatmap.update([2000.0], [3000.0], [100.0], float(batches))
+    start = time.perf_counter()
+    heatmap.tile(top, 0, 0, now=float(batches))
+    print(f"top-level tile after one update: {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(f"known cells at top level: {np.count_nonzero(~np.isnan(tile))}")
+
+
+if __name__ == "__main__":
+    # Usage: python gas_heatmap.py
+    benchmark()
@@ -0,0 +1,296 @@
+import math
+import sys
+import time
+import numpy as np
+
+EARTH_RADIUS = 6371000.0
+
+# Columns of the per-cell sample blocks
+X, Y, VALUE, TIME, DRONE = range(5)
+COLUMNS = 5
+
+
+class PositionTrack:
+    """
+    Recent position fixes of every drone, used to place readings where they
+    were sampled. Positions are kept in local metres east/north of origin.
+    A reading more than max_gap seconds from the nearest fix (before the
+    first fix, after the last one, or in a gap of the track) is unlocated.
+    """
+
+    def __init__(self, origin, history=600, max_gap=2.0):
+        self.origin_lat, self.origin_lon = origin
+        self.history = history
+        self.max_gap = max_gap
+        self.cos_lat = math.cos(math.radians(self.origin_lat))
+        self.fixes = {}
+        self.counts = {}
+
+    def to_local(self, lat, lon):
+        x = np.radians(np.asarray(lon) - self.origin_lon) * EARTH_RADIUS * self.cos_lat
+        y = np.radians(np.asarray(lat) - self.origin_lat) * EARTH_RADIUS
+        return x, y
+
+    def to_geo(self, x, y):
+        lat = self.origin_lat + np.degrees(np.asarray(y) / EARTH_RADIUS)
+        lon = self.origin_lon + np.degrees(np.asarray(x) / (EARTH_RADIUS * self.cos_lat))
+        return lat, lon
+
+    def add_fix(self, drone_id, timestamp, lat, lon, alt=0.0):
+        fixes = self.fixes.get(drone_id)
+        if fixes is None:
+            fixes = self.fixes[drone_id] = np.empty((2 * self.history, 4))
+            self.counts[drone_id] = 0
+        count = self.counts[drone_id]
+        if count == len(fixes):
+            fixes[:self.history] = fixes[-self.history:]
+            count = self.history
+        x, y = self.to_local(lat, lon)
+        fixes[count] = (timestamp, x, y, alt)
+        self.counts[drone_id] = count + 1
+
+    def position_at(self, drone_id, timestamps):
+        """Interpolated (x, y) of a drone at the given times; NaN where no fix is close enough in time."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not self.counts.get(drone_id):
+            return np.full(timestamps.shape, np.nan), np.full(timestamps.shape, np.nan)
+        track = self.fixes[drone_id][:self.counts[drone_id]]
+        times = track[:, 0]
+        # np.interp holds the end positions past the track, so bound the
+        # time to the nearest fix instead of trusting a stale position
+        after = np.minimum(np.searchsorted(times, timestamps), len(times) - 1)
+        before = np.maximum(after - 1, 0)
+        gap = np.minimum(np.abs(timestamps - times[after]), np.abs(timestamps - times[before]))
+        unlocated = gap > self.max_gap
+        x = np.where(unlocated, np.nan, np.interp(timestamps, times, track[:, 1]))
+        y = np.where(unlocated, np.nan, np.interp(timestamps, times, track[:, 2]))
+        return x, y
+
+
+def follow_vehicle(track, vehicle, drone_id):
+    """Record every position update of a dronekit vehicle in track."""
+    def on_location(_, __, location):
+        if location.lat is not None and location.lon is not None:
+            track.add_fix(drone_id, time.time(), location.lat, location.lon, location.alt or 0.0)
+
+    vehicle.add_attribute_listener('location.global_relative_frame', on_location)
+
+
+class Cell:
+    __slots__ = ("data", "count")
+
+    def __init__(self):
+        self.data = np.empty((16, COLUMNS))
+        self.count = 0
+
+    def append(self, rows):
+        needed = self.count + len(rows)
+        if needed > len(self.data):
+            grown = np.empty((max(needed, 2 * len(self.data)), COLUMNS))
+            grown[:self.count] = self.data[:self.count]
+            self.data = grown
+        self.data[self.count:needed] = rows
+        self.count = needed
+
+    def rows(self):
+        return self.data[:self.count]
+
+
+class SpatialGrid:
+    """
+    Uniform grid over local metres. Each cell keeps its samples in a
+    growable NumPy block plus running count/sum/max, so inserts touch only
+    the cells of the batch and every query reads only the cells it overlaps.
+    """
+
+    def __init__(self, cell_size=10.0):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.keys = []
+        self.ids = {}
+        self.stat_count = np.zeros(1024, dtype=np.int64)
+        self.stat_sum = np.zeros(1024)
+        self.stat_max = np.full(1024, -np.inf)
+        self.size = 0
+
+    def _cell_id(self, key):
+        cell_id = self.ids.get(key)
+        if cell_id is None:
+            cell_id = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.cells[key] = Cell()
+            if cell_id >= len(self.stat_count):
+                grow = len(self.stat_count)
+                self.stat_count = np.r_[self.stat_count, np.zeros(grow, dtype=np.int64)]
+                self.stat_sum = np.r_[self.stat_sum, np.zeros(grow)]
+                self.stat_max = np.r_[self.stat_max, np.full(grow, -np.inf)]
+        return cell_id
+
+    def insert(self, x, y, values, timestamps, drones=0):
+        """Add a batch of samples (arrays of equal length; drones are numeric ids)."""
+        rows = np.column_stack(np.broadcast_arrays(
+            np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+            np.asarray(values, dtype=np.float64), np.asarray(timestamps, dtype=np.float64),
+            np.asarray(drones, dtype=np.float64)))
+        rows = rows[~np.isnan(rows[:, X]) & ~np.isnan(rows[:, Y])]
+        if not len(rows):
+            return
+        cx = np.floor(rows[:, X] / self.cell_size).astype(np.int64)
+        cy = np.floor(rows[:, Y] / self.cell_size).astype(np.int64)
+        keys, inverse = np.unique(np.column_stack((cx, cy)), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        sorted_rows = rows[order]
+        bounds = np.r_[0, np.cumsum(np.bincount(inverse, minlength=len(keys)))].tolist()
+
+        cell_ids = np.array([self._cell_id(key) for key in map(tuple, keys.tolist())])
+        for group, key in enumerate(map(tuple, keys.tolist())):
+            self.cells[key].append(sorted_rows[bounds[group]:bounds[group + 1]])
+        ids = cell_ids[inverse]
+        np.add.at(self.stat_count, ids, 1)
+        np.add.at(self.stat_sum, ids, rows[:, VALUE])
+        np.maximum.at(self.stat_max, ids, rows[:, VALUE])
+        self.size += len(rows)
+
+    def _gather(self, x0, y0, x1, y1):
+        """Samples of every cell overlapping the box."""
+        blocks = []
+        for cx in range(math.floor(x0 / self.cell_size), math.floor(x1 / self.cell_size) + 1):
+            for cy in range(math.floor(y0 / self.cell_size), math.floor(y1 / self.cell_size) + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    blocks.append(cell.rows())
+        if not blocks:
+            return np.empty((0, COLUMNS))
+        return blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+
+    def bbox(self, x0, y0, x1, y1):
+        rows = self._gather(x0, y0, x1, y1)
+        inside = (rows[:, X] >= x0) & (rows[:, X] <= x1) & (rows[:, Y] >= y0) & (rows[:, Y] <= y1)
+        return rows[inside]
+
+    def radius(self, x, y, r):
+        rows = self._gather(x - r, y - r, x + r, y + r)
+        inside = (rows[:, X] - x) ** 2 + (rows[:, Y] - y) ** 2 <= r * r
+        return rows[inside]
+
+    def nearest(self, x, y, k=10):
+        """The k samples closest to (x, y), nearest first, searching rings of cells outward."""
+        if self.size == 0:
+            return np.empty((0, COLUMNS))
+        k = min(k, self.size)
+        cx, cy = math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+        blocks = []
+        found = 0
+        ring = 0
+        while True:
+            if ring == 0:
+                perimeter = [(cx, cy)]
+            else:
+                perimeter = [(kx, ky) for kx in range(cx - ring, cx + ring + 1) for ky in (cy - ring, cy + ring)]
+                perimeter += [(kx, ky) for kx in (cx - ring, cx + ring) for ky in range(cy - ring + 1, cy + ring)]
+            for key in perimeter:
+                cell = self.cells.get(key)
+                if cell is not None:
+                    blocks.append(cell.rows())
+                    found += cell.count
+            # Everything within ring * cell_size of the query point has been seen
+            if found >= k:
+                rows = np.concatenate(blocks)
+                distances = np.hypot(rows[:, X] - x, rows[:, Y] - y)
+                nearest = np.argpartition(distances, k - 1)[:k]
+                if distances[nearest].max() <= ring * self.cell_size:
+                    return rows[nearest[np.argsort(distances[nearest])]]
+            ring += 1
+
+    def hottest(self, n=10, by="max", min_count=1):
+        """Top n cells as (x, y of the cell centre, count, mean, max), hottest first."""
+        cells = len(self.keys)
+        count = self.stat_count[:cells]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = self.stat_max[:cells] if by == "max" else self.stat_sum[:cells] / count
+        score = np.where(count >= min_count, score, -np.inf)
+        n = min(n, cells)
+        if n == 0:
+            return []
+        top = np.argpartition(-score, n - 1)[:n]
+        top = top[np.argsort(-score[top])]
+        return [((self.keys[i][0] + 0.5) * self.cell_size, (self.keys[i][1] + 0.5) * self.cell_size,
+                 int(count[i]), float(self.stat_sum[i] / count[i]), float(self.stat_max[i]))
+                for i in top.tolist() if count[i] >= min_count]
+
+
+class GeoReadings:
+    """
+    Readings of every sensor type, placed at the drone position at sample
+    time. Readings without a position close enough in time are not indexed;
+    unlocated counts them.
+    """
+
+    def __init__(self, origin, cell_size=10.0, max_fix_gap=2.0):
+        self.track = PositionTrack(origin, max_gap=max_fix_gap)
+        self.cell_size = cell_size
+        self.grids = {}
+        self.drone_ids = {}
+        self.unlocated = 0
+
+    def grid(self, sensor_type):
+        grid = self.grids.get(sensor_type)
+        if grid is None:
+            grid = self.grids[sensor_type] = SpatialGrid(self.cell_size)
+        return grid
+
+    def add(self, drone_id, sensor_type, values, timestamps):
+        """Geo-tag a batch of one drone's readings of one sensor type and index them."""
+        x, y = self.track.position_at(drone_id, timestamps)
+        self.unlocated += int(np.count_nonzero(np.isnan(x)))
+        drone = self.drone_ids.setdefault(drone_id, len(self.drone_ids))
+        self.grid(sensor_type).insert(x, y, values, timestamps, drone)
+
+    def add_readings(self, readings, drone_id):
+        """Index Reading tuples from the sensor ingestion service."""
+        by_type = {}
+        for reading in readings:
+            by_type.setdefault(reading.sensor_type, []).append((reading.value, reading.timestamp))
+        for sensor_type, samples in by_type.items():
+            values, timestamps = zip(*samples)
+            self.add(drone_id, sensor_type, values, timestamps)
+
+
+def benchmark(readings=2_000_000, area=2000.0, drones=20):
+    """Index readings from drones flying random walks and time the queries."""
+    rng = np.random.default_rng(0)
+    # One reading per time unit and a fix every 10, the last one up to 9 units old
+    geo = GeoReadings(origin=(45.815, 15.982), cell_size=10.0, max_fix_gap=10.0)
+    duration = readings // drones
+    start = time.perf_counter()
+    for drone in range(drones):
+        steps = rng.normal(0, 10.0, (duration, 2)).cumsum(axis=0) + rng.uniform(0, area, 2)
+        lat, lon = geo.track.to_geo(steps[:, 0] % area, steps[:, 1] % area)
+        distance = np.hypot(steps[:, 0] % area - 1200, steps[:, 1] % area - 800)
+        values = 5 + 100 * np.exp(-distance / 50) + rng.normal(0, 1, duration)
+        timestamps = np.arange(duration, dtype=np.float64)
+        for batch in range(0, duration, 1000):
+            # Fixes arrive alongside the readings, as they would in flight
+            for t in range(batch, min(batch + 1000, duration), 10):
+                geo.track.add_fix(f"drone-{drone}", float(t), lat[t], lon[t])
+            geo.add(f"drone-{drone}", "gas", values[batch:batch + 1000], timestamps[batch:batch + 1000])
+    grid = geo.grid("gas")
+    print(f"Indexed {grid.size} readings in {len(grid.keys)} cells in {time.perf_counter() - start:.1f} s"
+          f" ({geo.unlocated} unlocated)")
+
+    for label, query in (("radius 20 m", lambda: grid.radius(1000.0, 1000.0, 20.0)),
+                         ("bbox 50 x 50 m", lambda: grid.bbox(500.0, 500.0, 550.0, 550.0)),
+                         ("10 nearest", lambda: grid.nearest(1500.0, 300.0, 10)),
+                         ("top 10 hottest cells", lambda: grid.hottest(10))):
+        repeats = 200
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = query()
+        print(f"{label}: {(time.perf_counter() - start) / repeats * 1000:.3f} ms ({len(result)} results)")
+    print("Hottest cell:", grid.hottest(1)[0])
+
+
+if __name__ == "__main__":
+    # Usage: python geo_index.py [readings]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
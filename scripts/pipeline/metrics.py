@@ -0,0 +1,183 @@
+import bisect
+import collections
+import threading
+import time
+
+# Latency buckets in seconds, shared by the pipeline histograms
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """
+    Monotonic counter. Every thread increments its own cell, so inc() takes
+    no lock; a scrape sums the cells.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.cells = collections.defaultdict(int)
+
+    def inc(self, amount=1):
+        self.cells[threading.get_ident()] += amount
+
+    def value(self):
+        return sum(list(self.cells.values()))
+
+    def samples(self):
+        yield self.name, self.labels, self.value()
+
+
+class Gauge:
+    """Current value, either set directly or read from a function at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), function=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.function = function
+        self.current = 0.0
+
+    def set(self, value):
+        self.current = value
+
+    def samples(self):
+        yield self.name, self.labels, self.function() if self.function else self.current
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() bumps one bucket and the running sum
+    in the calling thread's own cell; cumulative bucket counts are built
+    only when scraped.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.bounds = tuple(sorted(buckets))
+        self.cells = {}
+
+    def observe(self, value):
+        cell = self.cells.get(threading.get_ident())
+        if cell is None:
+            cell = self.cells[threading.get_ident()] = [0] * (len(self.bounds) + 1) + [0.0]
+        cell[bisect.bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def samples(self):
+        totals = [0] * (len(self.bounds) + 2)
+        for cell in list(self.cells.values()):
+            for i, count in enumerate(cell):
+                totals[i] += count
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), totals[:-1]):
+            cumulative += count
+            yield self.name + "_bucket", self.labels + (("le", format_value(bound)),), cumulative
+        yield self.name + "_sum", self.labels, totals[-1]
+        yield self.name + "_count", self.labels, cumulative
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    Named metrics of this process. render() produces the Prometheus text
+    format and is cached for min_interval seconds, so frequent scrapes
+    cost nothing to the code updating the metrics.
+    """
+
+    def __init__(self, min_interval=1.0):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.min_interval = min_interval
+        self.rendered = ""
+        self.rendered_at = 0.0
+
+    def _get(self, cls, name, help_text, labels, **options):
+        labels = tuple(sorted(labels.items()))
+        key = (name, labels)
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.setdefault(key, cls(name, help_text, labels, **options))
+        return metric
+
+    def counter(self, name, help_text, **labels):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, function=None, **labels):
+        return self._get(Gauge, name, help_text, labels, function=function)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        now = time.monotonic()
+        if now - self.rendered_at < self.min_interval:
+            return self.rendered
+
+        lines = []
+        described = set()
+        for (name, _), metric in sorted(list(self.metrics.items()), key=lambda item: item[0]):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f"{sample_name}{{{label_text}}} {format_value(value)}" if label_text
+                             else f"{sample_name} {format_value(value)}")
+        self.rendered = "\n".join(lines) + "\n"
+        self.rendered_at = now
+        return self.rendered
+
+
+def serve(port, host="0.0.0.0", registry=None):
+    """
+    Serve the registry at http://host:port/metrics from a background thread.
+    Metrics are per process: every process that updates them (ingestion,
+    detection, alerting, the dashboard) exposes its own endpoint and
+    Prometheus scrapes each one.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+render = REGISTRY.render
@@ -0,0 +1,306 @@
+import math
+import sys
+import time
+import numpy as np
+
+MAX_GRID_READINGS = 1000    # Readings used by the coarse grid search; the refinement uses all
+MAX_TEMPERING_STAGES = 20   # Resampling stages per particle filter update at most
+MOVE_STEPS = 2              # Metropolis-Hastings moves after an update that resampled
+
+
+def plume(x, y, source_x, source_y, strength, length, background):
+    """
+    Time-averaged concentration around a continuous point source, modelled
+    as isotropic Gaussian diffusion: background + strength * exp(-d^2 / 2 length^2).
+    """
+    d2 = (x - source_x) ** 2 + (y - source_y) ** 2
+    return background + strength * np.exp(-d2 / (2 * length ** 2))
+
+
+def _linear_fit(basis, values):
+    """
+    Least-squares strength and background for many candidate bases at once.
+    basis has shape (candidates, readings); returns strength, background, residual sum of squares.
+    """
+    n = basis.shape[1]
+    sum_b = basis.sum(axis=1)
+    sum_bb = (basis * basis).sum(axis=1)
+    sum_bv = basis @ values
+    sum_v = values.sum()
+    det = n * sum_bb - sum_b * sum_b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strength = np.where(det > 1e-12, (n * sum_bv - sum_b * sum_v) / det, 0.0)
+    strength = np.maximum(strength, 0.0)
+    background = (sum_v - strength * sum_b) / n
+    residual = ((values - background[:, None] - strength[:, None] * basis) ** 2).sum(axis=1)
+    return strength, background, residual
+
+
+def confidence_ellipse(covariance, confidence=0.95):
+    """Semi-axes (metres) and orientation (degrees from east) of a 2-D confidence region."""
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    eigenvalues = np.maximum(eigenvalues, 0.0)
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be between 0 and 1")
+    # Chi-square quantile with 2 degrees of freedom
+    scale = -2.0 * math.log(1.0 - confidence)
+    major, minor = np.sqrt(scale * eigenvalues[::-1])
+    angle = math.degrees(math.atan2(eigenvectors[1, 1], eigenvectors[0, 1]))
+    return {"major": float(major), "minor": float(minor), "angle": angle % 180.0, "confidence": confidence}
+
+
+def locate_source(x, y, values, lengths=(10.0, 25.0, 50.0, 100.0, 200.0), grid=32, margin=0.25,
+                  iterations=20, confidence=0.95):
+    """
+    Estimate the source position and strength from geo-tagged readings
+    (local metres). A coarse grid search over candidate sources and plume
+    widths is evaluated in one vectorized pass, with strength and background
+    solved in closed form for each candidate; the best one is refined by
+    Gauss-Newton on all five parameters. The position covariance gives the
+    confidence ellipse.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 6:
+        raise ValueError("at least 6 readings are needed to locate a source")
+
+    # Coarse grid over the surveyed area (plus a margin: the source may be outside it)
+    span_x, span_y = np.ptp(x) or 1.0, np.ptp(y) or 1.0
+    grid_x = np.linspace(x.min() - margin * span_x, x.max() + margin * span_x, grid)
+    grid_y = np.linspace(y.min() - margin * span_y, y.max() + margin * span_y, grid)
+    sample = np.arange(len(values))
+    if len(values) > MAX_GRID_READINGS:
+        # Keep the strongest readings, which carry most of the information, plus a random spread
+        strongest = np.argpartition(-values, MAX_GRID_READINGS // 2)[:MAX_GRID_READINGS // 2]
+        others = np.random.default_rng(0).choice(len(values), MAX_GRID_READINGS // 2, replace=False)
+        sample = np.unique(np.r_[strongest, others])
+    sx, sy, sv = x[sample], y[sample], values[sample]
+
+    candidate_x, candidate_y = (axis.ravel() for axis in np.meshgrid(grid_x, grid_y))
+    d2 = (candidate_x[:, None] - sx) ** 2 + (candidate_y[:, None] - sy) ** 2
+    best = None
+    for length in lengths:
+        strength, background, residual = _linear_fit(np.exp(-d2 / (2 * length ** 2)), sv)
+        i = int(np.argmin(residual))
+        if best is None or residual[i] < best[0]:
+            best = (residual[i], candidate_x[i], candidate_y[i], strength[i], length, background[i])
+    params = np.array(best[1:], dtype=np.float64)
+
+    # Gauss-Newton with Levenberg damping on (source_x, source_y, strength, length, background)
+    damping = 1e-3
+    cost = ((plume(x, y, *params) - values) ** 2).sum()
+    for _ in range(iterations):
+        jacobian, residual = _jacobian(x, y, values, params)
+        normal = jacobian.T @ jacobian
+        step = np.linalg.solve(normal + damping * np.diag(np.diag(normal) + 1e-9), -jacobian.T @ residual)
+        candidate = params + step
+        candidate[3] = max(candidate[3], 1e-3)
+        candidate_cost = ((plume(x, y, *candidate) - values) ** 2).sum()
+        if candidate_cost < cost:
+            converged = cost - candidate_cost < 1e-9 * cost
+            params, cost, damping = candidate, candidate_cost, damping / 10
+            if converged:
+                break
+        else:
+            damping *= 10
+
+    jacobian, residual = _jacobian(x, y, values, params)
+    noise = cost / max(len(values) - 5, 1)
+    covariance = np.linalg.pinv(jacobian.T @ jacobian) * noise
+    return {
+        "x": float(params[0]), "y": float(params[1]), "strength": float(params[2]),
+        "length": float(params[3]), "background": float(params[4]),
+        "rms": math.sqrt(cost / len(values)),
+        "covariance": covariance[:2, :2],
+        "strength_std": float(math.sqrt(max(covariance[2, 2], 0.0))),
+        "ellipse": confidence_ellipse(covariance[:2, :2], confidence),
+    }
+
+
+def _jacobian(x, y, values, params):
+    source_x, source_y, strength, length, background = params
+    dx, dy = x - source_x, y - source_y
+    d2 = dx * dx + dy * dy
+    kernel = np.exp(-d2 / (2 * length ** 2))
+    residual = background + strength * kernel - values
+    jacobian = np.column_stack([
+        strength * kernel * dx / length ** 2,
+        strength * kernel * dy / length ** 2,
+        kernel,
+        strength * kernel * d2 / length ** 3,
+        np.ones_like(x),
+    ])
+    return jacobian, residual
+
+
+class PlumeParticleFilter:
+    """
+    Streaming source estimate: particles over (source_x, source_y, strength,
+    length) are reweighted by every batch of readings and resampled with a
+    small jitter when the weights degenerate.
+
+    Resampling alone lets the cloud settle early on a wrong combination of
+    position, strength and width, with a spread that no longer covers the
+    source. After an update that resampled, the particles are therefore
+    moved by Metropolis-Hastings steps under the likelihood of the last
+    window readings (resample-move), which pulls them back to the data and
+    keeps the spread at least as wide as that window supports. Costs
+    O(particles * (batch + window)) per update, independent of how many
+    readings came before.
+    """
+
+    def __init__(self, bounds, particles=5000, noise=2.0, background=0.0,
+                 strength_range=(1.0, 200.0), length_range=(10.0, 200.0), window=500, seed=None):
+        self.rng = np.random.default_rng(seed)
+        x0, y0, x1, y1 = bounds
+        self.noise = noise
+        self.background = background
+        self.low = np.array([x0, y0, strength_range[0], length_range[0]])
+        self.high = np.array([x1, y1, strength_range[1], length_range[1]])
+        self.window = window
+        self.recent = np.empty((0, 3))
+        self.particles = np.column_stack([
+            self.rng.uniform(x0, x1, particles),
+            self.rng.uniform(y0, y1, particles),
+            np.exp(self.rng.uniform(*np.log(strength_range), particles)),
+            np.exp(self.rng.uniform(*np.log(length_range), particles)),
+        ])
+        self.log_weights = np.zeros(particles)
+        self.resamples = 0
+        self.moves_accepted = 0
+
+    def update(self, x, y, values):
+        """
+        Fold a batch of readings into the weights. The likelihood is applied
+        in tempered stages so that the effective sample size never drops
+        below half; particles are resampled and jittered between stages.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        self.recent = np.concatenate([self.recent, np.column_stack((x, y, values))])[-self.window:]
+        resamples = self.resamples
+        remaining = 1.0
+        for stage in range(MAX_TEMPERING_STAGES):
+            log_likelihood = self._log_likelihood(x, y, values)
+            if stage == MAX_TEMPERING_STAGES - 1:
+                fraction = remaining
+            else:
+                fraction = self._tempering_fraction(log_likelihood, remaining)
+            self.log_weights += fraction * log_likelihood
+            self.log_weights -= self.log_weights.max()
+            remaining -= fraction
+            if self.effective_size() < len(self.particles) / 2 or remaining > 1e-9:
+                self._resample()
+            if remaining <= 1e-9:
+                break
+        if self.resamples > resamples:
+            self._move()
+
+    def _log_likelihood(self, x, y, values):
+        p = self.particles
+        d2 = (p[:, 0, None] - x) ** 2 + (p[:, 1, None] - y) ** 2
+        predicted = self.background + p[:, 2, None] * np.exp(-d2 / (2 * p[:, 3, None] ** 2))
+        return -0.5 * ((predicted - values) ** 2).sum(axis=1) / self.noise ** 2
+
+    def _tempering_fraction(self, log_likelihood, remaining):
+        """Largest share of the remaining likelihood that keeps half of the particles effective."""
+        def effective(fraction):
+            log_weights = self.log_weights + fraction * log_likelihood
+            weights = np.exp(log_weights - log_weights.max())
+            return weights.sum() ** 2 / (weights * weights).sum()
+
+        target = len(self.particles) / 2
+        if effective(remaining) >= target:
+            return remaining
+        low, high = 0.0, remaining
+        for _ in range(30):
+            middle = (low + high) / 2
+            if effective(middle) >= target:
+                low = middle
+            else:
+                high = middle
+        return max(low, 1e-12)
+
+    def weights(self):
+        weights = np.exp(self.log_weights - self.log_weights.max())
+        return weights / weights.sum()
+
+    def effective_size(self):
+        weights = self.weights()
+        return 1.0 / (weights * weights).sum()
+
+    def _resample(self):
+        """Systematic resampling followed by a kernel jitter (regularized particle filter)."""
+        count = len(self.particles)
+        positions = (self.rng.random() + np.arange(count)) / count
+        chosen = np.minimum(np.searchsorted(np.cumsum(self.weights()), positions), count - 1)
+        particles = self.particles[chosen]
+        spread = particles.std(axis=0) * count ** (-1 / 6)
+        particles = particles + self.rng.normal(0, 1, particles.shape) * spread
+        particles[:, 2:] = np.abs(particles[:, 2:])
+        self.particles = particles
+        self.log_weights = np.zeros(count)
+        self.resamples += 1
+
+    def _move(self):
+        """Random-walk Metropolis-Hastings steps on the particles against the recent readings."""
+        x, y, values = self.recent.T
+        log_likelihood = self._log_likelihood(x, y, values)
+        # Proposal shaped like the cloud, with the usual 2.38 / sqrt(dimensions) scaling
+        covariance = np.cov(self.particles.T) * 2.38 ** 2 / self.particles.shape[1]
+        covariance += np.eye(self.particles.shape[1]) * 1e-9
+        for _ in range(MOVE_STEPS):
+            current = self.particles
+            proposed = current + self.rng.multivariate_normal(np.zeros(len(covariance)), covariance, len(current))
+            self.particles = proposed
+            proposed_log_likelihood = self._log_likelihood(x, y, values)
+            accept = (((proposed >= self.low) & (proposed <= self.high)).all(axis=1) &
+                      (np.log(self.rng.random(len(current))) < proposed_log_likelihood - log_likelihood))
+            self.particles = np.where(accept[:, None], proposed, current)
+            log_likelihood = np.where(accept, proposed_log_likelihood, log_likelihood)
+            self.moves_accepted += int(accept.sum())
+
+    def estimate(self, confidence=0.95):
+        weights = self.weights()
+        mean = weights @ self.particles
+        centred = self.particles[:, :2] - mean[:2]
+        covariance = (centred * weights[:, None]).T @ centred
+        return {"x": float(mean[0]), "y": float(mean[1]), "strength": float(mean[2]), "length": float(mean[3]),
+                "covariance": covariance, "ellipse": confidence_ellipse(covariance, confidence),
+                "effective_particles": float(self.effective_size())}
+
+
+def demo(readings=5000, drones=10):
+    """Drones surveying a leak: batch fit over all readings, then streaming particle filter updates."""
+    rng = np.random.default_rng(1)
+    source = (620.0, 410.0, 80.0, 60.0, 5.0)    # x, y, strength, length, background
+    x = rng.uniform(0, 1000, readings)
+    y = rng.uniform(0, 1000, readings)
+    values = plume(x, y, *source) + rng.normal(0, 1.0, readings)
+    print(f"True source: x={source[0]}, y={source[1]}, strength={source[2]}")
+
+    start = time.perf_counter()
+    fit = locate_source(x, y, values)
+    elapsed = (time.perf_counter() - start) * 1000
+    ellipse = fit["ellipse"]
+    print(f"Least squares ({readings} readings, {elapsed:.0f} ms): x={fit['x']:.1f}, y={fit['y']:.1f}, "
+          f"strength={fit['strength']:.1f} ± {fit['strength_std']:.1f}, "
+          f"95% ellipse {ellipse['major']:.1f} x {ellipse['minor']:.1f} m")
+
+    pf = PlumeParticleFilter((0, 0, 1000, 1000), particles=5000, noise=1.0, background=source[4], seed=0)
+    start = time.perf_counter()
+    batch = readings // 50
+    for i in range(0, readings, batch):
+        pf.update(x[i:i + batch], y[i:i + batch], values[i:i + batch])
+    elapsed = (time.perf_counter() - start) * 1000 / 50
+    estimate = pf.estimate()
+    print(f"Particle filter ({elapsed:.1f} ms per batch of {batch}): x={estimate['x']:.1f}, y={estimate['y']:.1f}, "
+          f"strength={estimate['strength']:.1f}, 95% ellipse {estimate['ellipse']['major']:.1f} x "
+          f"{estimate['ellipse']['minor']:.1f} m, {pf.resamples} resamples")
+
+
+if __name__ == "__main__":
+    # Usage: python plume_locator.py [readings]
+    demo(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,130 @@
+import numpy as np
+
+
+class RollingWindow:
+    """
+    Sliding-window statistics over the last `window` samples of many channels.
+
+    Every update costs O(channels), independent of the window size:
+      - mean/variance come from running sums of (x - shift), where shift is
+        re-anchored once per window to keep the sums numerically stable;
+      - min/max use the van Herk/Gil-Werman split: a running extreme of the
+        current block plus suffix extremes of the previous block, rebuilt once
+        every `window` samples (amortized O(1) per sample);
+      - EWMA mean/variance are updated alongside when alpha is given.
+    """
+
+    def __init__(self, window, channels=1, alpha=None):
+        self.window = window
+        self.channels = channels
+        self.alpha = alpha
+
+        self.values = np.zeros((window, channels))
+        self.count = 0
+
+        self.shift = np.zeros(channels)
+        self.sum = np.zeros(channels)
+        self.sum_sq = np.zeros(channels)
+
+        self.block_min = np.full(channels, np.inf)
+        self.block_max = np.full(channels, -np.inf)
+        self.suffix_min = np.full((window, channels), np.inf)
+        self.suffix_max = np.full((window, channels), -np.inf)
+
+        self.ewma_mean = None
+        self.ewma_var = np.zeros(channels)
+        self.last = np.full(channels, np.nan)
+
+    def update(self, values):
+        """Add one sample per channel."""
+        values = np.asarray(values, dtype=np.float64).reshape(self.channels)
+        position = self.count % self.window
+
+        if self.count == 0:
+            self.shift = values.copy()
+        if self.count >= self.window:
+            old = self.values[position] - self.shift
+            self.sum -= old
+            self.sum_sq -= old * old
+
+        shifted = values - self.shift
+        self.sum += shifted
+        self.sum_sq += shifted * shifted
+        self.values[position] = values
+        self.last = values
+
+        if position == 0:
+            self.block_min = values.copy()
+            self.block_max = values.copy()
+        else:
+            np.minimum(self.block_min, values, out=self.block_min)
+            np.maximum(self.block_max, values, out=self.block_max)
+
+        if self.alpha is not None:
+            if self.ewma_mean is None:
+                self.ewma_mean = values.copy()
+            else:
+                delta = values - self.ewma_mean
+                self.ewma_mean += self.alpha * delta
+                self.ewma_var = (1 - self.alpha) * (self.ewma_var + self.alpha * delta * delta)
+
+        self.count += 1
+        if position == self.window - 1:
+            self._close_block()
+
+    def _close_block(self):
+        """The buffer holds exactly one full window: rebuild suffixes and re-anchor the sums."""
+        np.minimum.accumulate(self.values[::-1], axis=0, out=self.suffix_min[::-1])
+        np.maximum.accumulate(self.values[::-1], axis=0, out=self.suffix_max[::-1])
+
+        self.shift = self.values.mean(axis=0)
+        shifted = self.values - self.shift
+        self.sum = shifted.sum(axis=0)
+        self.sum_sq = (shifted * shifted).sum(axis=0)
+
+    @property
+    def size(self):
+        """Number of samples currently in the window."""
+        return min(self.count, self.window)
+
+    def mean(self):
+        return self.shift + self.sum / max(self.size, 1)
+
+    def var(self):
+        n = max(self.size, 1)
+        mean_shifted = self.sum / n
+        return np.maximum(self.sum_sq / n - mean_shifted * mean_shifted, 0.0)
+
+    def std(self):
+        return np.sqrt(self.var())
+
+    def min(self):
+        if self.count < self.window:
+            return self.block_min.copy()
+        # Tail of the previous block starts right after the newest sample
+        position = self.count % self.window
+        if position == 0:
+            return self.suffix_min[0].copy()
+        return np.minimum(self.suffix_min[position], self.block_min)
+
+    def max(self):
+        if self.count < self.window:
+            return self.block_max.copy()
+        position = self.count % self.window
+        if position == 0:
+            return self.suffix_max[0].copy()
+        return np.maximum(self.suffix_max[position], self.block_max)
+
+    def zscore(self, values=None):
+        """Z-score of values (default: the latest sample) against the window."""
+        values = self.last if values is None else np.asarray(values, dtype=np.float64)
+        std = self.std()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(std > 0, (values - self.mean()) / std, 0.0)
+
+    def ewma_zscore(self, values=None):
+        """Z-score of values (default: the latest sample) against the EWMA band."""
+        values = self.last if values is None else np.asarray(values, dtype=np.float64)
+        std = np.sqrt(self.ewma_var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(std > 0, (values - self.ewma_mean) / std, 0.0)
@@ -0,0 +1,327 @@
+import asyncio
+import collections
+import os
+import sys
+import termios
+import time
+import tty
+import numpy as np
+
+import metrics
+from sensor_protocol import SensorStreamDecoder, SENSOR_TYPES
+
+UNITS = {"gas": "ppm", "flood": "cm", "voltage": "V"}
+
+DROPPED_READINGS = metrics.counter("sensor_readings_dropped_total", "Readings dropped by full subscriber queues")
+
+BAUD_RATES = {
+    9600: termios.B9600,
+    19200: termios.B19200,
+    38400: termios.B38400,
+    57600: termios.B57600,
+    115200: termios.B115200,
+}
+
+Reading = collections.namedtuple("Reading", "sensor_type sensor_id value unit timestamp sequence")
+
+
+class SensorPort:
+    """One serial port carrying readings of a single sensor type."""
+
+    def __init__(self, device, sensor_type, baudrate=9600, sensor_id=None):
+        self.device = device
+        self.sensor_type = sensor_type
+        self.baudrate = baudrate
+        self.sensor_id = sensor_id or f"{sensor_type}@{os.path.basename(device)}"
+        self.unit = UNITS.get(sensor_type, "")
+        self.fd = None
+        self.decoder = SensorStreamDecoder(sensor_type)
+        self.sequence = 0
+
+        self.readings = 0
+        self.reported_errors = 0
+        self.readings_metric = metrics.counter("sensor_readings_total", "Readings decoded from sensor ports",
+                                               sensor_type=sensor_type)
+        self.errors_metric = metrics.counter("sensor_parse_errors_total", "Corrupted frames and unparsable lines",
+                                             sensor_type=sensor_type)
+
+    @property
+    def parse_errors(self):
+        return self.decoder.ascii_errors + self.decoder.crc_errors
+
+    def open(self):
+        self.fd = os.open(self.device, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        if os.isatty(self.fd):
+            tty.setraw(self.fd)
+            attributes = termios.tcgetattr(self.fd)
+            attributes[4] = attributes[5] = BAUD_RATES.get(self.baudrate, termios.B9600)
+            termios.tcsetattr(self.fd, termios.TCSANOW, attributes)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def parse(self, data, timestamp):
+        """Decode the received bytes (ASCII lines and/or binary frames) into readings."""
+        batch = self.decoder.feed(data, timestamp * 1000.0)
+        count = len(batch["value"])
+        errors = self.parse_errors
+        if errors != self.reported_errors:
+            self.errors_metric.inc(errors - self.reported_errors)
+            self.reported_errors = errors
+        if count == 0:
+            return []
+
+        # Binary samples carry the sensor's clock; anchor each sensor's newest sample to the receive time
+        times = batch["time_ms"].copy()
+        for code in np.unique(batch["sensor_type"][batch["binary"]]):
+            mask = batch["binary"] & (batch["sensor_type"] == code)
+            times[mask] = timestamp * 1000.0 - (times[mask].max() - times[mask])
+
+        readings = []
+        for code, value, time_ms in zip(batch["sensor_type"].tolist(), batch["value"].tolist(), times.tolist()):
+            sensor_type = SENSOR_TYPES.get(code, self.sensor_type)
+            sensor_id = self.sensor_id if sensor_type == self.sensor_type else f"{sensor_type}@{os.path.basename(self.device)}"
+            readings.append(Reading(sensor_type, sensor_id, value, UNITS.get(sensor_type, ""),
+                                    time_ms / 1000.0, self.sequence))
+            self.sequence += 1
+        self.readings += count
+        self.readings_metric.inc(count)
+        return readings
+
+
+class Subscription:
+    """Bounded queue of readings for one consumer."""
+
+    def __init__(self, maxsize, policy):
+        # policy: "drop_oldest", "drop_newest" or "backpressure"
+        self.queue = asyncio.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class SensorIngestion:
+    """
+    Single-process ingestion for any number of serial sensors.
+    Every port is read through the asyncio event loop as soon as data
+    arrives; each line becomes a timestamped Reading published to the
+    subscriber queues. Full queues either drop readings (counted) or, for
+    backpressure subscribers, pause reading the ports until there is room.
+    """
+
+    def __init__(self, read_size=4096):
+        self.ports = []
+        self.subscriptions = []
+        self.read_size = read_size
+        self.loop = None
+        self.paused = False
+        self.backlog = collections.deque()
+        self._stopped = None
+
+    def add_port(self, device, sensor_type, baudrate=9600, sensor_id=None):
+        port = SensorPort(device, sensor_type, baudrate, sensor_id)
+        self.ports.append(port)
+        if self.loop is not None:
+            port.open()
+            self.loop.add_reader(port.fd, self._on_readable, port)
+        return port
+
+    def subscribe(self, maxsize=1000, policy="drop_oldest"):
+        subscription = Subscription(maxsize, policy)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def stats(self):
+        return {
+            "ports": {port.sensor_id: {"readings": port.readings, "parse_errors": port.parse_errors}
+                      for port in self.ports},
+            "dropped": sum(subscription.dropped for subscription in self.subscriptions),
+            "paused": self.paused,
+        }
+
+    def _on_readable(self, port):
+        try:
+            data = os.read(port.fd, self.read_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            # Sensor unplugged or the fake sensor closed its end
+            self.loop.remove_reader(port.fd)
+            return
+        for reading in port.parse(data, time.time()):
+            self.publish(reading)
+
+    def publish(self, reading, first=0):
+        """Hand a reading to every subscription, starting at index first."""
+        if self.paused:
+            self.backlog.append((reading, first))
+            return
+        for index in range(first, len(self.subscriptions)):
+            if not self._offer(self.subscriptions[index], reading):
+                # Resume with this subscription once it has room
+                self.backlog.append((reading, index))
+                self._pause()
+                return
+
+    def _offer(self, subscription, reading):
+        """Put without waiting; returns False when a backpressure subscription is full."""
+        queue = subscription.queue
+        if not queue.full():
+            queue.put_nowait(reading)
+        elif subscription.policy == "drop_oldest":
+            queue.get_nowait()
+            queue.put_nowait(reading)
+            subscription.dropped += 1
+            DROPPED_READINGS.inc()
+        elif subscription.policy == "drop_newest":
+            subscription.dropped += 1
+            DROPPED_READINGS.inc()
+        else:
+            return False
+        return True
+
+    def _pause(self):
+        self.paused = True
+        for port in self.ports:
+            if port.fd is not None:
+                self.loop.remove_reader(port.fd)
+        self.loop.create_task(self._drain_backlog())
+
+    async def _drain_backlog(self):
+        """Wait for the backpressure subscribers to make room, then resume reading."""
+        while self.backlog:
+            reading, first = self.backlog.popleft()
+            for subscription in self.subscriptions[first:]:
+                if not self._offer(subscription, reading):
+                    await subscription.queue.put(reading)
+        self.paused = False
+        for port in self.ports:
+            if port.fd is not None:
+                self.loop.add_reader(port.fd, self._on_readable, port)
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        for port in self.ports:
+            port.open()
+            self.loop.add_reader(port.fd, self._on_readable, port)
+
+    def stop(self):
+        for port in self.ports:
+            if port.fd is not None:
+                self.loop.remove_reader(port.fd)
+                port.close()
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def run(self):
+        """Read all ports until stop() is called."""
+        self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            self.stop()
+
+
+class FakeSensor:
+    """Pseudo-terminal that behaves like a serial sensor printing one value per line."""
+
+    def __init__(self, generator):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        self.device = os.ttyname(self.slave)
+        self.generator = generator
+
+    async def run(self, rate_hz, duration):
+        period = 1 / rate_hz
+        start = time.time()
+        sent = 0
+        while time.time() - start < duration:
+            # Write every sample that is due, like a sensor with its own clock
+            due = int((time.time() - start) * rate_hz)
+            if due > sent:
+                lines = b"".join(f"{self.generator()}\n".encode() for _ in range(due - sent))
+                os.write(self.master, lines)
+                sent = due
+            await asyncio.sleep(period)
+        return sent
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+async def simulate(count=30, rate_hz=200, duration=3.0):
+    """Ingest count fake sensors through one process and report the throughput."""
+    import random
+    generators = {"gas": lambda: f"{random.gauss(5, 1):.2f}",
+                  "flood": lambda: f"{random.gauss(60, 5):.1f}",
+                  "voltage": lambda: f"{random.gauss(230, 2):.1f}"}
+
+    ingestion = SensorIngestion()
+    sensors = []
+    for i in range(count):
+        sensor_type = list(generators)[i % 3]
+        sensor = FakeSensor(generators[sensor_type])
+        sensors.append(sensor)
+        ingestion.add_port(sensor.device, sensor_type, sensor_id=f"{sensor_type}-{i}")
+
+    subscription = ingestion.subscribe(maxsize=100_000)
+    received = 0
+
+    async def consumer():
+        nonlocal received
+        while True:
+            await subscription.get()
+            received += 1
+
+    ingestion.start()
+    consumer_task = asyncio.create_task(consumer())
+    sent = sum(await asyncio.gather(*(sensor.run(rate_hz, duration) for sensor in sensors)))
+    await asyncio.sleep(0.2)
+    consumer_task.cancel()
+    ingestion.stop()
+    for sensor in sensors:
+        sensor.close()
+
+    print(f"{count} sensors, sent {sent}, received {received} ({received / duration:.0f} readings/s)")
+    print(ingestion.stats()["dropped"], "dropped")
+
+
+async def main(specs):
+    ingestion = SensorIngestion()
+    for spec in specs:
+        # sensor_type=device[:baudrate]
+        sensor_type, _, device = spec.partition('=')
+        device, _, baudrate = device.partition(':')
+        ingestion.add_port(device, sensor_type, int(baudrate or 9600))
+    subscription = ingestion.subscribe()
+    ingestion.start()
+    try:
+        while True:
+            reading = await subscription.get()
+            print(f"{reading.sensor_id}: {reading.value} {reading.unit}")
+    finally:
+        ingestion.stop()
+
+
+if __name__ == "__main__":
+    # Usage: python sensor_ingestion.py gas=/dev/ttyUSB0 flood=/dev/ttyUSB1 voltage=/dev/ttyUSB2:9600
+    #        python sensor_ingestion.py --simulate [sensors]
+    if len(sys.argv) > 1 and sys.argv[1] == "--simulate":
+        asyncio.run(simulate(int(sys.argv[2]) if len(sys.argv) > 2 else 30))
+    else:
+        try:
+            asyncio.run(main(sys.argv[1:] or ["gas=/dev/ttyUSB0"]))
+        except KeyboardInterrupt:
+            print("\nExiting ingestion.")
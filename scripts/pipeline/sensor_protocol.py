@@ -0,0 +1,208 @@
+import struct
+import zlib
+import numpy as np
+
+# Binary sensor frame (little endian):
+#   sync (2) | sensor type (1) | count (1) | sequence (2) | first sample time ms (4) | period ms (2)
+#   | count x float32 samples | CRC-32 (4)
+# The CRC covers everything between the sync word and the CRC.
+# Lines of ASCII text (one float per line, the original sensor format) may be
+# mixed with frames on the same link; ASCII bytes never contain the sync word.
+SYNC = b'\xaa\x55'
+HEADER_FORMAT = "<BBHIH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CRC_SIZE = 4
+MAX_SAMPLES = 255
+MAX_FRAME_SIZE = len(SYNC) + HEADER_SIZE + 4 * MAX_SAMPLES + CRC_SIZE
+MAX_LINE_LENGTH = 64
+
+SENSOR_TYPES = {1: "gas", 2: "flood", 3: "voltage"}
+SENSOR_CODES = {name: code for code, name in SENSOR_TYPES.items()}
+
+
+def encode_batch(sensor_type, sequence, first_ms, period_ms, values):
+    """Encode up to MAX_SAMPLES samples of one sensor into a frame."""
+    values = np.asarray(values, dtype='<f4')
+    if len(values) > MAX_SAMPLES:
+        raise ValueError(f"at most {MAX_SAMPLES} samples per frame")
+    code = SENSOR_CODES.get(sensor_type, sensor_type)
+    body = struct.pack(HEADER_FORMAT, code, len(values), sequence & 0xFFFF,
+                       first_ms & 0xFFFFFFFF, period_ms) + values.tobytes()
+    return SYNC + body + struct.pack("<I", zlib.crc32(body))
+
+
+def empty_batch():
+    return {
+        "sensor_type": np.empty(0, dtype=np.uint8),
+        "sequence": np.empty(0, dtype=np.uint16),
+        "time_ms": np.empty(0, dtype=np.float64),
+        "value": np.empty(0, dtype=np.float64),
+        "binary": np.empty(0, dtype=bool),
+    }
+
+
+class SensorStreamDecoder:
+    """
+    Decodes a sensor link carrying binary frames, ASCII lines, or both.
+    feed() parses everything received so far in one pass and returns the
+    samples as NumPy arrays. Corrupted frames are skipped and decoding
+    resumes at the next sync word; incomplete data is kept for the next call.
+    """
+
+    def __init__(self, default_type="gas"):
+        self.default_code = SENSOR_CODES.get(default_type, 0)
+        self.buffer = bytearray()
+        self.ascii_pending = bytearray()
+
+        self.frames = 0
+        self.crc_errors = 0
+        self.ascii_errors = 0
+        self.expected_sequence = {}
+        self.lost_frames = 0
+
+    def _scan_frames(self, data):
+        """
+        Find the frames in data; returns (frames, rejected, consumed) where
+        rejected holds the (start, end) byte ranges of frames failing the CRC.
+        """
+        raw = np.frombuffer(data, dtype=np.uint8)
+        candidates = np.flatnonzero((raw[:-1] == SYNC[0]) & (raw[1:] == SYNC[1])).tolist()
+
+        frames = []
+        rejected = []
+        position = 0
+        size = len(data)
+        for index, start in enumerate(candidates):
+            if start < position:
+                continue
+            if start + len(SYNC) + HEADER_SIZE > size:
+                return frames, rejected, start
+            code, count, sequence, first_ms, period_ms = struct.unpack_from(HEADER_FORMAT, data, start + 2)
+            payload = start + len(SYNC) + HEADER_SIZE
+            end = payload + 4 * count
+            if end + CRC_SIZE > size:
+                return frames, rejected, start
+            (crc,) = struct.unpack_from("<I", data, end)
+            if crc != zlib.crc32(data[start + 2:end]):
+                self.crc_errors += 1
+                # Drop the damaged frame as far as its length claims, but never
+                # past the next sync word in case the length itself is damaged
+                following = candidates[index + 1] if index + 1 < len(candidates) else size
+                position = min(end + CRC_SIZE, following)
+                rejected.append((start, position))
+                continue
+            frames.append((start, end + CRC_SIZE, code, count, sequence, first_ms, period_ms, payload))
+            position = end + CRC_SIZE
+        # Keep a trailing first sync byte: the rest of the sync word may be on its way
+        if size > position and data[-1] == SYNC[0]:
+            return frames, rejected, size - 1
+        return frames, rejected, size
+
+    def _parse_ascii(self, gaps):
+        """
+        Parse the ASCII lines in gaps, a list of (offset, bytes, closed) where
+        closed means a frame follows. Returns (values, positions) with the
+        offset of the newline ending each line.
+        """
+        values = []
+        positions = []
+        for offset, data, closed in gaps:
+            pieces = data.split(b'\n')
+            tail = pieces.pop()
+            position = offset - 1
+            for index, line in enumerate(pieces):
+                position += len(line) + 1
+                if index == 0 and self.ascii_pending:
+                    line = bytes(self.ascii_pending) + line
+                    self.ascii_pending.clear()
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    values.append(float(line))
+                except ValueError:
+                    self.ascii_errors += 1
+                else:
+                    positions.append(position)
+            self.ascii_pending.extend(tail)
+
+            # Lines never straddle a frame, so whatever is pending at a frame
+            # boundary is a damaged line; garbage without line breaks can never
+            # become a valid line either
+            if (closed and self.ascii_pending.strip()) or len(self.ascii_pending) > MAX_LINE_LENGTH:
+                self.ascii_errors += 1
+            if closed or len(self.ascii_pending) > MAX_LINE_LENGTH:
+                self.ascii_pending.clear()
+        return np.array(values, dtype=np.float64), np.array(positions, dtype=np.int64)
+
+    def feed(self, data, received_ms=0.0):
+        """
+        Decode newly received bytes.
+        Returns a dict of equal-length arrays in arrival order: sensor_type
+        (code), sequence, time_ms, value and binary (False for ASCII samples,
+        which carry received_ms).
+        """
+        self.buffer.extend(data)
+        view = bytes(self.buffer)
+        frames, rejected, consumed = self._scan_frames(view)
+
+        # Bytes outside frames are ASCII text (or garbage, dropped by the line
+        # parser); rejected frames are dropped but still end the text before them
+        boundaries = sorted([frame[:2] for frame in frames] + rejected)
+        gaps = []
+        position = 0
+        for start, end in boundaries:
+            gaps.append((position, view[position:start], True))
+            position = end
+        gaps.append((position, view[position:consumed], False))
+        ascii_values, ascii_positions = self._parse_ascii(gaps)
+        del self.buffer[:consumed]
+
+        batch = empty_batch()
+        positions = np.empty(0, dtype=np.int64)
+        if frames:
+            table = np.array([frame[2:] for frame in frames], dtype=np.int64)
+            codes, counts, sequences, first_ms, period_ms, payloads = table.T
+            self._track_sequences(codes, sequences)
+            self.frames += len(frames)
+
+            # Gather every sample of every frame with one fancy-indexing pass
+            total = int(counts.sum())
+            frame_of_sample = np.repeat(np.arange(len(frames)), counts)
+            index_in_frame = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            offsets = payloads[frame_of_sample] + 4 * index_in_frame
+            raw = np.frombuffer(view, dtype=np.uint8)
+            values = raw[offsets[:, None] + np.arange(4)].copy().view('<f4').ravel()
+
+            batch = {
+                "sensor_type": codes[frame_of_sample].astype(np.uint8),
+                "sequence": sequences[frame_of_sample].astype(np.uint16),
+                "time_ms": (first_ms[frame_of_sample] + period_ms[frame_of_sample] * index_in_frame).astype(np.float64),
+                "value": values.astype(np.float64),
+                "binary": np.ones(total, dtype=bool),
+            }
+            positions = np.array([frame[1] for frame in frames], dtype=np.int64)[frame_of_sample]
+
+        if len(ascii_values):
+            n = len(ascii_values)
+            ascii_batch = {
+                "sensor_type": np.full(n, self.default_code, dtype=np.uint8),
+                "sequence": np.zeros(n, dtype=np.uint16),
+                "time_ms": np.full(n, float(received_ms)),
+                "value": ascii_values,
+                "binary": np.zeros(n, dtype=bool),
+            }
+            if frames:
+                # Interleave by where each sample ended in the stream
+                order = np.argsort(np.concatenate([positions, ascii_positions]), kind='stable')
+                batch = {key: np.concatenate([batch[key], ascii_batch[key]])[order] for key in batch}
+            else:
+                batch = ascii_batch
+        return batch
+
+    def _track_sequences(self, codes, sequences):
+        for code, sequence in zip(codes.tolist(), sequences.tolist()):
+            expected = self.expected_sequence.get(code)
+            if expected is not None and sequence != expected:
+                self.lost_frames += (sequence - expected) & 0xFFFF
+            self.expected_sequence[code] = (sequence + 1) & 0xFFFF
@@ -0,0 +1,273 @@
+import asyncio
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+MAGIC = 0x52494E47  # "RING"
+HEADER_FIELDS = 4   # magic, channels, capacity, reserved
+NAME_SIZE = 32
+
+
+class SharedRing:
+    """
+    Multi-channel ring buffer of (timestamp, value) samples in shared memory.
+
+    One process writes, any number of processes read. Every channel has a
+    seqlock word: the writer makes it odd, stores the sample, then makes it
+    even again, and readers retry when it changed under them. Each sample is
+    stored twice, at i and i + capacity, so the last n samples of a channel
+    are always one contiguous block that can be returned as a NumPy view
+    without copying. A view stays valid until the writer laps it; check with
+    valid() after using it, or use read_history() for a verified copy.
+    """
+
+    def __init__(self, memory, owner):
+        self.memory = memory
+        self.owner = owner
+        header = np.ndarray(HEADER_FIELDS, dtype=np.int64, buffer=memory.buf)
+        if header[0] != MAGIC:
+            raise ValueError(f"{memory.name} is not a shared ring")
+        self.channels = int(header[1])
+        self.capacity = int(header[2])
+
+        offset = header.nbytes
+        self.names_array = np.ndarray(self.channels, dtype=f"S{NAME_SIZE}", buffer=memory.buf, offset=offset)
+        offset += self.names_array.nbytes
+        self.seq = np.ndarray(self.channels, dtype=np.int64, buffer=memory.buf, offset=offset)
+        offset += self.seq.nbytes
+        self.count = np.ndarray(self.channels, dtype=np.int64, buffer=memory.buf, offset=offset)
+        offset += self.count.nbytes
+        shape = (self.channels, 2 * self.capacity)
+        self.times = np.ndarray(shape, dtype=np.float64, buffer=memory.buf, offset=offset)
+        offset += self.times.nbytes
+        self.values = np.ndarray(shape, dtype=np.float64, buffer=memory.buf, offset=offset)
+
+        self.names = [name.decode() for name in self.names_array]
+        self.index = {name: channel for channel, name in enumerate(self.names)}
+
+    @staticmethod
+    def size(channels, capacity):
+        return 8 * (HEADER_FIELDS + 2 * channels + 2 * channels * 2 * capacity) + NAME_SIZE * channels
+
+    @classmethod
+    def create(cls, name, channels, capacity=4096):
+        """Create the ring; channels is a list of channel names."""
+        memory = shared_memory.SharedMemory(name=name, create=True, size=cls.size(len(channels), capacity))
+        header = np.ndarray(HEADER_FIELDS, dtype=np.int64, buffer=memory.buf)
+        header[:] = (MAGIC, len(channels), capacity, 0)
+        names = np.ndarray(len(channels), dtype=f"S{NAME_SIZE}", buffer=memory.buf, offset=header.nbytes)
+        names[:] = [channel.encode()[:NAME_SIZE] for channel in channels]
+        del header, names
+        ring = cls(memory, owner=True)
+        ring.seq[:] = 0
+        ring.count[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to an existing ring. Readers never unlink it: the segment is
+        kept out of this process's resource tracker, which would otherwise
+        remove it when the reader exits.
+        """
+        if sys.version_info >= (3, 13):
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return cls(memory, owner=False)
+
+    def close(self):
+        """Detach; views handed out by history() must be released first."""
+        self.names_array = self.seq = self.count = self.times = self.values = None
+        self.memory.close()
+        if self.owner:
+            if sys.version_info < (3, 13):
+                # Reader processes started by this one share its resource
+                # tracker, so attaching may have dropped the registration
+                # that unlink() is about to remove
+                resource_tracker.register(self.memory._name, "shared_memory")
+            self.memory.unlink()
+
+    def channel(self, channel):
+        return self.index[channel] if isinstance(channel, str) else channel
+
+    # Writer
+
+    def write(self, channel, value, timestamp=None):
+        channel = self.channel(channel)
+        timestamp = time.time() if timestamp is None else timestamp
+        position = self.count[channel] % self.capacity
+        self.seq[channel] += 1
+        self.times[channel, position] = self.times[channel, position + self.capacity] = timestamp
+        self.values[channel, position] = self.values[channel, position + self.capacity] = value
+        self.count[channel] += 1
+        self.seq[channel] += 1
+
+    def write_many(self, channel, values, timestamps):
+        """Append a batch of samples to one channel under a single seqlock update."""
+        channel = self.channel(channel)
+        values = np.asarray(values, dtype=np.float64)[-self.capacity:]
+        timestamps = np.asarray(timestamps, dtype=np.float64)[-self.capacity:]
+        positions = (self.count[channel] + np.arange(len(values))) % self.capacity
+        self.seq[channel] += 1
+        for offset in (0, self.capacity):
+            self.times[channel, positions + offset] = timestamps
+            self.values[channel, positions + offset] = values
+        self.count[channel] += len(values)
+        self.seq[channel] += 1
+
+    # Readers
+
+    def latest(self, channel):
+        """(timestamp, value, count) of the newest sample of a channel."""
+        channel = self.channel(channel)
+        while True:
+            seq = self.seq[channel]
+            if seq & 1:
+                continue
+            count = int(self.count[channel])
+            position = (count - 1) % self.capacity
+            timestamp = float(self.times[channel, position])
+            value = float(self.values[channel, position])
+            if self.seq[channel] == seq:
+                return (timestamp, value, count) if count else (None, None, 0)
+
+    def latest_all(self):
+        """Newest timestamp, value and count of every channel as arrays."""
+        rows = np.arange(self.channels)
+        timestamps = np.full(self.channels, np.nan)
+        values = np.full(self.channels, np.nan)
+        counts = np.zeros(self.channels, dtype=np.int64)
+        pending = rows
+        while len(pending):
+            seq = self.seq[pending]
+            count = self.count[pending]
+            positions = (count - 1) % self.capacity
+            timestamps[pending] = self.times[pending, positions]
+            values[pending] = self.values[pending, positions]
+            counts[pending] = count
+            pending = pending[(seq & 1).astype(bool) | (self.seq[pending] != seq)]
+        empty = counts == 0
+        timestamps[empty] = values[empty] = np.nan
+        return timestamps, values, counts
+
+    def history(self, channel, n):
+        """
+        Zero-copy views of the last n samples (oldest first) and a token for valid().
+        """
+        channel = self.channel(channel)
+        n = min(n, self.capacity - 1)
+        while True:
+            seq = self.seq[channel]
+            if seq & 1:
+                continue
+            count = int(self.count[channel])
+            if self.seq[channel] == seq:
+                break
+        n = min(n, count)
+        start = (count - n) % self.capacity
+        token = (count, n)
+        return self.times[channel, start:start + n], self.values[channel, start:start + n], token
+
+    def valid(self, channel, token):
+        """True if views from history() have not been overwritten since they were taken."""
+        count, n = token
+        return self.count[self.channel(channel)] - count < self.capacity - n
+
+    def read_history(self, channel, n):
+        """Verified copies of the last n samples."""
+        while True:
+            times, values, token = self.history(channel, n)
+            times, values = times.copy(), values.copy()
+            if self.valid(channel, token):
+                return times, values
+
+
+async def publish_readings(ring, subscription):
+    """Copy readings from a sensor ingestion subscription into the ring."""
+    while True:
+        reading = await subscription.get()
+        if reading.sensor_id in ring.index:
+            ring.write(reading.sensor_id, reading.value, reading.timestamp)
+
+
+async def publish(name, specs, capacity=4096):
+    """
+    Ingestion process writing a new ring called name, one channel per sensor
+    in specs (sensor_type=device[:baudrate]); readers attach by name.
+    """
+    from sensor_ingestion import SensorIngestion
+    ingestion = SensorIngestion()
+    for spec in specs:
+        sensor_type, _, device = spec.partition('=')
+        device, _, baudrate = device.partition(':')
+        ingestion.add_port(device, sensor_type, int(baudrate or 9600))
+    ring = SharedRing.create(name, [port.sensor_id for port in ingestion.ports], capacity)
+    subscription = ingestion.subscribe(policy="drop_oldest")
+    ingestion.start()
+    print(f"Publishing {', '.join(ring.names)} to ring {name}")
+    try:
+        await publish_readings(ring, subscription)
+    finally:
+        ingestion.stop()
+        ring.close()
+
+
+def _demo_reader(name, duration, results):
+    """Reader process: checks every read for torn samples (value must equal timestamp * 2)."""
+    ring = SharedRing.attach(name)
+    reads = torn = 0
+    end = time.time() + duration
+    while time.time() < end:
+        timestamps, values, counts = ring.latest_all()
+        torn += int(np.count_nonzero(values[counts > 0] != 2 * timestamps[counts > 0]))
+        channel = reads % ring.channels
+        times, samples, token = ring.history(channel, 256)
+        mismatches = int(np.count_nonzero(samples != 2 * times))
+        if ring.valid(channel, token):
+            torn += mismatches
+        del times, samples
+        reads += 1
+    results.put((reads, torn))
+    ring.close()
+
+
+def demo(channels=30, readers=4, duration=3.0):
+    """One writer and several reader processes hammering the same ring."""
+    import multiprocessing
+    name = f"hazard_ring_{int(time.time())}"
+    ring = SharedRing.create(name, [f"sensor-{i}" for i in range(channels)], capacity=4096)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_demo_reader, args=(name, duration, results)) for _ in range(readers)]
+    for process in processes:
+        process.start()
+
+    writes = 0
+    end = time.time() + duration
+    while time.time() < end:
+        timestamp = time.time()
+        ring.write(writes % channels, 2 * timestamp, timestamp)
+        writes += 1
+    for process in processes:
+        process.join()
+
+    print(f"{writes / duration:.0f} writes/s")
+    for reads, torn in (results.get() for _ in processes):
+        print(f"reader: {reads / duration:.0f} snapshot+history reads/s, {torn} torn reads")
+    ring.close()
+
+
+if __name__ == "__main__":
+    # Usage: python shared_ring.py --publish NAME gas=/dev/ttyUSB0 [flood=/dev/ttyUSB1:9600 ...]
+    #        python shared_ring.py --demo
+    if len(sys.argv) > 3 and sys.argv[1] == "--publish":
+        try:
+            asyncio.run(publish(sys.argv[2], sys.argv[3:]))
+        except KeyboardInterrupt:
+            print("\nExiting publisher.")
+    elif len(sys.argv) > 1 and sys.argv[1] == "--demo":
+        demo()
+    else:
+        print("Usage: python shared_ring.py --publish NAME sensor_type=device[:baudrate] ... | --demo")
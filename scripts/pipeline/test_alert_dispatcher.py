@@ -0,0 +1,22 @@
+import asyncio
+
+from alert_dispatcher import AlertDispatcher, StubProvider
+
+
+def test_unknown_channel_fails_without_stopping_delivery():
+    async def run():
+        sms = StubProvider()
+        dispatcher = AlertDispatcher({"sms": sms}, workers=1)
+        await dispatcher.start()
+        assert not dispatcher.submit("pager", "+100", "Gas", "high")
+        # One that slipped past submit(), e.g. from a digest or a retry
+        await dispatcher.queue.put({"channel": "pager", "recipient": "+100", "subject": "Gas", "message": "high",
+                                    "key": "Gas", "submitted": 0.0, "attempt": 0})
+        assert dispatcher.submit("sms", "+100", "Gas", "high")
+        await asyncio.wait_for(dispatcher.stop(), 2.0)
+        return dispatcher, sms
+
+    dispatcher, sms = asyncio.run(run())
+    assert dispatcher.counters["failed"] == 2
+    assert dispatcher.counters["delivered"] == 1
+    assert len(sms.sent) == 1
@@ -0,0 +1,24 @@
+import numpy as np
+
+from gas_heatmap import GasHeatmap, TILE_SIZE
+
+
+def test_tiles_outside_the_pyramid_are_empty():
+    heatmap = GasHeatmap((0.0, 0.0, 2000.0, 2000.0))
+    heatmap.update([100.0], [100.0], [50.0], 0.0)
+    assert heatmap.levels == 2
+    assert heatmap.has_tile(1, 0, 0) and heatmap.has_tile(0, 1, 1)
+    assert not heatmap.has_tile(2, 0, 0) and not heatmap.has_tile(1, 1, 0) and not heatmap.has_tile(0, 2, 0)
+    # Deep zooms must not build 4^level children
+    assert np.isnan(heatmap.tile(20, 0, 0, now=0.0)).all()
+    assert np.isclose(np.nanmax(heatmap.tile(1, 0, 0, now=0.0)), 50.0)
+    assert heatmap.tile(0, 0, 0, now=0.0).shape == (TILE_SIZE, TILE_SIZE)
+
+
+def test_partial_tiles_only_build_children_inside_the_area():
+    heatmap = GasHeatmap((0.0, 0.0, 3000.0, 1000.0))
+    assert (heatmap.tiles_x, heatmap.tiles_y, heatmap.levels) == (3, 1, 3)
+    heatmap.update([2900.0], [500.0], [20.0], 0.0)
+    assert np.isclose(np.nanmax(heatmap.tile(2, 0, 0, now=0.0)), 20.0)
+    assert {key[0] for key in heatmap.cache} == {1, 2}
+    assert (1, 0, 1) not in heatmap.cache and (1, 1, 1) not in heatmap.cache
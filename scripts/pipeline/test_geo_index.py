@@ -0,0 +1,23 @@
+import numpy as np
+
+from geo_index import GeoReadings, PositionTrack
+
+
+def test_readings_outside_the_fix_window_are_unlocated():
+    track = PositionTrack(origin=(45.0, 15.0), max_gap=2.0)
+    for t, x in ((10.0, 0.0), (11.0, 10.0), (12.0, 20.0), (30.0, 200.0)):
+        track.add_fix("d1", t, *track.to_geo(x, 0.0))
+    x, y = track.position_at("d1", [5.0, 9.0, 10.5, 13.0, 15.0, 21.0, 31.0, 40.0])
+    located = ~np.isnan(x)
+    # Before the first fix, in the 18 s gap and after the last fix only within 2 s
+    assert located.tolist() == [False, True, True, True, False, False, True, False]
+    assert np.allclose(x[located], [0.0, 5.0, 30.0, 200.0])
+    assert np.isnan(y[~located]).all()
+
+
+def test_unlocated_readings_are_not_indexed():
+    geo = GeoReadings(origin=(45.0, 15.0))
+    geo.track.add_fix("d1", 100.0, *geo.track.to_geo(50.0, 50.0))
+    geo.add("d1", "gas", [1.0, 2.0, 3.0], [50.0, 100.5, 200.0])
+    assert geo.grid("gas").size == 1
+    assert geo.unlocated == 2
@@ -0,0 +1,19 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import Registry, serve
+
+
+def test_serve_exposes_the_process_registry():
+    registry = Registry(min_interval=0)
+    registry.counter("alerts_total", "Alerts delivered").inc(3)
+    server = serve(0, host="127.0.0.1", registry=registry)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        assert "alerts_total 3" in urllib.request.urlopen(url + "/metrics").read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other")
+    finally:
+        server.shutdown()
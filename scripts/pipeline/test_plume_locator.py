@@ -0,0 +1,30 @@
+import math
+
+import numpy as np
+import pytest
+
+from plume_locator import PlumeParticleFilter, confidence_ellipse, plume
+
+
+def test_confidence_ellipse_accepts_any_level():
+    ellipse = confidence_ellipse(np.diag([4.0, 1.0]), 0.8)
+    assert math.isclose(ellipse["major"], 2 * math.sqrt(-2 * math.log(0.2)))
+    assert math.isclose(confidence_ellipse(np.eye(2), 0.95)["major"] ** 2, 5.991, rel_tol=1e-3)
+    with pytest.raises(ValueError):
+        confidence_ellipse(np.eye(2), 1.0)
+
+
+def test_particle_filter_ellipse_covers_the_source():
+    # The demo survey, where the filter used to settle 2.5 m away inside a 0.4 m ellipse
+    rng = np.random.default_rng(1)
+    source = (620.0, 410.0, 80.0, 60.0, 5.0)
+    x = rng.uniform(0, 1000, 5000)
+    y = rng.uniform(0, 1000, 5000)
+    values = plume(x, y, *source) + rng.normal(0, 1.0, len(x))
+    pf = PlumeParticleFilter((0, 0, 1000, 1000), particles=2000, noise=1.0, background=5.0, seed=0)
+    for i in range(0, len(x), 100):
+        pf.update(x[i:i + 100], y[i:i + 100], values[i:i + 100])
+    estimate = pf.estimate()
+    error = np.array([estimate["x"] - source[0], estimate["y"] - source[1]])
+    assert error @ np.linalg.pinv(estimate["covariance"]) @ error < 5.991
+    assert abs(estimate["strength"] - source[2]) < 2.0
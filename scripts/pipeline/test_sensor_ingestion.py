@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+from sensor_ingestion import SensorIngestion, FakeSensor
+
+
+def write_lines(sensor, values):
+    os.write(sensor.master, b"".join(f"{value}\n".encode() for value in values))
+
+
+async def wait_for_readings(ingestion, count):
+    async def poll():
+        while sum(port.readings for port in ingestion.ports) < count:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), 2.0)
+
+
+def drain(subscription):
+    readings = []
+    while not subscription.queue.empty():
+        readings.append(subscription.queue.get_nowait())
+    return readings
+
+
+def ingest(policies, maxsize, gas_values, flood_values):
+    """Feed two fake sensors through one ingestion; returns the subscriptions and the ingestion."""
+    async def run():
+        gas, flood = FakeSensor(None), FakeSensor(None)
+        ingestion = SensorIngestion()
+        ingestion.add_port(gas.device, "gas", sensor_id="gas-1")
+        ingestion.add_port(flood.device, "flood", sensor_id="flood-1")
+        subscriptions = [ingestion.subscribe(maxsize, policy) for policy in policies]
+        # Opening a port switches the pty to raw mode, which flushes pending input
+        ingestion.start()
+        try:
+            write_lines(gas, gas_values)
+            await wait_for_readings(ingestion, len(gas_values))
+            write_lines(flood, flood_values)
+            await wait_for_readings(ingestion, len(gas_values) + len(flood_values))
+            return subscriptions, ingestion
+        finally:
+            ingestion.stop()
+            gas.close()
+            flood.close()
+
+    return asyncio.run(run())
+
+
+def test_lines_become_readings_in_order_across_ports():
+    (subscription,), ingestion = ingest(["drop_oldest"], 100, [1.5, 2.5, 3.5], [60.0, 61.0])
+    readings = drain(subscription)
+    assert [(r.sensor_id, r.sensor_type, r.value, r.unit) for r in readings] == [
+        ("gas-1", "gas", 1.5, "ppm"), ("gas-1", "gas", 2.5, "ppm"), ("gas-1", "gas", 3.5, "ppm"),
+        ("flood-1", "flood", 60.0, "cm"), ("flood-1", "flood", 61.0, "cm")]
+    assert [r.sequence for r in readings] == [0, 1, 2, 0, 1]
+    assert all(a.timestamp <= b.timestamp for a, b in zip(readings, readings[1:]))
+    assert ingestion.stats()["ports"] == {"gas-1": {"readings": 3, "parse_errors": 0},
+                                          "flood-1": {"readings": 2, "parse_errors": 0}}
+
+
+def test_full_subscriptions_drop_oldest_or_newest():
+    (oldest, newest), ingestion = ingest(["drop_oldest", "drop_newest"], 3, [1, 2, 3, 4], [10, 11])
+    assert [r.value for r in drain(oldest)] == [4, 10, 11]
+    assert [r.value for r in drain(newest)] == [1, 2, 3]
+    assert oldest.dropped == 3 and newest.dropped == 3
+    assert ingestion.stats()["dropped"] == 6
+
+
+def test_backpressure_pauses_reading_without_dropping():
+    async def run():
+        gas, flood = FakeSensor(None), FakeSensor(None)
+        ingestion = SensorIngestion()
+        ingestion.add_port(gas.device, "gas", sensor_id="gas-1")
+        ingestion.add_port(flood.device, "flood", sensor_id="flood-1")
+        subscription = ingestion.subscribe(2, "backpressure")
+        ingestion.start()
+        try:
+            write_lines(gas, [1, 2, 3, 4])
+            await wait_for_readings(ingestion, 4)
+            assert ingestion.paused and subscription.queue.full()
+
+            # Nothing is read from either port while paused
+            write_lines(flood, [10, 11])
+            await asyncio.sleep(0.05)
+            assert ingestion.ports[1].readings == 0
+
+            received = [(await asyncio.wait_for(subscription.get(), 1.0)).value for _ in range(6)]
+            return received, ingestion
+        finally:
+            ingestion.stop()
+            gas.close()
+            flood.close()
+
+    received, ingestion = asyncio.run(run())
+    assert received == [1, 2, 3, 4, 10, 11]
+    assert not ingestion.paused
+    assert ingestion.stats()["dropped"] == 0
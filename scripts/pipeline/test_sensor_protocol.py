@@ -0,0 +1,50 @@
+import numpy as np
+
+from sensor_protocol import SensorStreamDecoder, encode_batch, SENSOR_CODES
+
+
+def corrupted(frame):
+    frame = bytearray(frame)
+    frame[-6] ^= 0xFF
+    return bytes(frame)
+
+
+def decode_in_chunks(stream, step):
+    decoder = SensorStreamDecoder()
+    batches = [decoder.feed(stream[i:i + step]) for i in range(0, len(stream), step)]
+    return decoder, {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+
+def test_samples_keep_arrival_order():
+    stream = (b"0.5\n" + encode_batch("gas", 1, 1000, 10, [1.0, 2.0]) + b"3.5\n" +
+              encode_batch("flood", 1, 0, 10, [7.0]) + b"4.5\n")
+    decoder, batch = decode_in_chunks(stream, len(stream))
+    assert batch["value"].tolist() == [0.5, 1.0, 2.0, 3.5, 7.0, 4.5]
+    assert batch["binary"].tolist() == [False, True, True, False, True, False]
+    assert batch["sensor_type"][4] == SENSOR_CODES["flood"]
+    assert batch["time_ms"][1:3].tolist() == [1000.0, 1010.0]
+
+
+def test_corrupted_frame_does_not_swallow_next_line():
+    stream = (encode_batch("gas", 1, 0, 10, [1.0]) + corrupted(encode_batch("gas", 2, 10, 10, [9.0])) +
+              b"3.5\n" + encode_batch("gas", 3, 20, 10, [2.0]))
+    for step in (1, 3, len(stream)):
+        decoder, batch = decode_in_chunks(stream, step)
+        assert batch["value"].tolist() == [1.0, 3.5, 2.0]
+        assert decoder.crc_errors == 1
+        assert decoder.ascii_errors == 0
+        assert decoder.lost_frames == 1
+
+
+def test_line_cut_by_a_frame_is_an_error():
+    stream = b"1.5\n2." + encode_batch("gas", 1, 0, 10, [1.0]) + b"4.5\n"
+    decoder, batch = decode_in_chunks(stream, len(stream))
+    assert batch["value"].tolist() == [1.5, 1.0, 4.5]
+    assert decoder.ascii_errors == 1
+
+
+def test_garbage_without_line_breaks_is_dropped():
+    decoder = SensorStreamDecoder()
+    assert len(decoder.feed(b"x" * 100)["value"]) == 0
+    assert decoder.feed(b"\n6.25\n")["value"].tolist() == [6.25]
+    assert decoder.ascii_errors == 1
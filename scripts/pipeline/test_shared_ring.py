@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from shared_ring import SharedRing
+
+READER = """
+import sys
+sys.path.insert(0, {path!r})
+from shared_ring import SharedRing
+ring = SharedRing.attach({name!r})
+print(ring.latest("gas")[1])
+ring.close()
+"""
+
+
+def test_exiting_reader_leaves_ring_in_place():
+    name = f"test_ring_{os.getpid()}"
+    ring = SharedRing.create(name, ["gas", "flood"], capacity=16)
+    try:
+        ring.write("gas", 4.5, 1.0)
+        script = READER.format(path=os.path.dirname(os.path.abspath(__file__)), name=name)
+        # Independently started readers, each with its own resource tracker
+        for _ in range(2):
+            result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+            assert result.stdout.strip() == "4.5"
+    finally:
+        ring.close()
+
+
+def test_history_wraps_around():
+    name = f"test_ring_history_{os.getpid()}"
+    ring = SharedRing.create(name, ["gas"], capacity=8)
+    try:
+        ring.write_many("gas", np.arange(6.0), np.arange(6.0) / 10)
+        ring.write_many("gas", np.arange(6.0, 12.0), np.arange(6.0, 12.0) / 10)
+        times, values = ring.read_history("gas", 5)
+        assert values.tolist() == [7.0, 8.0, 9.0, 10.0, 11.0]
+        assert ring.latest("gas") == (1.1, 11.0, 12)
+    finally:
+        ring.close()
@@ -0,0 +1,284 @@
+import sqlite3
+import sys
+import time
+import numpy as np
+
+# Rollup resolutions in seconds, finest first
+RESOLUTIONS = (1, 60, 3600)
+
+# Default retention in seconds per table (None keeps data forever)
+RETENTION = {
+    "raw": 7 * 86400,
+    1: 30 * 86400,
+    60: 365 * 86400,
+    3600: None,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    drone_id TEXT NOT NULL,
+    sensor_type TEXT NOT NULL,
+    sensor_id TEXT NOT NULL,
+    UNIQUE (drone_id, sensor_type, sensor_id)
+);
+CREATE TABLE IF NOT EXISTS readings (
+    series_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS readings_by_series_time ON readings (series_id, ts, value);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_{resolution} (
+    series_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    last_value REAL NOT NULL,
+    PRIMARY KEY (series_id, bucket)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO rollup_{resolution} (series_id, bucket, count, sum, min, max, last_ts, last_value)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (series_id, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max),
+    last_value = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_value ELSE last_value END,
+    last_ts = MAX(last_ts, excluded.last_ts)
+"""
+
+
+def group_buckets(series_ids, timestamps, values, resolution):
+    """Pre-aggregate a batch into (series, bucket) rows with NumPy."""
+    buckets = np.floor(timestamps / resolution).astype(np.int64)
+    order = np.lexsort((timestamps, buckets, series_ids))
+    series_ids, buckets, timestamps, values = series_ids[order], buckets[order], timestamps[order], values[order]
+
+    starts = np.flatnonzero(np.r_[True, (series_ids[1:] != series_ids[:-1]) | (buckets[1:] != buckets[:-1])])
+    ends = np.r_[starts[1:], len(values)] - 1
+    return zip(series_ids[starts].tolist(), buckets[starts].tolist(),
+               np.diff(np.r_[starts, len(values)]).tolist(),
+               np.add.reduceat(values, starts).tolist(),
+               np.minimum.reduceat(values, starts).tolist(),
+               np.maximum.reduceat(values, starts).tolist(),
+               timestamps[ends].tolist(), values[ends].tolist())
+
+
+class TimeSeriesStore:
+    """
+    Append-only store for hazard readings on SQLite in WAL mode.
+
+    Readings are buffered and written in batches; each batch also updates
+    the 1 s / 1 min / 1 h rollup tables, so aggregate queries read a
+    handful of pre-computed buckets instead of raw data. compact() applies
+    the retention policy.
+    """
+
+    def __init__(self, path="hazard_readings.db", batch_size=5000, flush_interval=1.0, retention=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = dict(RETENTION)
+        self.retention.update(retention or {})
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        for resolution in RESOLUTIONS:
+            self.db.executescript(ROLLUP_SCHEMA.format(resolution=resolution))
+        self.db.commit()
+
+        self.series_ids = {}
+        for series_id, drone_id, sensor_type, sensor_id in self.db.execute(
+                "SELECT id, drone_id, sensor_type, sensor_id FROM series"):
+            self.series_ids[(drone_id, sensor_type, sensor_id)] = series_id
+
+        self.pending_series = []
+        self.pending_ts = []
+        self.pending_values = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def series_id(self, drone_id, sensor_type, sensor_id=""):
+        """Id of a series, created on first use."""
+        key = (drone_id, sensor_type, sensor_id)
+        series_id = self.series_ids.get(key)
+        if series_id is None:
+            cursor = self.db.execute("INSERT OR IGNORE INTO series (drone_id, sensor_type, sensor_id) VALUES (?, ?, ?)", key)
+            series_id = cursor.lastrowid or self.db.execute(
+                "SELECT id FROM series WHERE drone_id = ? AND sensor_type = ? AND sensor_id = ?", key).fetchone()[0]
+            self.series_ids[key] = series_id
+        return series_id
+
+    def find_series(self, drone_id=None, sensor_type=None):
+        """Ids of the series matching the given drone and/or sensor type."""
+        return [series_id for (drone, kind, _), series_id in self.series_ids.items()
+                if (drone_id is None or drone == drone_id) and (sensor_type is None or kind == sensor_type)]
+
+    # Writes
+
+    def append(self, drone_id, sensor_type, value, timestamp=None, sensor_id=""):
+        self.pending_series.append(self.series_id(drone_id, sensor_type, sensor_id))
+        self.pending_ts.append(time.time() if timestamp is None else timestamp)
+        self.pending_values.append(value)
+        self._maybe_flush()
+
+    def append_many(self, series_id, timestamps, values):
+        """Append arrays of readings of one series."""
+        self.pending_series.extend([series_id] * len(values))
+        self.pending_ts.extend(np.asarray(timestamps, dtype=np.float64).tolist())
+        self.pending_values.extend(np.asarray(values, dtype=np.float64).tolist())
+        self._maybe_flush()
+
+    def append_readings(self, readings, drone_id="local"):
+        """Append Reading tuples from the sensor ingestion service."""
+        for reading in readings:
+            self.pending_series.append(self.series_id(drone_id, reading.sensor_type, reading.sensor_id))
+            self.pending_ts.append(reading.timestamp)
+            self.pending_values.append(reading.value)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (len(self.pending_values) >= self.batch_size or
+                time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write the buffered readings and fold them into the rollups in one transaction."""
+        self.last_flush = time.monotonic()
+        if not self.pending_values:
+            return
+        series_ids = np.array(self.pending_series, dtype=np.int64)
+        timestamps = np.array(self.pending_ts, dtype=np.float64)
+        values = np.array(self.pending_values, dtype=np.float64)
+        self.pending_series, self.pending_ts, self.pending_values = [], [], []
+
+        with self.db:
+            self.db.executemany("INSERT INTO readings (series_id, ts, value) VALUES (?, ?, ?)",
+                                zip(series_ids.tolist(), timestamps.tolist(), values.tolist()))
+            for resolution in RESOLUTIONS:
+                self.db.executemany(ROLLUP_UPSERT.format(resolution=resolution),
+                                    group_buckets(series_ids, timestamps, values, resolution))
+
+    # Queries
+
+    def range(self, series_id, start, end):
+        """Raw readings of a series in [start, end) as (timestamps, values) arrays."""
+        rows = self.db.execute("SELECT ts, value FROM readings WHERE series_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                               (series_id, start, end)).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return data[:, 0], data[:, 1]
+
+    def downsample(self, series_id, start, end, resolution=60):
+        """Rollup buckets of a series in [start, end): dict of arrays (bucket start, count, mean, min, max)."""
+        rows = self.db.execute(
+            f"SELECT bucket, count, sum, min, max FROM rollup_{resolution} "
+            "WHERE series_id = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (series_id, int(np.floor(start / resolution)), int(np.ceil(end / resolution)))).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        return {"time": data[:, 0] * resolution, "count": data[:, 1],
+                "mean": data[:, 2] / np.maximum(data[:, 1], 1), "min": data[:, 3], "max": data[:, 4]}
+
+    def aggregate(self, series_id, start, end):
+        """
+        count, mean, min and max of a series over [start, end).
+        The range is covered by the coarsest buckets that fit inside it;
+        only the unaligned edges are read from finer rollups or raw data.
+        """
+        parts = []
+        self._cover(series_id, start, end, len(RESOLUTIONS) - 1, parts)
+        count = sum(part[0] for part in parts)
+        if count == 0:
+            return {"count": 0, "mean": None, "min": None, "max": None}
+        return {"count": count,
+                "mean": sum(part[1] for part in parts) / count,
+                "min": min(part[2] for part in parts if part[0]),
+                "max": max(part[3] for part in parts if part[0])}
+
+    def _cover(self, series_id, start, end, level, parts):
+        if start >= end:
+            return
+        if level < 0:
+            parts.append(self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(value), 0), MIN(value), MAX(value) FROM readings "
+                "WHERE series_id = ? AND ts >= ? AND ts < ?", (series_id, start, end)).fetchone())
+            return
+        resolution = RESOLUTIONS[level]
+        first = int(np.ceil(start / resolution))
+        last = int(np.floor(end / resolution))
+        if first >= last:
+            self._cover(series_id, start, end, level - 1, parts)
+            return
+        parts.append(self.db.execute(
+            f"SELECT COALESCE(SUM(count), 0), COALESCE(SUM(sum), 0), MIN(min), MAX(max) FROM rollup_{resolution} "
+            "WHERE series_id = ? AND bucket >= ? AND bucket < ?", (series_id, first, last)).fetchone())
+        self._cover(series_id, start, first * resolution, level - 1, parts)
+        self._cover(series_id, last * resolution, end, level - 1, parts)
+
+    # Retention
+
+    def compact(self, now=None):
+        """Delete data older than the retention of each table and checkpoint the WAL."""
+        now = time.time() if now is None else now
+        self.flush()
+        with self.db:
+            for series_id in self.series_ids.values():
+                if self.retention["raw"] is not None:
+                    self.db.execute("DELETE FROM readings WHERE series_id = ? AND ts < ?",
+                                    (series_id, now - self.retention["raw"]))
+                for resolution in RESOLUTIONS:
+                    if self.retention.get(resolution) is not None:
+                        self.db.execute(f"DELETE FROM rollup_{resolution} WHERE series_id = ? AND bucket < ?",
+                                        (series_id, int((now - self.retention[resolution]) // resolution)))
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def benchmark(path, days=21, series=3, rate_hz=0.2):
+    """Fill a store with days of readings and time a few typical queries."""
+    store = TimeSeriesStore(path, batch_size=50_000, retention={"raw": None, 1: None, 60: None})
+    rng = np.random.default_rng(0)
+    end = 1_700_000_000.0
+    start = end - days * 86400
+    ids = [store.series_id(f"drone-{i}", "gas") for i in range(series)]
+
+    t0 = time.perf_counter()
+    chunk = 86400
+    for day_start in np.arange(start, end, chunk):
+        timestamps = np.arange(day_start, min(day_start + chunk, end), 1 / rate_hz)
+        for series_id in ids:
+            store.append_many(series_id, timestamps, 5 + rng.normal(0, 1, len(timestamps)))
+    store.flush()
+    written = days * 86400 * rate_hz * series
+    print(f"Wrote {written:.0f} readings in {time.perf_counter() - t0:.1f} s")
+
+    for label, query in (
+            ("aggregate over all days", lambda: store.aggregate(ids[0], start + 1234.5, end - 77.7)),
+            ("aggregate over one day", lambda: store.aggregate(ids[0], end - 86400 - 5.5, end - 3.3)),
+            ("1 h rollup over all days", lambda: store.downsample(ids[0], start, end, 3600)),
+            ("raw range over 10 min", lambda: store.range(ids[0], end - 3600, end - 3000))):
+        t0 = time.perf_counter()
+        query()
+        print(f"{label}: {(time.perf_counter() - t0) * 1000:.2f} ms")
+    print(store.aggregate(ids[0], start, end))
+    store.close()
+
+
+if __name__ == "__main__":
+    # Usage: python timeseries_store.py --benchmark [database path]
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark(sys.argv[2] if len(sys.argv) > 2 else "benchmark_readings.db")
+    else:
+        print("Usage: python timeseries_store.py --benchmark [database path]")
@@ -0,0 +1,274 @@
+import sys
+import time
+import numpy as np
+
+
+def points_in_polygon(x, y, polygon):
+    """Even-odd test of many points against one polygon (list of (x, y) vertices), vectorized over both."""
+    vertices = np.asarray(polygon, dtype=np.float64)
+    x0, y0 = vertices[:, 0], vertices[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    px, py = np.asarray(x)[:, None], np.asarray(y)[:, None]
+    crosses = (y0 > py) != (y1 > py)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intersect_x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+    return (crosses & (px < intersect_x)).sum(axis=1) % 2 == 1
+
+
+def partition_area(polygon, cell_size, holes=()):
+    """Centres of the square cells of size cell_size lying inside polygon and outside every hole."""
+    vertices = np.asarray(polygon, dtype=np.float64)
+    (min_x, min_y), (max_x, max_y) = vertices.min(axis=0), vertices.max(axis=0)
+    columns = np.arange(min_x + cell_size / 2, max_x, cell_size)
+    rows = np.arange(min_y + cell_size / 2, max_y, cell_size)
+    x, y = (axis.ravel() for axis in np.meshgrid(columns, rows))
+    inside = points_in_polygon(x, y, polygon)
+    for hole in holes:
+        inside &= ~points_in_polygon(x, y, hole)
+    return np.column_stack((x[inside], y[inside]))
+
+
+def auction(cost, capacity, final_epsilon=None):
+    """
+    Minimum-cost assignment of rows (drones) to columns (regions) where column
+    j takes at most capacity[j] rows, by the Jacobi auction algorithm with
+    epsilon scaling. All unassigned rows bid in one vectorized step per round;
+    each column keeps its highest bids. Returns (owner, prices); the total
+    cost is within rows * final_epsilon of optimal.
+    """
+    rows, columns = cost.shape
+    capacity = np.asarray(capacity, dtype=np.int64)
+    if capacity.sum() < rows:
+        raise ValueError("not enough capacity for every row")
+    value = -cost
+    spread = float(np.ptp(cost)) or 1.0
+    final_epsilon = final_epsilon or spread / (10 * rows)
+    epsilon = max(spread / 10, final_epsilon)
+    owner = np.full(rows, -1, dtype=np.int64)
+    prices = np.zeros(columns)
+    bids = np.zeros(rows)
+    index = np.arange(rows)
+
+    while True:
+        while True:
+            unassigned = index[owner < 0]
+            if not len(unassigned):
+                break
+            net = value[unassigned] - prices
+            if columns > 1:
+                top_two = np.argpartition(-net, 1, axis=1)[:, :2]
+                first = np.take_along_axis(net, top_two, axis=1)
+                swap = first[:, 1] > first[:, 0]
+                best = np.where(swap, top_two[:, 1], top_two[:, 0])
+                margin = np.abs(first[:, 0] - first[:, 1])
+            else:
+                best = np.zeros(len(unassigned), dtype=np.int64)
+                margin = np.zeros(len(unassigned))
+            new_bids = prices[best] + margin + epsilon
+
+            # Every column keeps its capacity[j] highest bids among its holders and the new bidders
+            held = index[owner >= 0]
+            candidates = np.r_[held, unassigned]
+            candidate_owner = np.r_[owner[held], best]
+            candidate_bid = np.r_[bids[held], new_bids]
+            order = np.lexsort((-candidate_bid, candidate_owner))
+            sorted_owner = candidate_owner[order]
+            starts = np.flatnonzero(np.r_[True, sorted_owner[1:] != sorted_owner[:-1]])
+            rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+            kept = rank < capacity[sorted_owner]
+
+            owner[candidates] = -1
+            owner[candidates[order[kept]]] = sorted_owner[kept]
+            bids[candidates[order[kept]]] = candidate_bid[order[kept]]
+
+            # A full column's price is the lowest bid it holds
+            counts = np.bincount(sorted_owner[kept], minlength=columns)
+            lowest = np.full(columns, np.inf)
+            np.minimum.at(lowest, sorted_owner[kept], candidate_bid[order[kept]])
+            prices = np.where(counts >= capacity, lowest, prices)
+        if epsilon <= final_epsilon:
+            return owner, prices
+        # Next scaling phase: keep the prices, re-run with a finer epsilon
+        epsilon = max(epsilon / 5, final_epsilon)
+        owner[:] = -1
+
+
+def coverage_path(cells, cell_size, start=None):
+    """Serpentine (boustrophedon) order over a set of cell centres, starting at the end nearest to start."""
+    if not len(cells):
+        return cells
+    row = np.round(cells[:, 1] / cell_size).astype(np.int64)
+    direction = np.where((row - row.min()) % 2 == 0, 1.0, -1.0)
+    path = cells[np.lexsort((cells[:, 0] * direction, row))]
+    if start is not None and np.hypot(*(path[-1] - start)) < np.hypot(*(path[0] - start)):
+        path = path[::-1]
+    return path
+
+
+def path_length(path, start=None):
+    points = path if start is None else np.vstack([start, path])
+    return float(np.hypot(*np.diff(points, axis=0).T).sum()) if len(points) > 1 else 0.0
+
+
+def bisect_cells(cells, indices, parts):
+    """
+    Split cells into parts compact groups of (nearly) equal size by
+    recursive coordinate bisection along the longer side.
+    """
+    if parts == 1:
+        return [indices]
+    points = cells[indices]
+    axis = int(np.argmax(np.ptp(points, axis=0))) if len(points) else 0
+    left_parts = parts // 2
+    cut = round(len(indices) * left_parts / parts)
+    order = np.argsort(points[:, axis], kind='stable')
+    return (bisect_cells(cells, indices[order[:cut]], left_parts) +
+            bisect_cells(cells, indices[order[cut:]], parts - left_parts))
+
+
+def distances(points, others):
+    return np.hypot(points[:, None, 0] - others[None, :, 0], points[:, None, 1] - others[None, :, 1])
+
+
+class CoveragePlanner:
+    """
+    Splits a polygonal search area into cells, partitions them into one
+    compact, equally sized region per drone by recursive bisection and
+    matches drones to regions with an auction on the drone-to-region
+    distance matrix. Every drone gets a serpentine coverage path.
+
+    Re-planning is local: the cells of a lost drone are split among the
+    drones with the nearest regions, and hotspot cells are split among the
+    nearest drones and put first on their paths.
+    """
+
+    def __init__(self, polygon, cell_size=50.0, holes=(), neighbours=4):
+        self.cells = partition_area(polygon, cell_size, holes)
+        self.cell_size = cell_size
+        self.neighbours = neighbours
+        self.priority = np.zeros(len(self.cells), dtype=bool)
+        self.drone_ids = []
+        self.positions = None
+        self.active = None
+        self.owner = None
+        self.paths = {}
+
+    def plan(self, drone_ids, positions):
+        """Assign every cell to one of the drones (positions in local metres) and build their paths."""
+        self.drone_ids = list(drone_ids)
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.active = np.ones(len(self.drone_ids), dtype=bool)
+        self.owner = np.full(len(self.cells), -1, dtype=np.int64)
+        self._distribute(np.arange(len(self.cells)), np.arange(len(self.drone_ids)))
+        self._build_paths(range(len(self.drone_ids)))
+        return self.paths
+
+    def _distribute(self, cells, drones, anchors=None):
+        """Split cells into one region per drone and give each drone the region nearest to its anchor."""
+        regions = bisect_cells(self.cells, cells, len(drones))
+        centroids = np.array([self.cells[region].mean(axis=0) if len(region) else (np.inf, np.inf)
+                              for region in regions])
+        anchors = self.positions[drones] if anchors is None else anchors
+        cost = distances(anchors, np.nan_to_num(centroids, posinf=1e9))
+        matched, _ = auction(cost, np.ones(len(regions)), final_epsilon=self.cell_size / len(drones))
+        for drone, region in zip(drones, matched):
+            self.owner[regions[region]] = drone
+
+    def _nearest_drones(self, point, count):
+        active = np.flatnonzero(self.active)
+        order = np.argsort(np.hypot(*(self.positions[active] - point).T))
+        return active[order[:count]]
+
+    def drop_drone(self, drone_id):
+        """Hand the cells of a lost drone to the drones whose regions are nearest."""
+        j = self.drone_ids.index(drone_id)
+        self.active[j] = False
+        self.paths.pop(drone_id, None)
+        orphans = np.flatnonzero(self.owner == j)
+        self.owner[orphans] = -1
+        if not len(orphans):
+            return []
+
+        # Neighbours are judged by where their regions are, not where the drones are now
+        active = np.flatnonzero(self.active)
+        centroids = np.array([self.cells[self.owner == k].mean(axis=0) if np.any(self.owner == k)
+                              else self.positions[k] for k in active])
+        centre = self.cells[orphans].mean(axis=0)
+        nearest = active[np.argsort(np.hypot(*(centroids - centre).T))[:min(self.neighbours, len(active))]]
+        self._distribute(orphans, nearest, centroids[np.searchsorted(active, nearest)])
+        self._build_paths(nearest)
+        return [self.drone_ids[k] for k in nearest]
+
+    def add_hotspot(self, x, y, radius, positions=None):
+        """
+        Mark the cells around a hotspot as urgent, split them among the
+        drones nearest to it (of those currently nearest and those that had
+        the cells), and put them first on their paths. Returns every drone
+        whose cells changed.
+        """
+        if positions is not None:
+            self.positions = np.asarray(positions, dtype=np.float64)
+        near = np.flatnonzero(np.hypot(self.cells[:, 0] - x, self.cells[:, 1] - y) <= radius)
+        if not len(near):
+            return []
+        self.priority[near] = True
+        previous = np.unique(self.owner[near])
+        previous = previous[previous >= 0]
+        hotspot = np.array([x, y])
+        candidates = np.union1d(self._nearest_drones(hotspot, min(self.neighbours, len(near))), previous)
+        order = np.argsort(np.hypot(*(self.positions[candidates] - hotspot).T), kind='stable')
+        drones = candidates[order[:len(near)]]
+        self._distribute(near, drones)
+        # Previous owners that lost cells need new paths as well
+        changed = np.union1d(drones, previous)
+        self._build_paths(changed)
+        return [self.drone_ids[k] for k in changed]
+
+    def _build_paths(self, drones):
+        for j in drones:
+            if not self.active[j]:
+                continue
+            mine = self.owner == j
+            start = self.positions[j]
+            urgent = coverage_path(self.cells[mine & self.priority], self.cell_size, start)
+            after = urgent[-1] if len(urgent) else start
+            rest = coverage_path(self.cells[mine & ~self.priority], self.cell_size, after)
+            self.paths[self.drone_ids[j]] = np.vstack([urgent, rest]) if len(urgent) else rest
+
+    def summary(self):
+        lengths = [path_length(path, self.positions[self.drone_ids.index(drone_id)])
+                   for drone_id, path in self.paths.items()]
+        counts = np.bincount(self.owner[self.owner >= 0], minlength=len(self.drone_ids))[self.active]
+        return {"cells": len(self.cells), "drones": int(self.active.sum()),
+                "cells_per_drone": (int(counts.min()), int(counts.max())),
+                "longest_path": round(max(lengths)), "total_path": round(sum(lengths))}
+
+
+def benchmark(drones=100, cell_size=40.0):
+    """Plan an irregular 4 x 3 km zone with a lake for a swarm launched from two sites."""
+    polygon = [(0, 0), (4000, 0), (4000, 1800), (3200, 3000), (1500, 2600), (0, 3000)]
+    lake = [(1800, 900), (2600, 900), (2600, 1500), (1800, 1500)]
+    rng = np.random.default_rng(0)
+    positions = np.vstack([rng.normal((200, 200), 50, (drones // 2, 2)),
+                           rng.normal((3800, 1600), 50, (drones - drones // 2, 2))])
+    drone_ids = [f"drone-{i}" for i in range(drones)]
+
+    start = time.perf_counter()
+    planner = CoveragePlanner(polygon, cell_size, holes=[lake])
+    planner.plan(drone_ids, positions)
+    print(f"Initial plan: {(time.perf_counter() - start) * 1000:.0f} ms, {planner.summary()}")
+
+    start = time.perf_counter()
+    affected = planner.drop_drone("drone-7")
+    print(f"Drone drop-out: {(time.perf_counter() - start) * 1000:.0f} ms, {len(affected)} drones re-planned")
+
+    start = time.perf_counter()
+    affected = planner.add_hotspot(2500, 2400, 200)
+    print(f"Hotspot: {(time.perf_counter() - start) * 1000:.0f} ms, {len(affected)} drones re-planned, "
+          f"{int(planner.priority.sum())} urgent cells")
+    print(planner.summary())
+
+
+if __name__ == "__main__":
+    # Usage: python coverage_planner.py [drones]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
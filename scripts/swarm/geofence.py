@@ -0,0 +1,414 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+EARTH_RADIUS = 6371000.0
+
+# kind is "no_fly" (drones must stay out) or "keep_in" (drones must stay inside one of them);
+# rings are (n, 2) arrays in local metres, the first the outline and any others holes
+Zone = namedtuple("Zone", "name kind rings")
+
+
+def _boxes_overlap(boxes, index, x0, y0, x1, y1):
+    min_x, min_y, max_x, max_y = boxes
+    return ((min_x[index] <= x1) & (max_x[index] >= x0) &
+            (min_y[index] <= y1) & (max_y[index] >= y0))
+
+
+def _expand(pair_point, pair_node, first, count):
+    """Replace every (point, node) pair by (point, child) for each child of the node."""
+    counts = count[pair_node]
+    total = int(counts.sum())
+    starts = np.repeat(first[pair_node] - np.cumsum(counts) + counts, counts)
+    return np.repeat(pair_point, counts), starts + np.arange(total)
+
+
+class CompiledZones:
+    """
+    Immutable, query-ready form of a set of zones.
+
+    Zone bounding boxes are packed into an R-tree by sort-tile-recursive
+    grouping, with the children of every node stored contiguously so a whole
+    batch of points descends it level by level in NumPy. The edges of every
+    zone are bucketed into horizontal bands of its bounding box: a
+    point-in-polygon ray only needs the edges of the point's band, and edges
+    within distance d of a point lie in the bands within d of it.
+    """
+
+    def __init__(self, zones, fanout=4, band_edges=4):
+        self.zones = list(zones)
+        self.names = [zone.name for zone in self.zones]
+        self.keep_in = np.array([zone.kind == "keep_in" for zone in self.zones], dtype=bool)
+        count = len(self.zones)
+
+        edges, owners = [], []
+        for index, zone in enumerate(self.zones):
+            for ring in zone.rings:
+                ring = np.asarray(ring, dtype=np.float64)
+                edges.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+                owners.append(np.full(len(ring), index))
+        edges = np.vstack(edges) if edges else np.empty((0, 4))
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        self.edge_count = len(edges)
+
+        # Bounding boxes
+        self.box = tuple(np.full(count, fill) for fill in (np.inf, np.inf, -np.inf, -np.inf))
+        if count:
+            for column, reduce, box in ((0, np.minimum, 0), (1, np.minimum, 1), (0, np.maximum, 2), (1, np.maximum, 3)):
+                reduce.at(self.box[box], owners, edges[:, column])
+
+        # Edge bands: each zone gets its own band grid, all bands share one CSR layout
+        per_zone = np.bincount(owners, minlength=count)
+        self.bands = np.maximum(1, np.ceil(per_zone / band_edges)).astype(np.int64)
+        self.band_first = np.r_[0, np.cumsum(self.bands)[:-1]].astype(np.int64)
+        height = (self.box[3] - self.box[1]) / self.bands
+        self.band_height = np.where(height > 0, height, 1.0)
+        low = self._band(owners, np.minimum(edges[:, 1], edges[:, 3]))
+        high = self._band(owners, np.maximum(edges[:, 1], edges[:, 3]))
+        spans = high - low + 1
+        edge_ids = np.repeat(np.arange(len(edges)), spans)
+        band_ids = (np.repeat(self.band_first[owners] + low - np.cumsum(spans) + spans, spans) +
+                    np.arange(int(spans.sum())))
+        order = np.argsort(band_ids, kind='stable')
+        self.edges = tuple(np.ascontiguousarray(column) for column in edges[edge_ids[order]].T)
+        self.band_start = np.searchsorted(band_ids[order], np.arange(int(self.bands.sum()) + 1))
+
+        self._build_tree(fanout)
+
+    def _band(self, zone, y):
+        band = np.floor((y - self.box[1][zone]) / self.band_height[zone]).astype(np.int64)
+        return np.clip(band, 0, self.bands[zone] - 1)
+
+    def _build_tree(self, fanout):
+        count = len(self.zones)
+        centre_x = (self.box[0] + self.box[2]) / 2
+        centre_y = (self.box[1] + self.box[3]) / 2
+        # Sort-tile-recursive: vertical slabs by x, each sorted by y
+        slabs = max(1, math.ceil(math.sqrt(count / fanout)))
+        by_x = np.argsort(centre_x, kind='stable')
+        slab = np.empty(count, dtype=np.int64)
+        slab[by_x] = np.arange(count) * slabs // max(count, 1)
+        self.leaf_zone = np.lexsort((centre_y, slab))
+        boxes = tuple(side[self.leaf_zone] for side in self.box)
+        self.leaf_box = boxes
+
+        # Parents group consecutive children; levels[0] is the root
+        self.levels = []
+        while len(boxes[0]) > 1 or not self.levels:
+            starts = np.arange(0, len(boxes[0]), fanout)
+            if not len(starts):
+                starts = np.zeros(1, dtype=np.int64)
+                boxes = tuple(np.array([fill]) for fill in (np.inf, np.inf, -np.inf, -np.inf))
+                counts = np.zeros(1, dtype=np.int64)
+            else:
+                counts = np.diff(np.r_[starts, len(boxes[0])])
+                boxes = (np.minimum.reduceat(boxes[0], starts), np.minimum.reduceat(boxes[1], starts),
+                         np.maximum.reduceat(boxes[2], starts), np.maximum.reduceat(boxes[3], starts))
+            self.levels.insert(0, (boxes, starts, counts))
+
+    def candidates(self, x, y, margin=0.0):
+        """(point, zone) pairs whose zone bounding box, grown by margin, contains the point."""
+        x0, y0, x1, y1 = x - margin, y - margin, x + margin, y + margin
+        pair_point = np.arange(len(x))
+        pair_node = np.zeros(len(x), dtype=np.int64)
+        for boxes, first, count in self.levels:
+            keep = _boxes_overlap(boxes, pair_node, x0[pair_point], y0[pair_point], x1[pair_point], y1[pair_point])
+            pair_point, pair_node = _expand(pair_point[keep], pair_node[keep], first, count)
+        keep = _boxes_overlap(self.leaf_box, pair_node, x0[pair_point], y0[pair_point],
+                              x1[pair_point], y1[pair_point])
+        return pair_point[keep], self.leaf_zone[pair_node[keep]]
+
+    def _band_edges(self, pair_zone, low, high):
+        """(pair, edge row) for the edges in bands low..high of each pair's zone."""
+        first = self.band_start[self.band_first[pair_zone] + low]
+        last = self.band_start[self.band_first[pair_zone] + high + 1]
+        return _expand(np.arange(len(pair_zone)), np.arange(len(pair_zone)), first, last - first)
+
+    def contains(self, x, y, candidates=None):
+        """
+        (point, zone) pairs where the point lies inside the zone (even-odd
+        rule, holes excluded). candidates from a wider candidates() call may
+        be passed in to share one tree descent.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if candidates is None:
+            point, zone = self.candidates(x, y)
+        else:
+            point, zone = candidates
+            keep = _boxes_overlap(self.box, zone, x[point], y[point], x[point], y[point])
+            point, zone = point[keep], zone[keep]
+        if not len(point):
+            return point, zone
+        band = self._band(zone, y[point])
+        pair, edge = self._band_edges(zone, band, band)
+        ex0, ey0, ex1, ey1 = (column[edge] for column in self.edges)
+        px, py = x[point[pair]], y[point[pair]]
+        crosses = (ey0 > py) != (ey1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hit = crosses & (px < ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0))
+        inside = np.bincount(pair[hit], minlength=len(point)) % 2 == 1
+        return point[inside], zone[inside]
+
+    def distance(self, x, y, max_distance, candidates=None):
+        """
+        Distance from every point to the nearest zone boundary and that
+        zone's index; inf and -1 where no boundary is within max_distance.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        distance = np.full(len(x), np.inf)
+        nearest = np.full(len(x), -1, dtype=np.int64)
+        point, zone = self.candidates(x, y, max_distance) if candidates is None else candidates
+        if not len(point):
+            return distance, nearest
+        py = y[point]
+        pair, edge = self._band_edges(zone, self._band(zone, py - max_distance), self._band(zone, py + max_distance))
+        ex0, ey0, ex1, ey1 = (column[edge] for column in self.edges)
+        px, py = x[point[pair]], y[point[pair]]
+        dx, dy = ex1 - ex0, ey1 - ey0
+        length = dx * dx + dy * dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.clip(np.where(length > 0, ((px - ex0) * dx + (py - ey0) * dy) / length, 0.0), 0.0, 1.0)
+        d = np.hypot(ex0 + t * dx - px, ey0 + t * dy - py)
+        # Edges of a pair are contiguous: minimum per pair, then per point over its few pairs
+        has_edges = np.bincount(pair, minlength=len(point)) > 0
+        pair_distance = np.full(len(point), np.inf)
+        if len(d):
+            pair_distance[has_edges] = np.minimum.reduceat(d, np.searchsorted(pair, np.flatnonzero(has_edges)))
+        order = np.lexsort((pair_distance, point))
+        point, zone, pair_distance = point[order], zone[order], pair_distance[order]
+        starts = np.flatnonzero(np.r_[True, point[1:] != point[:-1]])
+        found = starts[pair_distance[starts] <= max_distance]
+        distance[point[found]] = pair_distance[found]
+        nearest[point[found]] = zone[found]
+        return distance, nearest
+
+
+class Geofence:
+    """
+    No-fly and keep-in zones checked for whole batches of drone positions.
+
+    Queries read the current CompiledZones once and use only that object, so
+    a reload builds the new zones off to the side and swaps a single
+    reference: queries running meanwhile finish on the old zones, none wait.
+    """
+
+    def __init__(self, origin=None, margin=50.0):
+        self.origin = origin
+        self.margin = margin
+        self.compiled = CompiledZones([])
+        self.reload_lock = threading.Lock()
+        self.reloads = 0
+        self.watcher = None
+
+    def to_local(self, lat, lon):
+        origin_lat, origin_lon = self.origin
+        x = np.radians(np.asarray(lon, dtype=np.float64) - origin_lon) * EARTH_RADIUS * math.cos(math.radians(origin_lat))
+        y = np.radians(np.asarray(lat, dtype=np.float64) - origin_lat) * EARTH_RADIUS
+        return x, y
+
+    def load(self, zones):
+        """Compile zones (local metres) and make them live."""
+        compiled = CompiledZones(zones)
+        with self.reload_lock:
+            self.compiled = compiled
+            self.reloads += 1
+        return compiled
+
+    def load_geojson(self, path):
+        """
+        Load a GeoJSON FeatureCollection of Polygon/MultiPolygon features;
+        properties "name" and "kind" ("no_fly" by default or "keep_in").
+        """
+        with open(path) as f:
+            features = json.load(f)["features"]
+        polygons = []
+        for number, feature in enumerate(features):
+            geometry = feature["geometry"]
+            parts = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+            properties = feature.get("properties") or {}
+            rings = [np.asarray(ring, dtype=np.float64) for part in parts for ring in part]
+            polygons.append((properties.get("name", f"zone-{number}"), properties.get("kind", "no_fly"), rings))
+        if self.origin is None and polygons:
+            lon, lat = np.vstack([ring for _, _, rings in polygons for ring in rings]).mean(axis=0)
+            self.origin = (float(lat), float(lon))
+        zones = []
+        for name, kind, rings in polygons:
+            # GeoJSON rings repeat the first vertex at the end
+            local = [np.column_stack(self.to_local(ring[:-1, 1], ring[:-1, 0])) for ring in rings]
+            zones.append(Zone(name, kind, local))
+        return self.load(zones)
+
+    def watch(self, path, interval=1.0):
+        """Reload the GeoJSON file in a background thread whenever it changes."""
+        def run():
+            loaded = None
+            while True:
+                try:
+                    modified = os.stat(path).st_mtime
+                    if modified != loaded:
+                        self.load_geojson(path)
+                        loaded = modified
+                        print(f"Geofence: {len(self.compiled.zones)} zones loaded from {path}")
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    # A half-written or broken file keeps the previous zones live
+                    print(f"Geofence: failed to load {path}: {e}")
+                time.sleep(interval)
+
+        self.watcher = threading.Thread(target=run, daemon=True)
+        self.watcher.start()
+
+    def check(self, x, y, margin=None):
+        """
+        Check positions in local metres. Returns the zones used and arrays:
+        no_fly (index of a no-fly zone containing the point or -1), outside
+        (True where keep-in zones exist and none contains the point),
+        distance/nearest (closest zone boundary within margin, else inf/-1).
+        """
+        compiled = self.compiled
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        margin = self.margin if margin is None else margin
+        candidates = compiled.candidates(x, y, margin)
+        point, zone = compiled.contains(x, y, candidates)
+        no_fly = np.full(len(x), -1, dtype=np.int64)
+        keep_in = compiled.keep_in[zone]
+        no_fly[point[~keep_in]] = zone[~keep_in]
+        outside = np.zeros(len(x), dtype=bool)
+        if compiled.keep_in.any():
+            outside[:] = True
+            outside[point[keep_in]] = False
+        distance, nearest = compiled.distance(x, y, margin, candidates)
+        return {"zones": compiled, "no_fly": no_fly, "outside": outside, "distance": distance, "nearest": nearest}
+
+    def check_snapshot(self, snapshot):
+        """
+        Check every drone of TelemetryAggregator.snapshot(). Returns
+        {drone_id: (status, zone name, distance)} for drones in violation or
+        within margin of a boundary; status is "no_fly", "outside" or "near".
+        """
+        entries = [(drone_id, entry["lat"], entry["lon"]) for drone_id, entry in snapshot.items()
+                   if entry.get("lat") is not None and entry.get("lon") is not None]
+        if not entries or self.origin is None:
+            return {}
+        drone_ids, lat, lon = zip(*entries)
+        result = self.check(*self.to_local(lat, lon))
+        names = result["zones"].names
+        report = {}
+        for i in np.flatnonzero((result["no_fly"] >= 0) | result["outside"] | (result["nearest"] >= 0)).tolist():
+            distance = float(result["distance"][i])
+            if result["no_fly"][i] >= 0:
+                report[drone_ids[i]] = ("no_fly", names[result["no_fly"][i]], distance)
+            elif result["outside"][i]:
+                report[drone_ids[i]] = ("outside", None, distance)
+            else:
+                report[drone_ids[i]] = ("near", names[result["nearest"][i]], distance)
+        return report
+
+
+def random_zones(count, area, rng):
+    """Star-shaped no-fly polygons of 8-200 vertices scattered over area, plus one keep-in boundary."""
+    zones = [Zone("operating-area", "keep_in", [np.array([(0, 0), (area, 0), (area, area), (0, area)], dtype=float)])]
+    for number in range(count):
+        vertices = int(rng.integers(8, 200))
+        angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+        radii = rng.uniform(50, 400) * rng.uniform(0.5, 1.0, vertices)
+        centre = rng.uniform(0, area, 2)
+        zones.append(Zone(f"zone-{number}", "no_fly", [centre + np.column_stack((radii * np.cos(angles),
+                                                                                radii * np.sin(angles)))]))
+    return zones
+
+
+def brute_force(zones, x, y):
+    """Reference even-odd test of every point against every no-fly zone."""
+    inside = np.zeros((len(x), len(zones)), dtype=bool)
+    for j, zone in enumerate(zones):
+        for ring in zone.rings:
+            x0, y0 = ring[:, 0], ring[:, 1]
+            x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+            crosses = (y0 > y[:, None]) != (y1 > y[:, None])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                inside[:, j] ^= (crosses & (x[:, None] < x0 + (y[:, None] - y0) * (x1 - x0) / (y1 - y0))).sum(axis=1) % 2 == 1
+    return inside
+
+
+def benchmark(drones=5000, zones=500, area=20000.0):
+    """Check a swarm against hundreds of zones, reloading them while queries run."""
+    rng = np.random.default_rng(0)
+    geofence = Geofence(margin=50.0)
+    start = time.perf_counter()
+    compiled = geofence.load(random_zones(zones, area, rng))
+    print(f"Compiled {len(compiled.zones)} zones, {compiled.edge_count} edges in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    x, y = rng.uniform(-500, area + 500, (2, drones))
+    result = geofence.check(x, y)
+    inside = brute_force(compiled.zones[1:], x, y)
+    expected = np.where(inside.any(axis=1), inside.argmax(axis=1) + 1, -1)
+    # Overlapping zones may report a different containing zone: compare containment only
+    print(f"Brute force check: {'match' if np.array_equal(result['no_fly'] >= 0, expected >= 0) else 'DIFFER'}, "
+          f"{int((result['no_fly'] >= 0).sum())} in no-fly zones, {int(result['outside'].sum())} outside the area")
+
+    latencies = []
+    for _ in range(50):
+        start = time.perf_counter()
+        result = geofence.check(x, y)
+        latencies.append(time.perf_counter() - start)
+    print(f"{drones} drones: {np.median(latencies) * 1000:.2f} ms per check, "
+          f"{int((result['nearest'] >= 0).sum())} within 50 m of a boundary")
+
+    single = []
+    for i in range(200):
+        start = time.perf_counter()
+        geofence.check(x[i:i + 1], y[i:i + 1])
+        single.append(time.perf_counter() - start)
+    print(f"Single drone update: {np.median(single) * 1e6:.0f} us per check")
+
+    # Hot reload: swap zone sets in a thread while the main loop keeps checking
+    sets = [random_zones(zones, area, rng) for _ in range(3)]
+    stop = threading.Event()
+
+    def reload():
+        while not stop.is_set():
+            for zone_set in sets:
+                geofence.load(zone_set)
+
+    thread = threading.Thread(target=reload, daemon=True)
+    thread.start()
+    latencies = []
+    for _ in range(50):
+        start = time.perf_counter()
+        geofence.check(x, y)
+        latencies.append(time.perf_counter() - start)
+    stop.set()
+    thread.join()
+    print(f"During reloads: {np.median(latencies) * 1000:.2f} ms median, {max(latencies) * 1000:.2f} ms max, "
+          f"{geofence.reloads - 1} reloads")
+
+
+if __name__ == "__main__":
+    # Usage: python geofence.py [drones]       benchmark
+    #        python geofence.py zones.geojson  watch a zone file and check a simulated swarm
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        geofence = Geofence()
+        geofence.load_geojson(sys.argv[1])
+        geofence.watch(sys.argv[1])
+        rng = np.random.default_rng()
+        lat0, lon0 = geofence.origin
+        positions = {f"drone-{i}": {"lat": lat0 + rng.normal(0, 0.01), "lon": lon0 + rng.normal(0, 0.01)}
+                     for i in range(50)}
+        while True:
+            for entry in positions.values():
+                entry["lat"] += rng.normal(0, 1e-5)
+                entry["lon"] += rng.normal(0, 1e-5)
+            for drone_id, status in sorted(geofence.check_snapshot(positions).items()):
+                print(drone_id, *status)
+            time.sleep(1.0)
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
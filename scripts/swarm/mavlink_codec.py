@@ -0,0 +1,137 @@
+import struct
+
+# Minimal MAVLink v1/v2 codec for the handful of messages the ground services use.
+# Only what is needed to follow many vehicles cheaply; dronekit/pymavlink remain
+# the tools for full vehicle control.
+
+MAGIC_V1 = 0xFE
+MAGIC_V2 = 0xFD
+
+HEARTBEAT = 0
+SYS_STATUS = 1
+ATTITUDE = 30
+GLOBAL_POSITION_INT = 33
+NAMED_VALUE_FLOAT = 251
+
+# msgid: (name, struct format, CRC extra, field names)
+MESSAGES = {
+    HEARTBEAT: ("HEARTBEAT", "<IBBBBB", 50,
+                ("custom_mode", "type", "autopilot", "base_mode", "system_status", "mavlink_version")),
+    SYS_STATUS: ("SYS_STATUS", "<IIIHHhHHHHHHb", 124,
+                 ("sensors_present", "sensors_enabled", "sensors_health", "load",
+                  "voltage_battery", "current_battery", "drop_rate_comm", "errors_comm",
+                  "errors_count1", "errors_count2", "errors_count3", "errors_count4",
+                  "battery_remaining")),
+    ATTITUDE: ("ATTITUDE", "<Iffffff", 39,
+               ("time_boot_ms", "roll", "pitch", "yaw", "rollspeed", "pitchspeed", "yawspeed")),
+    GLOBAL_POSITION_INT: ("GLOBAL_POSITION_INT", "<IiiiihhhH", 104,
+                          ("time_boot_ms", "lat", "lon", "alt", "relative_alt", "vx", "vy", "vz", "hdg")),
+    NAMED_VALUE_FLOAT: ("NAMED_VALUE_FLOAT", "<If10s", 170,
+                        ("time_boot_ms", "value", "name")),
+}
+
+MAV_MODE_FLAG_SAFETY_ARMED = 0x80
+
+
+def x25_crc(data, crc=0xFFFF):
+    """MAVLink checksum (CRC-16/MCRF4XX)."""
+    for byte in data:
+        tmp = byte ^ (crc & 0xFF)
+        tmp = (tmp ^ (tmp << 4)) & 0xFF
+        crc = ((crc >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)) & 0xFFFF
+    return crc
+
+
+def encode(msgid, values, sysid=1, compid=1, sequence=0):
+    """Encode a MAVLink v2 frame for one of the supported messages."""
+    _, payload_format, crc_extra, _ = MESSAGES[msgid]
+    payload = struct.pack(payload_format, *values)
+    # MAVLink 2 truncates trailing zero bytes of the payload
+    payload = payload.rstrip(b'\x00') or payload[:1]
+    header = struct.pack("<BBBBBBBHB", MAGIC_V2, len(payload), 0, 0, sequence & 0xFF, sysid, compid,
+                         msgid & 0xFFFF, msgid >> 16)
+    crc = x25_crc(header[1:] + payload)
+    crc = x25_crc(bytes([crc_extra]), crc)
+    return header + payload + struct.pack("<H", crc)
+
+
+def decode_payload(msgid, payload):
+    """Decode a payload into a dict; None for unsupported messages."""
+    message = MESSAGES.get(msgid)
+    if message is None:
+        return None
+    name, payload_format, _, fields = message
+    size = struct.calcsize(payload_format)
+    if len(payload) < size:
+        payload = payload + bytes(size - len(payload))
+    values = dict(zip(fields, struct.unpack_from(payload_format, payload)))
+    if "name" in values:
+        values["name"] = values["name"].split(b'\x00', 1)[0].decode('ascii', 'replace')
+    values["msg"] = name
+    return values
+
+
+class MavlinkParser:
+    """
+    Stream parser for MAVLink v1 and v2 frames.
+    Unsupported messages are skipped after their length is known; frames
+    with a bad checksum are dropped and the parser resyncs on the next magic byte.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+        self.skipped = 0
+
+    def feed(self, data):
+        """Return a list of (sysid, compid, msgid, fields) for every supported frame in data."""
+        self.buffer.extend(data)
+        buffer = self.buffer
+        messages = []
+        position = 0
+        size = len(buffer)
+
+        while position < size:
+            magic = buffer[position]
+            if magic == MAGIC_V2:
+                if size - position < 10:
+                    break
+                length = buffer[position + 1]
+                incompat = buffer[position + 2]
+                sysid, compid = buffer[position + 5], buffer[position + 6]
+                msgid = buffer[position + 7] | (buffer[position + 8] << 8) | (buffer[position + 9] << 16)
+                header_end = position + 10
+                frame_end = header_end + length + 2 + (13 if incompat & 0x01 else 0)
+            elif magic == MAGIC_V1:
+                if size - position < 6:
+                    break
+                length = buffer[position + 1]
+                sysid, compid, msgid = buffer[position + 3], buffer[position + 4], buffer[position + 5]
+                header_end = position + 6
+                frame_end = header_end + length + 2
+            else:
+                position += 1
+                continue
+
+            if size < frame_end:
+                break
+
+            message = MESSAGES.get(msgid)
+            payload_end = header_end + length
+            if message is None:
+                self.skipped += 1
+                position = frame_end
+                continue
+
+            crc = x25_crc(memoryview(buffer)[position + 1:payload_end])
+            crc = x25_crc(bytes([message[2]]), crc)
+            if crc != buffer[payload_end] | (buffer[payload_end + 1] << 8):
+                self.crc_errors += 1
+                position += 1
+                continue
+
+            messages.append((sysid, compid, msgid, decode_payload(msgid, bytes(buffer[header_end:payload_end]))))
+            position = frame_end
+
+        del buffer[:position]
+        return messages
@@ -0,0 +1,206 @@
+import math
+import sys
+import time
+import numpy as np
+
+EARTH_RADIUS = 6371000.0
+
+# Neighbour cells of a 3-D cell list: the cell itself and half of the 26 others,
+# so that every pair of adjacent cells is visited exactly once
+HALF_NEIGHBOURS = [(0, 0, 0)] + [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                                 if (dx, dy, dz) > (0, 0, 0)]
+ALL_NEIGHBOURS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+
+class CellList:
+    """
+    Spatial hash of 3-D points: points are sorted by the key of their cell,
+    and the points of any cell are a contiguous run found by binary search.
+    Building costs O(N log N); candidate pairs are generated for all points
+    at once, one neighbour offset at a time.
+    """
+
+    def __init__(self, positions, cell_size):
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.cell_size = cell_size
+        cells = np.floor(self.positions / cell_size).astype(np.int64)
+        # Shift by one so that neighbour offsets never go negative or alias across rows
+        cells -= cells.min(axis=0) - 1
+        self.extent = cells.max(axis=0) + 2
+        self.cells = cells
+        keys = self._keys(cells)
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def _keys(self, cells):
+        return (cells[:, 0] * self.extent[1] + cells[:, 1]) * self.extent[2] + cells[:, 2]
+
+    def candidate_pairs(self, offsets, queries=None):
+        """
+        Index pairs (i, j) of points in cells offset from each other, for
+        every offset. With queries (point indices) only those points are
+        used as i; without, offsets must be HALF_NEIGHBOURS and each pair is
+        produced once.
+        """
+        if queries is None:
+            queries = self.order
+            query_cells = self.cells[self.order]
+            rank = np.arange(len(queries))
+        else:
+            query_cells = self.cells[queries]
+            rank = None
+        firsts, seconds = [], []
+        for offset in offsets:
+            neighbour_keys = self._keys(query_cells + offset)
+            low = np.searchsorted(self.sorted_keys, neighbour_keys, side='left')
+            high = np.searchsorted(self.sorted_keys, neighbour_keys, side='right')
+            if rank is not None and offset == (0, 0, 0):
+                # Same cell: only later points, so each pair appears once
+                low = np.maximum(low, rank + 1)
+            counts = np.maximum(high - low, 0)
+            total = int(counts.sum())
+            if not total:
+                continue
+            first = np.repeat(queries, counts)
+            second = np.repeat(low - np.cumsum(counts) + counts, counts) + np.arange(total)
+            firsts.append(first)
+            seconds.append(self.order[second])
+        if not firsts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def close_pairs(positions, radius):
+    """All pairs (i, j, distance) of points closer than radius, i < j."""
+    positions = np.asarray(positions, dtype=np.float64)
+    if len(positions) < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    first, second = CellList(positions, radius).candidate_pairs(HALF_NEIGHBOURS)
+    distance = np.linalg.norm(positions[first] - positions[second], axis=1)
+    close = distance < radius
+    first, second, distance = first[close], second[close], distance[close]
+    swap = first > second
+    first[swap], second[swap] = second[swap], first[swap]
+    return first, second, distance
+
+
+def nearest_neighbours(positions, radius):
+    """
+    Index of and distance to the nearest other point for every point. Points
+    without a neighbour within radius are searched again with a doubled
+    radius until all are found.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    count = len(positions)
+    nearest = np.full(count, -1, dtype=np.int64)
+    distance = np.full(count, np.inf)
+    if count < 2:
+        return nearest, distance
+    pending = np.arange(count)
+    while len(pending):
+        first, second = CellList(positions, radius).candidate_pairs(ALL_NEIGHBOURS, pending)
+        keep = first != second
+        first, second = first[keep], second[keep]
+        d = np.linalg.norm(positions[first] - positions[second], axis=1)
+        # Smallest distance per point: sort by (point, distance) and take the first of each run
+        order = np.lexsort((d, first))
+        first, second, d = first[order], second[order], d[order]
+        starts = np.flatnonzero(np.r_[True, first[1:] != first[:-1]]) if len(first) else np.empty(0, dtype=np.int64)
+        found = d[starts] <= radius
+        nearest[first[starts[found]]] = second[starts[found]]
+        distance[first[starts[found]]] = d[starts[found]]
+        # Anything farther than radius might be beaten by a point outside the searched cells
+        pending = pending[np.isinf(distance[pending])]
+        radius *= 2
+    return nearest, distance
+
+
+class ProximityMonitor:
+    """
+    Per-tick separation check over the whole swarm: positions from the
+    telemetry aggregator are projected to local metres, then every pair
+    closer than the separation minimum and every drone's nearest neighbour
+    are found with a cell list in near-linear time.
+    """
+
+    def __init__(self, separation=10.0, warning=25.0, origin=None):
+        self.separation = separation
+        self.warning = warning
+        self.origin = origin
+        self.drone_ids = []
+        self.positions = np.empty((0, 3))
+
+    def update_from_snapshot(self, snapshot):
+        """Take positions from TelemetryAggregator.snapshot() (lat, lon, relative_alt)."""
+        entries = [(drone_id, entry) for drone_id, entry in snapshot.items()
+                   if entry.get("lat") is not None and entry.get("lon") is not None]
+        if not entries:
+            self.drone_ids, self.positions = [], np.empty((0, 3))
+            return
+        lat = np.array([entry["lat"] for _, entry in entries])
+        lon = np.array([entry["lon"] for _, entry in entries])
+        alt = np.array([entry.get("relative_alt") or 0.0 for _, entry in entries])
+        if self.origin is None:
+            self.origin = (float(lat.mean()), float(lon.mean()))
+        origin_lat, origin_lon = self.origin
+        x = np.radians(lon - origin_lon) * EARTH_RADIUS * math.cos(math.radians(origin_lat))
+        y = np.radians(lat - origin_lat) * EARTH_RADIUS
+        self.update([drone_id for drone_id, _ in entries], np.column_stack((x, y, alt)))
+
+    def update(self, drone_ids, positions):
+        self.drone_ids = list(drone_ids)
+        self.positions = np.asarray(positions, dtype=np.float64)
+
+    def conflicts(self, radius=None):
+        """List of (drone_a, drone_b, distance) closer than radius (default: the separation minimum)."""
+        first, second, distance = close_pairs(self.positions, radius or self.separation)
+        order = np.argsort(distance)
+        return [(self.drone_ids[i], self.drone_ids[j], float(d))
+                for i, j, d in zip(first[order].tolist(), second[order].tolist(), distance[order].tolist())]
+
+    def check(self):
+        """One tick: conflicts, warnings and every drone's nearest neighbour."""
+        first, second, distance = close_pairs(self.positions, self.warning)
+        nearest, nearest_distance = nearest_neighbours(self.positions, self.warning)
+        conflict = distance < self.separation
+        return {
+            "conflicts": [(self.drone_ids[i], self.drone_ids[j], float(d)) for i, j, d in
+                          zip(first[conflict].tolist(), second[conflict].tolist(), distance[conflict].tolist())],
+            "warnings": int((~conflict).sum()),
+            "nearest": {drone_id: (self.drone_ids[j] if j >= 0 else None, float(d))
+                        for drone_id, j, d in zip(self.drone_ids, nearest.tolist(), nearest_distance.tolist())},
+        }
+
+
+def benchmark(drones=5000, ticks=20):
+    """Thousands of drones moving over 3 x 3 km at 20-120 m; checks against brute force on a subset."""
+    rng = np.random.default_rng(0)
+    positions = np.column_stack((rng.uniform(0, 3000, drones), rng.uniform(0, 3000, drones),
+                                 rng.uniform(20, 120, drones)))
+    velocity = rng.normal(0, 5, (drones, 3)) * (1, 1, 0.1)
+
+    sample = positions[:1500]
+    first, second, _ = close_pairs(sample, 25.0)
+    d = np.linalg.norm(sample[:, None] - sample[None], axis=2)
+    expected = int(((d < 25.0).sum() - len(sample)) // 2)
+    nearest, _ = nearest_neighbours(sample, 25.0)
+    np.fill_diagonal(d, np.inf)
+    print(f"Brute force check: {len(first)} of {expected} close pairs, "
+          f"nearest neighbours {'match' if np.array_equal(nearest, d.argmin(axis=1)) else 'DIFFER'}")
+
+    monitor = ProximityMonitor(separation=10.0, warning=25.0)
+    ids = [f"drone-{i}" for i in range(drones)]
+    elapsed = 0.0
+    for _ in range(ticks):
+        positions = positions + velocity * 0.1
+        start = time.perf_counter()
+        monitor.update(ids, positions)
+        result = monitor.check()
+        elapsed += time.perf_counter() - start
+    print(f"{drones} drones: {elapsed / ticks * 1000:.1f} ms per tick, {len(result['conflicts'])} conflicts, "
+          f"{result['warnings']} warnings")
+
+
+if __name__ == "__main__":
+    # Usage: python proximity.py [drones]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
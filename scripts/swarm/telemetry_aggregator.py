@@ -0,0 +1,254 @@
+import asyncio
+import math
+import random
+import sys
+import time
+
+from mavlink_codec import (MavlinkParser, encode, HEARTBEAT, SYS_STATUS, ATTITUDE,
+                           GLOBAL_POSITION_INT, NAMED_VALUE_FLOAT, MAV_MODE_FLAG_SAFETY_ARMED)
+
+
+def parse_address(address):
+    """Split 'udp:host:port', 'udpin:host:port' or 'host:port' into (host, port)."""
+    parts = address.split(':')
+    if parts[0] in ("udp", "udpin"):
+        parts = parts[1:]
+    return parts[0] or "0.0.0.0", int(parts[1])
+
+
+def decode_fields(message):
+    """Map a decoded MAVLink message to state table fields."""
+    kind = message["msg"]
+    if kind == "GLOBAL_POSITION_INT":
+        return {
+            "lat": message["lat"] / 1e7,
+            "lon": message["lon"] / 1e7,
+            "alt": message["alt"] / 1000.0,
+            "relative_alt": message["relative_alt"] / 1000.0,
+            "vx": message["vx"] / 100.0,
+            "vy": message["vy"] / 100.0,
+            "vz": message["vz"] / 100.0,
+            "heading": message["hdg"] / 100.0 if message["hdg"] != 65535 else None,
+        }
+    if kind == "ATTITUDE":
+        return {
+            "roll": math.degrees(message["roll"]),
+            "pitch": math.degrees(message["pitch"]),
+            "yaw": math.degrees(message["yaw"]),
+        }
+    if kind == "HEARTBEAT":
+        return {
+            "armed": bool(message["base_mode"] & MAV_MODE_FLAG_SAFETY_ARMED),
+            "custom_mode": message["custom_mode"],
+            "system_status": message["system_status"],
+        }
+    if kind == "SYS_STATUS":
+        return {
+            "battery_voltage": message["voltage_battery"] / 1000.0,
+            "battery_remaining": message["battery_remaining"],
+        }
+    return {}
+
+
+class VehicleProtocol(asyncio.DatagramProtocol):
+    """UDP endpoint receiving MAVLink from one vehicle (or a router forwarding several)."""
+
+    def __init__(self, aggregator, drone_id=None):
+        self.aggregator = aggregator
+        self.drone_id = drone_id
+        self.parser = MavlinkParser()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        for sysid, _, _, message in self.parser.feed(data):
+            drone_id = self.drone_id if self.drone_id is not None else f"drone-{sysid}"
+            self.aggregator.handle_message(drone_id, sysid, message)
+
+
+class TelemetryAggregator:
+    """
+    Shared, in-memory state table for the whole swarm.
+    Holds one UDP endpoint per vehicle connection, keeps the latest telemetry
+    and sensor readings per drone, and offers snapshots plus a change stream.
+    """
+
+    def __init__(self, queue_size=10000):
+        self.state = {}
+        self.endpoints = {}
+        self.subscribers = []
+        self.queue_size = queue_size
+
+        self.messages_received = 0
+        self.changes_published = 0
+        self.subscriber_drops = 0
+
+    async def connect(self, address, drone_id=None):
+        """Start listening for a vehicle on a UDP address such as '127.0.0.1:14550'."""
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: VehicleProtocol(self, drone_id), local_addr=parse_address(address))
+        self.endpoints[address] = (transport, protocol)
+        return protocol
+
+    async def connect_all(self, addresses):
+        """Connect many vehicles concurrently; addresses maps address -> drone_id (or None)."""
+        await asyncio.gather(*(self.connect(address, drone_id) for address, drone_id in addresses.items()))
+
+    def close(self):
+        for transport, _ in self.endpoints.values():
+            transport.close()
+        self.endpoints.clear()
+
+    def handle_message(self, drone_id, sysid, message):
+        """Merge one decoded message into the state table and publish what changed."""
+        self.messages_received += 1
+        now = time.time()
+        entry = self.state.get(drone_id)
+        if entry is None:
+            entry = self.state[drone_id] = {"drone_id": drone_id, "sysid": sysid, "sensors": {},
+                                            "messages": 0, "first_seen": now}
+        entry["messages"] += 1
+        entry["last_update"] = now
+
+        if message["msg"] == "NAMED_VALUE_FLOAT":
+            # Hazard sensors (gas, flood, voltage, ...) forwarded by the companion computer
+            sensors = entry["sensors"]
+            if sensors.get(message["name"]) == message["value"]:
+                return
+            sensors[message["name"]] = message["value"]
+            changes = {"sensors": {message["name"]: message["value"]}}
+        else:
+            changes = {}
+            for field, value in decode_fields(message).items():
+                if entry.get(field) != value:
+                    entry[field] = value
+                    changes[field] = value
+            if not changes:
+                return
+
+        self.publish({"drone_id": drone_id, "time": now, "changes": changes})
+
+    def publish(self, event):
+        self.changes_published += 1
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.subscriber_drops += 1
+
+    def subscribe(self, maxsize=None):
+        """Return a queue receiving {'drone_id', 'time', 'changes'} events."""
+        queue = asyncio.Queue(maxsize or self.queue_size)
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    async def changes(self, maxsize=None):
+        """Async iterator over the change stream."""
+        queue = self.subscribe(maxsize)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    def snapshot(self, drone_id=None):
+        """
+        Copy of the state table (or one drone's entry) with the age of the last
+        update. Returns None for a drone that has not been heard from.
+        """
+        now = time.time()
+        if drone_id is not None and drone_id not in self.state:
+            return None
+        entries = self.state.items() if drone_id is None else [(drone_id, self.state[drone_id])]
+        return {key: dict(entry, sensors=dict(entry["sensors"]), age_s=now - entry["last_update"])
+                for key, entry in entries}
+
+    def stats(self):
+        return {
+            "drones": len(self.state),
+            "messages_received": self.messages_received,
+            "changes_published": self.changes_published,
+            "subscriber_drops": self.subscriber_drops,
+            "crc_errors": sum(protocol.parser.crc_errors for _, protocol in self.endpoints.values()),
+        }
+
+
+async def simulate_vehicle(address, sysid, rate_hz=10, duration=None):
+    """Local MAVLink/UDP stand-in for a drone: heartbeats, position, attitude and gas readings."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=parse_address(address))
+    lat, lon = 45.815 + random.uniform(-0.01, 0.01), 15.982 + random.uniform(-0.01, 0.01)
+    sequence = 0
+    start = time.time()
+    try:
+        while duration is None or time.time() - start < duration:
+            boot_ms = int((time.time() - start) * 1000)
+            heading = (boot_ms / 100.0) % 360
+            lat += 1e-6 * math.cos(math.radians(heading))
+            lon += 1e-6 * math.sin(math.radians(heading))
+            frames = [
+                encode(GLOBAL_POSITION_INT, (boot_ms, int(lat * 1e7), int(lon * 1e7), 120000, 20000,
+                                             100, 0, 0, int(heading * 100)), sysid, 1, sequence),
+                encode(ATTITUDE, (boot_ms, random.gauss(0, 0.02), random.gauss(0, 0.02),
+                                  math.radians(heading) - math.pi, 0, 0, 0), sysid, 1, sequence + 1),
+                encode(NAMED_VALUE_FLOAT, (boot_ms, max(0.0, random.gauss(5, 2)), b"gas"), sysid, 1, sequence + 2),
+            ]
+            if sequence % (3 * rate_hz) == 0:
+                frames.append(encode(HEARTBEAT, (4, 2, 3, MAV_MODE_FLAG_SAFETY_ARMED | 0x01, 4, 3), sysid, 1))
+                frames.append(encode(SYS_STATUS, (0, 0, 0, 300, 15800, 1200, 0, 0, 0, 0, 0, 0, 87), sysid, 1))
+            for frame in frames:
+                transport.sendto(frame)
+            sequence += 3
+            await asyncio.sleep(1 / rate_hz)
+    finally:
+        transport.close()
+
+
+async def simulate_swarm(count, base_port=15000, duration=5.0):
+    """Aggregate a simulated swarm of count drones, each on its own UDP port."""
+    aggregator = TelemetryAggregator()
+    addresses = {f"127.0.0.1:{base_port + i}": f"drone-{i + 1}" for i in range(count)}
+    await aggregator.connect_all(addresses)
+    changes = aggregator.subscribe()
+
+    start = time.time()
+    await asyncio.gather(*(simulate_vehicle(address, i % 255 + 1, duration=duration)
+                           for i, address in enumerate(addresses)))
+    elapsed = time.time() - start
+    aggregator.close()
+
+    print(f"{aggregator.stats()['drones']} drones, {aggregator.messages_received / elapsed:.0f} messages/s, " +
+          f"{changes.qsize()} queued change events")
+    print(aggregator.stats())
+    for drone_id, entry in list(aggregator.snapshot().items())[:3]:
+        print(drone_id, {key: entry.get(key) for key in ("lat", "lon", "relative_alt", "armed", "sensors", "age_s")})
+
+
+async def main(addresses):
+    aggregator = TelemetryAggregator()
+    await aggregator.connect_all({address: None for address in addresses})
+    print(f"Listening on {', '.join(addresses)}")
+    try:
+        async for event in aggregator.changes():
+            print(event)
+    finally:
+        aggregator.close()
+
+
+if __name__ == "__main__":
+    # Usage: python telemetry_aggregator.py 127.0.0.1:14550 [127.0.0.1:14560 ...]
+    #        python telemetry_aggregator.py --simulate 200
+    if len(sys.argv) > 2 and sys.argv[1] == "--simulate":
+        asyncio.run(simulate_swarm(int(sys.argv[2])))
+    else:
+        try:
+            asyncio.run(main(sys.argv[1:] or ["127.0.0.1:14550"]))
+        except KeyboardInterrupt:
+            print("\nExiting aggregator.")
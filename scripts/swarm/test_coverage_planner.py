@@ -0,0 +1,50 @@
+import numpy as np
+
+from coverage_planner import CoveragePlanner
+
+
+def planned(drones=20):
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, 2000, (drones, 2))
+    planner = CoveragePlanner([(0, 0), (2000, 0), (2000, 2000), (0, 2000)], cell_size=50.0)
+    planner.plan([f"d{i}" for i in range(drones)], positions)
+    return planner
+
+
+def assert_paths_match_owners(planner):
+    for j, drone_id in enumerate(planner.drone_ids):
+        if not planner.active[j]:
+            continue
+        owned = {tuple(cell) for cell in planner.cells[planner.owner == j].tolist()}
+        path = {tuple(cell) for cell in planner.paths[drone_id].tolist()}
+        assert path == owned, drone_id
+
+
+def test_hotspot_replans_every_drone_whose_cells_changed():
+    planner = planned()
+    before = planner.owner.copy()
+    # Four urgent cells but more candidate drones: some previous owners lose theirs
+    affected = planner.add_hotspot(1000.0, 1000.0, 60.0)
+    changed = np.unique(np.r_[before[before != planner.owner], planner.owner[before != planner.owner]])
+    assert {planner.drone_ids[j] for j in changed} <= set(affected)
+    assert_paths_match_owners(planner)
+
+
+def test_hotspot_goes_to_the_nearest_candidates():
+    planner = planned()
+    planner.neighbours = 2
+    hotspot = np.array([1000.0, 1000.0])
+    near = np.hypot(*(planner.cells - hotspot).T) <= 60.0
+    previous = set(planner.owner[near].tolist())
+    planner.add_hotspot(*hotspot, 60.0)
+    candidates = sorted(previous | set(np.argsort(np.hypot(*(planner.positions - hotspot).T))[:2].tolist()),
+                        key=lambda j: np.hypot(*(planner.positions[j] - hotspot)))
+    assert set(planner.owner[near].tolist()) <= set(candidates[:int(near.sum())])
+
+
+def test_dropped_drone_cells_are_reassigned():
+    planner = planned()
+    planner.drop_drone("d3")
+    assert not np.any(planner.owner == 3) and np.all(planner.owner >= 0)
+    assert "d3" not in planner.paths
+    assert_paths_match_owners(planner)
@@ -0,0 +1,73 @@
+import asyncio
+import socket
+
+from mavlink_codec import encode, HEARTBEAT, NAMED_VALUE_FLOAT, MAV_MODE_FLAG_SAFETY_ARMED
+from telemetry_aggregator import TelemetryAggregator, simulate_vehicle
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_simulated_swarm_fills_state_table():
+    async def run():
+        aggregator = TelemetryAggregator()
+        addresses = {f"127.0.0.1:{free_udp_port()}": f"drone-{i + 1}" for i in range(3)}
+        await aggregator.connect_all(addresses)
+        changes = aggregator.subscribe()
+        await asyncio.gather(*(simulate_vehicle(address, i + 1, rate_hz=20, duration=0.5)
+                               for i, address in enumerate(addresses)))
+        await asyncio.sleep(0.05)
+        stats = aggregator.stats()
+        aggregator.close()
+        return aggregator, changes, stats
+
+    aggregator, changes, stats = asyncio.run(run())
+    snapshot = aggregator.snapshot()
+    assert sorted(snapshot) == ["drone-1", "drone-2", "drone-3"]
+    for entry in snapshot.values():
+        assert entry["armed"] is True
+        assert 45.8 < entry["lat"] < 45.83 and 15.97 < entry["lon"] < 15.995
+        assert entry["relative_alt"] == 20.0
+        assert entry["battery_voltage"] == 15.8
+        assert "gas" in entry["sensors"]
+    assert stats["drones"] == 3 and stats["crc_errors"] == 0
+    assert changes.qsize() == aggregator.changes_published
+
+
+def test_unchanged_values_are_not_republished():
+    aggregator = TelemetryAggregator()
+    heartbeat = {"msg": "HEARTBEAT", "base_mode": MAV_MODE_FLAG_SAFETY_ARMED, "custom_mode": 4, "system_status": 4}
+    aggregator.handle_message("drone-1", 1, heartbeat)
+    aggregator.handle_message("drone-1", 1, heartbeat)
+    aggregator.handle_message("drone-1", 1, {"msg": "NAMED_VALUE_FLOAT", "name": "gas", "value": 3.0})
+    aggregator.handle_message("drone-1", 1, {"msg": "NAMED_VALUE_FLOAT", "name": "gas", "value": 3.0})
+    assert aggregator.messages_received == 4
+    assert aggregator.changes_published == 2
+
+
+def test_snapshot_of_unknown_drone_is_none():
+    aggregator = TelemetryAggregator()
+    assert aggregator.snapshot("drone-9") is None
+    aggregator.handle_message("drone-1", 1, {"msg": "NAMED_VALUE_FLOAT", "name": "gas", "value": 1.5})
+    assert aggregator.snapshot("drone-1")["drone-1"]["sensors"] == {"gas": 1.5}
+    assert aggregator.snapshot("drone-9") is None
+
+
+def test_corrupted_datagram_counts_crc_error():
+    async def run():
+        aggregator = TelemetryAggregator()
+        address = f"127.0.0.1:{free_udp_port()}"
+        protocol = await aggregator.connect(address, "drone-1")
+        frame = bytearray(encode(NAMED_VALUE_FLOAT, (0, 2.5, b"gas"), 1, 1))
+        frame[-1] ^= 0xFF
+        protocol.datagram_received(bytes(frame), None)
+        protocol.datagram_received(encode(HEARTBEAT, (4, 2, 3, 0, 4, 3), 1, 1), None)
+        aggregator.close()
+        return aggregator, protocol
+
+    aggregator, protocol = asyncio.run(run())
+    assert protocol.parser.crc_errors == 1
+    assert aggregator.snapshot("drone-1")["drone-1"]["armed"] is False
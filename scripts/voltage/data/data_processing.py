@@ -1,34 +1,55 @@
-import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'pipeline'))
+from rolling_window import RollingWindow
+from alert_dispatcher import AlertDispatcher, TwilioSmsProvider, SmtpEmailProvider
+import metrics
 
 # Define parameters
 WINDOW_SIZE = 10  # Number of readings for moving average
 THRESHOLD = 240.0  # Example threshold voltage (in Volts); adjust as needed
+Z_THRESHOLD = 4.0  # Deviation from the moving average, in standard deviations
+EWMA_ALPHA = 0.2  # Smoothing factor of the fast EWMA band
+MIN_READINGS = 5  # Readings needed before the statistical rules apply
+METRICS_PORT = 9102  # Alert delivery metrics of this process, at http://<host>:9102/metrics
 
-voltage_buffer = []
+voltage_window = RollingWindow(WINDOW_SIZE, alpha=EWMA_ALPHA)
 
 def update_buffer(new_voltage):
-    voltage_buffer.append(new_voltage)
-    if len(voltage_buffer) > WINDOW_SIZE:
-        voltage_buffer.pop(0)
+    voltage_window.update(new_voltage)
 
 def detect_voltage_anomaly(voltage):
-    # Simple threshold check; you might enhance with standard deviation or more advanced methods
-    return voltage > THRESHOLD
+    """Fixed over-voltage threshold, plus outliers against the moving window and the EWMA band."""
+    if voltage > THRESHOLD:
+        return True
+    if voltage_window.count < MIN_READINGS:
+        return False
+    return abs(voltage_window.zscore(voltage)[0]) > Z_THRESHOLD or abs(voltage_window.ewma_zscore(voltage)[0]) > Z_THRESHOLD
 
-# Assume send_email_alert() and send_sms_alert() functions are defined as in the methane example.
 TO_EMAIL = "recipient@example.com"
 TO_PHONE = "+19876543210"  # Recipient's phone number in E.164 format
 
+# Alerts are delivered in the background, deduplicated and rate limited per recipient
+dispatcher = AlertDispatcher({
+    "sms": TwilioSmsProvider("your_account_sid", "your_auth_token", "+1234567890"),
+    "email": SmtpEmailProvider("smtp.example.com", username="alerts@example.com", password="your_password"),
+})
+dispatcher.start_background()
+metrics.serve(METRICS_PORT)
+
 while True:
     voltage = read_voltage()
     if voltage is not None:
+        # Judge the reading against the window before it joins it
+        anomaly = detect_voltage_anomaly(voltage)
         update_buffer(voltage)
-        avg_voltage = np.mean(voltage_buffer)
+        avg_voltage = voltage_window.mean()[0]
         print(f"Voltage: {voltage} V | Moving Avg: {avg_voltage:.2f} V")
-        if detect_voltage_anomaly(voltage):
+        if anomaly:
             alert_msg = f"ALERT: Voltage anomaly detected! Current reading: {voltage} V"
-            send_email_alert("Voltage Anomaly Alert", alert_msg, TO_EMAIL)
-            send_sms_alert(alert_msg, TO_PHONE)
+            dispatcher.submit_threadsafe("email", TO_EMAIL, "Voltage Anomaly Alert", alert_msg, key="voltage")
+            dispatcher.submit_threadsafe("sms", TO_PHONE, "Voltage Anomaly Alert", alert_msg, key="voltage")
             # Optional: Take additional safety measures (e.g., command the drone)
     time.sleep(0.5)
 
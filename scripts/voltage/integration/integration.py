@@ -1,27 +1,38 @@
-import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'pipeline'))
+from rolling_window import RollingWindow
 
 # Define parameters
 WINDOW_SIZE = 10  # Number of readings for moving average
 THRESHOLD = 240.0  # Example threshold voltage (in Volts); adjust as needed
+Z_THRESHOLD = 4.0  # Deviation from the moving average, in standard deviations
+EWMA_ALPHA = 0.2  # Smoothing factor of the fast EWMA band
+MIN_READINGS = 5  # Readings needed before the statistical rules apply
 
-voltage_buffer = []
+voltage_window = RollingWindow(WINDOW_SIZE, alpha=EWMA_ALPHA)
 
 def update_buffer(new_voltage):
-    voltage_buffer.append(new_voltage)
-    if len(voltage_buffer) > WINDOW_SIZE:
-        voltage_buffer.pop(0)
+    voltage_window.update(new_voltage)
 
 def detect_voltage_anomaly(voltage):
-    # Simple threshold check; you might enhance with standard deviation or more advanced methods
-    return voltage > THRESHOLD
+    """Fixed over-voltage threshold, plus outliers against the moving window and the EWMA band."""
+    if voltage > THRESHOLD:
+        return True
+    if voltage_window.count < MIN_READINGS:
+        return False
+    return abs(voltage_window.zscore(voltage)[0]) > Z_THRESHOLD or abs(voltage_window.ewma_zscore(voltage)[0]) > Z_THRESHOLD
 
 while True:
     voltage = read_voltage()
     if voltage is not None:
+        # Judge the reading against the window before it joins it
+        anomaly = detect_voltage_anomaly(voltage)
         update_buffer(voltage)
-        avg_voltage = np.mean(voltage_buffer)
+        avg_voltage = voltage_window.mean()[0]
         print(f"Current Voltage: {voltage} V | Moving Avg: {avg_voltage:.2f} V")
-        if detect_voltage_anomaly(voltage):
+        if anomaly:
             print("ALERT: Voltage anomaly detected!")
             # Trigger alert functions (see Steps 4 and 5 below)
     time.sleep(0.5)